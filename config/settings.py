@@ -39,12 +39,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'gate.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # <--- ADDED THIS FOR VERCEL
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'gate.sessions.SlidingSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gate.devices.DeviceKeyMiddleware',
+    'gate.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -53,7 +57,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Stock DjangoTemplates plus render timing for /metrics.
+        'BACKEND': 'gate.metrics.DjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,6 +82,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Take the write lock when a transaction starts, so concurrent
+        # toggles wait for each other instead of failing with
+        # "database is locked" when a read lock cannot be upgraded.
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
     }
 }
 
@@ -85,6 +94,18 @@ database_url = os.environ.get("DATABASE_URL")
 if database_url:
     DATABASES["default"] = dj_database_url.parse(database_url)
 
+# Read replicas: comma-separated URLs, e.g. a second SQLite file for local
+# testing (DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3, a copy of
+# db.sqlite3). Read-only requests read from them through
+# gate.replicas.PrimaryReplicaRouter; a user's reads stay on the primary for
+# GATE_REPLICA_STICKY_SECONDS after they write anything.
+GATE_DATABASE_REPLICAS = []
+for i, replica_url in enumerate(filter(None, os.environ.get("DATABASE_REPLICA_URLS", "").split(",")), 1):
+    DATABASES[f"replica{i}"] = dj_database_url.parse(replica_url.strip())
+    DATABASES[f"replica{i}"]["TEST"] = {"MIRROR": "default"}
+    GATE_DATABASE_REPLICAS.append(f"replica{i}")
+DATABASE_ROUTERS = ["gate.replicas.PrimaryReplicaRouter"] if GATE_DATABASE_REPLICAS else []
+GATE_REPLICA_STICKY_SECONDS = int(os.environ.get("GATE_REPLICA_STICKY_SECONDS", "10"))
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -134,8 +155,133 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 SESSION_COOKIE_AGE = 3 * 60 * 60      # 10800 seconds
-SESSION_SAVE_EVERY_REQUEST = True     # extend on activity
+# Activity extends the session through gate.sessions.SlidingSessionMiddleware,
+# which re-saves it only once this fraction of SESSION_COOKIE_AGE has passed
+# (every 18 minutes by default) instead of on every request.
+SESSION_SAVE_EVERY_REQUEST = False
+GATE_SESSION_REFRESH_FRACTION = float(os.environ.get("GATE_SESSION_REFRESH_FRACTION", "0.1"))
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 
+# The default cache is per-process memory unless GATE_CACHE_BACKEND and
+# GATE_CACHE_LOCATION point every worker at one cache server, e.g.
+# django.core.cache.backends.redis.RedisCache and redis://host:6379/0
+# (install the redis package for that). GATE_SHARED_CACHE records which:
+# caches that other workers can't see are given shorter TTLs below.
+GATE_CACHE_BACKEND = os.environ.get("GATE_CACHE_BACKEND", "")
+_shared_cache = (
+    {"BACKEND": GATE_CACHE_BACKEND, "LOCATION": os.environ.get("GATE_CACHE_LOCATION", "")}
+    if GATE_CACHE_BACKEND
+    else None
+)
+GATE_SHARED_CACHE = _shared_cache is not None
+if _shared_cache:
+    _sessions_cache = {**_shared_cache, "KEY_PREFIX": "sessions"}
+elif os.environ.get("GATE_CACHE_DIR"):
+    _sessions_cache = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(os.environ["GATE_CACHE_DIR"], "sessions"),
+    }
+else:
+    _sessions_cache = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "sessions"}
+CACHES = {
+    "default": _shared_cache or {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "sessions": _sessions_cache,
+}
+
+# Sessions are read through the "sessions" cache and written through to the
+# database only when every worker shares that cache (a cache server, or a
+# GATE_CACHE_DIR on a disk they all see). With per-process memory a logout
+# in one worker would leave the session cached in the others, so they stay
+# in the database.
+SESSION_ENGINE = os.environ.get(
+    "SESSION_ENGINE",
+    "django.contrib.sessions.backends.cached_db"
+    if GATE_SHARED_CACHE or os.environ.get("GATE_CACHE_DIR")
+    else "django.contrib.sessions.backends.db",
+)
+SESSION_CACHE_ALIAS = "sessions"
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# Gate scanning
+# A repeat scan of the same student within this many seconds returns the
+# earlier result instead of flipping them back. 0 disables the window.
+GATE_TOGGLE_DEBOUNCE_SECONDS = int(os.environ.get("GATE_TOGGLE_DEBOUNCE_SECONDS", "0"))
+# Upper bound on scans accepted by one /api/toggle/batch/ request.
+GATE_BATCH_MAX_SCANS = int(os.environ.get("GATE_BATCH_MAX_SCANS", "1000"))
+# Seconds before the in-process search index (used on SQLite) is rebuilt
+# to pick up writes made by other processes.
+GATE_SEARCH_INDEX_TTL = int(os.environ.get("GATE_SEARCH_INDEX_TTL", "60"))
+# How long home/dashboard may serve cached inside/outside totals.
+GATE_OCCUPANCY_CACHE_SECONDS = int(os.environ.get("GATE_OCCUPANCY_CACHE_SECONDS", "10"))
+# Rows per page on the logs and inside/outside lists.
+GATE_PAGE_SIZE = int(os.environ.get("GATE_PAGE_SIZE", "100"))
+# Days of movement logs kept in the hot table; older rows are moved to the
+# archive table by `manage.py archive_logs`.
+GATE_LOG_RETENTION_DAYS = int(os.environ.get("GATE_LOG_RETENTION_DAYS", "180"))
+# Background threads that resize uploaded movement photos (0 = inline,
+# after the request's transaction commits).
+GATE_PHOTO_WORKERS = int(os.environ.get("GATE_PHOTO_WORKERS", "2"))
+# Keep the full-resolution upload next to the generated renditions.
+GATE_PHOTO_KEEP_ORIGINAL = os.environ.get("GATE_PHOTO_KEEP_ORIGINAL") == "1"
+# Live dashboard events (/events/, served through config.asgi).
+GATE_EVENT_BROKER = os.environ.get("GATE_EVENT_BROKER", "gate.events.LocalBroker")
+GATE_EVENT_QUEUE_SIZE = int(os.environ.get("GATE_EVENT_QUEUE_SIZE", "50"))
+GATE_EVENT_HEARTBEAT_SECONDS = int(os.environ.get("GATE_EVENT_HEARTBEAT_SECONDS", "15"))
+# Device roster sync (/api/sync/): re-send changes this many seconds before
+# the client's watermark, and fall back to a full snapshot above this size.
+GATE_SYNC_OVERLAP_SECONDS = int(os.environ.get("GATE_SYNC_OVERLAP_SECONDS", "2"))
+GATE_SYNC_MAX_DELTA = int(os.environ.get("GATE_SYNC_MAX_DELTA", "5000"))
+# How long the roster version behind the ETag / Last-Modified headers of
+# /api/check/ and /api/search/ may be served from the cache.
+GATE_ROSTER_VERSION_CACHE_SECONDS = int(os.environ.get("GATE_ROSTER_VERSION_CACHE_SECONDS", "10"))
+# Per-view latency, query and template timings, exposed at /metrics/ to
+# staff users or to requests sending "Authorization: Bearer <token>".
+GATE_METRICS_ENABLED = os.environ.get("GATE_METRICS_ENABLED", "1") == "1"
+GATE_METRICS_TOKEN = os.environ.get("GATE_METRICS_TOKEN", "")
+# Log requests slower than this many seconds, with their SQL, to the
+# "gate.slow" logger. 0 disables the log.
+GATE_SLOW_REQUEST_SECONDS = float(os.environ.get("GATE_SLOW_REQUEST_SECONDS", "0"))
+# `manage.py rollup_movements` leaves logs inserted less than this many
+# seconds ago for its next run, so transactions still committing are not
+# skipped.
+GATE_ROLLUP_LAG_SECONDS = int(os.environ.get("GATE_ROLLUP_LAG_SECONDS", "60"))
+# Curfew report (/curfew/, `manage.py curfew_report`): local curfew window
+# and the absence length that counts as a long absence.
+GATE_CURFEW_START = os.environ.get("GATE_CURFEW_START", "22:00")
+GATE_CURFEW_END = os.environ.get("GATE_CURFEW_END", "06:00")
+GATE_LONG_ABSENCE_HOURS = int(os.environ.get("GATE_LONG_ABSENCE_HOURS", "48"))
+# Scanner device keys ("Authorization: Device <key>" on the JSON API):
+# verified keys are kept in a per-process LRU of this size for this long.
+# Changing a key also drops other processes' entries when the default cache
+# is shared; otherwise a revoked key keeps working in them until the TTL
+# runs out, hence the short default then.
+GATE_DEVICE_CACHE_SIZE = int(os.environ.get("GATE_DEVICE_CACHE_SIZE", "1024"))
+GATE_DEVICE_CACHE_SECONDS = int(os.environ.get("GATE_DEVICE_CACHE_SECONDS", "300" if GATE_SHARED_CACHE else "30"))
+# Student card lookups (check page, /api/check/): a per-process LRU of
+# GATE_CARD_LOCAL_SIZE cards kept GATE_CARD_LOCAL_SECONDS, in front of the
+# default cache, which keeps cards GATE_CARD_CACHE_SECONDS when it is shared
+# (GATE_SHARED_CACHE) and is skipped otherwise. A write drops the card from
+# the shared cache and from its own process's LRU; other processes' LRUs
+# expire within GATE_CARD_LOCAL_SECONDS.
+GATE_CARD_LOCAL_SIZE = int(os.environ.get("GATE_CARD_LOCAL_SIZE", "2048"))
+GATE_CARD_LOCAL_SECONDS = int(os.environ.get("GATE_CARD_LOCAL_SECONDS", "5"))
+GATE_CARD_CACHE_SECONDS = int(os.environ.get("GATE_CARD_CACHE_SECONDS", "300"))
+# Write-behind movement logs for the evening rush (gate.journal): with
+# GATE_LOG_JOURNAL=1 a toggle updates the student synchronously but appends
+# its log to an fsynced file in GATE_LOG_JOURNAL_DIR; a background thread
+# inserts the logs in batches of GATE_LOG_JOURNAL_BATCH_SIZE or every
+# GATE_LOG_JOURNAL_FLUSH_SECONDS. The directory must be on local, persistent
+# disk. Drain with `manage.py flush_movement_journal`; rows the database
+# refuses land in its dead-letter.jsonl. Retries of a not yet flushed toggle
+# are recognised through the default cache, so run several workers only with
+# a shared cache there (the locmem default is per process).
+GATE_LOG_JOURNAL = os.environ.get("GATE_LOG_JOURNAL") == "1"
+GATE_LOG_JOURNAL_DIR = Path(os.environ.get("GATE_LOG_JOURNAL_DIR", BASE_DIR / "journal"))
+GATE_LOG_JOURNAL_BATCH_SIZE = int(os.environ.get("GATE_LOG_JOURNAL_BATCH_SIZE", "500"))
+GATE_LOG_JOURNAL_FLUSH_SECONDS = float(os.environ.get("GATE_LOG_JOURNAL_FLUSH_SECONDS", "2"))
+GATE_LOG_JOURNAL_FSYNC = os.environ.get("GATE_LOG_JOURNAL_FSYNC", "1") == "1"
+# Pages served through WSGI (no /events/ stream) poll their inside/outside
+# totals this often.
+GATE_COUNTS_POLL_SECONDS = int(os.environ.get("GATE_COUNTS_POLL_SECONDS", "30"))
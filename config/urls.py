@@ -10,18 +10,33 @@ urlpatterns = [
 
     path("", views.home, name="home"),
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("events/", views.events_stream, name="events"),
+    path("api/counts/", views.api_counts, name="api_counts"),
 
     path("check/", views.check, name="check"),
     path("toggle/", views.toggle_status, name="toggle"),
 
     path("inside/", views.current_inside, name="inside"),
     path("outside/", views.current_outside, name="outside"),
+    path("curfew/", views.curfew_report, name="curfew"),
     path("logs/", views.logs, name="logs"),
+    path("logs/export/", views.export_logs, name="export_logs"),
+    path("analytics/", views.analytics, name="analytics"),
 
     path("students/add/", views.add_student, name="add_student"),
     path("students/<int:pk>/edit/", views.edit_student, name="edit_student"),
     path("students/import/", views.import_students_csv, name="import_students_csv"),
 
+    path("api/search/", views.api_search, name="api_search"),
+    path("api/autocomplete/", views.api_autocomplete, name="api_autocomplete"),
+    path("api/check/", views.api_check, name="api_check"),
+    path("api/toggle/", views.api_toggle, name="api_toggle"),
+    path("api/toggle/batch/", views.api_toggle_batch, name="api_toggle_batch"),
+    path("api/sync/", views.api_sync, name="api_sync"),
+    path("api/analytics/", views.api_analytics, name="api_analytics"),
+
+    path("metrics/", views.metrics_view, name="metrics"),
+
     path("accounts/", include("django.contrib.auth.urls")),
 ]
 
@@ -1,18 +1,202 @@
-from django.contrib import admin
-from .models import Student, MovementLog
+from datetime import datetime, timedelta
+
+from django.contrib import admin, messages
+from django.contrib.auth.models import Permission, User
+from django.db import models
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
+
+from . import hostels
+from .models import DeviceKey, Gate, Hostel, Student, MovementLog
+from .pagination import EstimatedCountPaginator
+from .search import search_students
+
+
+# Students a log search is narrowed to; their logs are then found through
+# the (student, -timestamp) index.
+LOG_SEARCH_STUDENTS = 200
+
+
+class DateRangeQuerySet(models.QuerySet):
+    """
+    Queryset for the admin date hierarchy on a large table.
+
+    ``aggregate()`` answers plain MIN/MAX of a field with ORDER BY ... LIMIT 1,
+    which walks the field's index (SQLite scans the table for MIN and MAX
+    in one query). ``datetimes()`` lists every day, month or year between
+    those bounds instead of running SELECT DISTINCT over every row, so the
+    hierarchy may offer a period without logs.
+    """
+
+    def aggregate(self, *args, **kwargs):
+        bounds = {}
+        for alias, expr in kwargs.items():
+            source = expr.get_source_expressions()[0] if isinstance(expr, (Min, Max)) else None
+            if args or expr.filter is not None or not isinstance(source, F):
+                return super().aggregate(*args, **kwargs)
+            name = source.name
+            ordered = self.filter(**{f"{name}__isnull": False}).order_by(name if isinstance(expr, Min) else f"-{name}")
+            bounds[alias] = ordered.values_list(name, flat=True).first()
+        return bounds
+
+    def datetimes(self, field_name, kind, order="ASC", tzinfo=None):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds["first"] is None:
+            return []
+        tz = tzinfo or timezone.get_current_timezone()
+        first, last = (timezone.localtime(bounds[k], tz) for k in ("first", "last"))
+        values = []
+        if kind == "day":
+            day, end = first.date(), last.date()
+            while day <= end:
+                values.append(datetime(day.year, day.month, day.day, tzinfo=tz))
+                day += timedelta(days=1)
+        elif kind == "month":
+            year, month = first.year, first.month
+            while (year, month) <= (last.year, last.month):
+                values.append(datetime(year, month, 1, tzinfo=tz))
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        else:
+            values = [datetime(year, 1, 1, tzinfo=tz) for year in range(first.year, last.year + 1)]
+        return values if order == "ASC" else values[::-1]
+
+
+class HostelScopedAdmin(admin.ModelAdmin):
+    """Shows staff assigned to hostels only those hostels' rows (see gate.hostels)."""
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        allowed = hostels.allowed_ids(request.user)
+        return qs if allowed is None else qs.filter(hostel_id__in=sorted(allowed))
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        allowed = hostels.allowed_ids(request.user)
+        if db_field.name == "hostel" and allowed is not None:
+            kwargs["queryset"] = Hostel.objects.filter(pk__in=sorted(allowed))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+@admin.register(Hostel)
+class HostelAdmin(admin.ModelAdmin):
+    list_display = ("name", "code")
+    search_fields = ("name", "code")
+    prepopulated_fields = {"code": ("name",)}
+    filter_horizontal = ("staff",)
+
+
+@admin.register(Gate)
+class GateAdmin(HostelScopedAdmin):
+    list_display = ("name", "hostel")
+    list_select_related = ("hostel",)
+    list_filter = ("hostel",)
+    search_fields = ("name", "hostel__name")
+
 
 @admin.register(Student)
-class StudentAdmin(admin.ModelAdmin):
-    list_display = ("enrollment_number", "full_name", "room_number", "is_inside")
-    search_fields = ("enrollment_number", "full_name", "room_number", "phone")
-    list_filter = ("is_inside",)
+class StudentAdmin(HostelScopedAdmin):
+    list_display = ("enrollment_number", "full_name", "hostel", "room_number", "is_inside")
+    list_select_related = ("hostel",)
+    # Matched in get_search_results through gate.search, not with LIKE '%term%'.
+    search_fields = ("enrollment_number",)
+    search_help_text = "Enrollment number or name, or an exact room / phone number."
+    list_filter = ("hostel", "is_inside")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        matches = [
+            s.pk for s in search_students(
+                term, limit=self.list_per_page * 5, hostel_ids=hostels.allowed_ids(request.user)
+            )
+        ]
+        return queryset.filter(Q(pk__in=matches) | Q(room_number__iexact=term) | Q(phone=term)), False
+
 
 @admin.register(MovementLog)
-class MovementLogAdmin(admin.ModelAdmin):
-    list_display = ("student", "direction", "timestamp", "recorded_by")
-    search_fields = ("student__enrollment_number", "student__full_name")
-    list_filter = ("direction", "timestamp")
-    
+class MovementLogAdmin(HostelScopedAdmin):
+    list_display = ("student", "hostel", "gate", "direction", "timestamp", "recorded_by")
+    list_select_related = ("student", "hostel", "gate", "recorded_by")
+    # Matched in get_search_results through gate.search, not with LIKE '%term%'.
+    search_fields = ("student__enrollment_number",)
+    search_help_text = "Enrollment number or name prefix."
+    list_filter = ("hostel", "direction", "timestamp")
+    date_hierarchy = "timestamp"
+    autocomplete_fields = ("student",)
+    raw_id_fields = ("recorded_by",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return DateRangeQuerySet(model=qs.model, query=qs.query.chain(), using=qs.db)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        students = [
+            s.pk for s in search_students(
+                term, limit=LOG_SEARCH_STUDENTS, fuzzy=False, hostel_ids=hostels.allowed_ids(request.user)
+            )
+        ]
+        return queryset.filter(student_id__in=students), False
+
+
+@admin.register(DeviceKey)
+class DeviceKeyAdmin(admin.ModelAdmin):
+    list_display = ("name", "prefix", "user", "gate", "is_active", "created_at")
+    list_select_related = ("user", "gate__hostel")
+    list_filter = ("is_active", "gate__hostel")
+    search_fields = ("name", "prefix", "user__username")
+    readonly_fields = ("prefix", "created_at")
+    actions = ("revoke", "rotate")
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        allowed = hostels.allowed_ids(request.user)
+        return qs if allowed is None else qs.filter(gate__hostel_id__in=sorted(allowed))
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        allowed = hostels.allowed_ids(request.user)
+        if db_field.name == "user":
+            # A key acts as its user, so only scanner accounts: never a
+            # superuser, and only users allowed to toggle.
+            toggle = Permission.objects.get(content_type__app_label="gate", codename="can_toggle_status")
+            kwargs["queryset"] = (
+                User.objects.filter(is_active=True, is_superuser=False)
+                .filter(Q(user_permissions=toggle) | Q(groups__permissions=toggle))
+                .distinct()
+                .order_by("username")
+            )
+        elif db_field.name == "gate" and allowed is not None:
+            # Without a gate the key would get its user's hostels, not the staff member's.
+            kwargs["queryset"] = Gate.objects.filter(hostel_id__in=sorted(allowed)).select_related("hostel")
+            kwargs["required"] = True
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        raw_key = None if change else obj.set_new_key()
+        super().save_model(request, obj, form, change)
+        if raw_key:
+            messages.warning(request, f"Key for {obj.name}: {raw_key} (shown only once; copy it to the device now).")
+
+    @admin.action(description="Revoke selected keys")
+    def revoke(self, request, queryset):
+        for key in queryset:
+            key.is_active = False
+            key.save(update_fields=["is_active"])
+        messages.success(request, f"Revoked {queryset.count()} key(s).")
+
+    @admin.action(description="Issue new secrets for selected keys")
+    def rotate(self, request, queryset):
+        for key in queryset:
+            raw_key = key.set_new_key()
+            key.save(update_fields=["prefix", "key_hash"])
+            messages.warning(request, f"New key for {key.name}: {raw_key} (shown only once).")
+
 admin.site.site_header = "GateCheck Admin"
 admin.site.site_title = "GateCheck Admin Portal"
 admin.site.index_title = "Welcome to the Hostel Management Panel"
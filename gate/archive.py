@@ -0,0 +1,54 @@
+# gate/archive.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import rollups
+from .models import MovementLog, MovementLogArchive
+
+
+FIELDS = (
+    "id", "student_id", "hostel_id", "gate_id", "direction", "timestamp", "recorded_by_id", "note",
+    "photo", "photo_thumb", "photo_sha256", "client_key",
+)
+
+
+def archive_before(cutoff, *, batch_size=5000, max_batches=None):
+    """
+    Move logs older than ``cutoff`` into MovementLogArchive, oldest first.
+
+    Each batch is copied and deleted in its own transaction, so locks stay
+    short and an interrupted run can simply be restarted. Logs not yet
+    counted into the analytics rollups are left in place. Returns the
+    number of rows moved.
+    """
+    rollups.catch_up()
+    counted_through = rollups.rolled_up_through()
+    moved = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            rows = list(
+                MovementLog.objects.filter(timestamp__lt=cutoff, id__lte=counted_through)
+                .order_by("timestamp", "id")
+                .values(*FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            MovementLogArchive.objects.bulk_create(
+                [
+                    MovementLogArchive(**{**row, "photo": row["photo"] or "", "photo_thumb": row["photo_thumb"] or ""})
+                    for row in rows
+                ],
+                ignore_conflicts=True,
+            )
+            MovementLog.objects.filter(pk__in=[row["id"] for row in rows]).delete()
+        moved += len(rows)
+        batches += 1
+    return moved
+
+
+def retention_cutoff(days):
+    return timezone.now() - timedelta(days=days)
@@ -0,0 +1,360 @@
+# gate/bench.py
+
+import io
+import os
+import random
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+from django.utils import timezone
+
+from . import occupancy, search, sync
+from .models import Hostel, MovementLog, Student, StudentTombstone
+
+
+BENCH_USER = "benchgate"
+
+FIRST_NAMES = (
+    "Aarav", "Aditi", "Arjun", "Diya", "Ishaan", "Kavya", "Mihir", "Neha",
+    "Pranav", "Riya", "Rohan", "Sanya", "Tanvi", "Varun", "Yash", "Zoya",
+)
+LAST_NAMES = (
+    "Agarwal", "Bose", "Chopra", "Das", "Gupta", "Iyer", "Joshi", "Kapoor",
+    "Mehta", "Nair", "Patel", "Rao", "Shah", "Singh", "Verma", "Yadav",
+)
+
+
+class UnsafeDatabase(Exception):
+    """The database the benchmark would write to is not a throwaway one."""
+
+
+def _same_database(name, settings_dict):
+    configured = str(settings_dict["NAME"])
+    if "sqlite" in settings_dict["ENGINE"]:
+        return os.path.realpath(name) == os.path.realpath(configured)
+    return name == configured
+
+
+@contextmanager
+def bench_database(name, *, prefix="BENCH", keep=False, verbosity=0):
+    """
+    Point ``default`` (and any replica mirroring it) at the throwaway
+    database ``name`` for the duration, created and migrated the way the
+    test runner does; it is dropped afterwards unless ``keep`` is set, so
+    repeated runs can reuse the seeded rows. Refuses to run with ``DEBUG``
+    off, against any configured database, or against a database holding
+    anything but synthetic rows (which is then left untouched).
+    """
+    if not settings.DEBUG:
+        raise UnsafeDatabase("The benchmark only runs with DEBUG=True.")
+    name = str(name or "")
+    if not name or any(_same_database(name, db) for db in settings.DATABASES.values()):
+        raise UnsafeDatabase("--database must name a throwaway database, not a configured one.")
+    current = connections["default"].settings_dict
+    if "sqlite" in current["ENGINE"] and os.path.exists(name) and not keep:
+        raise UnsafeDatabase(f"{name} exists; remove it or pass --keep to reuse it.")
+    current["TEST"] = {**current.get("TEST", {}), "NAME": name}
+    # keepdb: never drop a database that is already there.
+    old_config = setup_databases(verbosity, interactive=False, keepdb=True, aliases={"default"})
+    drop = False
+    try:
+        check_empty(prefix)
+        drop = not keep
+        yield
+    finally:
+        teardown_databases(old_config, verbosity, keepdb=not drop)
+
+
+def check_empty(prefix):
+    """Raise UnsafeDatabase if the database holds rows the benchmark did not create."""
+    students = Student.objects.exclude(enrollment_key__startswith=prefix.lower())
+    logs = MovementLog.objects.exclude(student__enrollment_key__startswith=prefix.lower())
+    users = User.objects.exclude(username=BENCH_USER)
+    if students.exists() or logs.exists() or users.exists():
+        raise UnsafeDatabase(
+            f"{connection.settings_dict['NAME']} holds real students, logs or users; "
+            "point --database at an empty throwaway database."
+        )
+
+
+def bench_students(prefix):
+    return Student.objects.filter(enrollment_key__startswith=prefix.lower())
+
+
+def bench_hostels(prefix, count):
+    """``count`` synthetic hostels (codes ``<prefix>-1`` ...), created as needed."""
+    return [
+        Hostel.objects.get_or_create(
+            code=f"{prefix.lower()}-{i}", defaults={"name": f"{prefix.title()} hostel {i}"}
+        )[0]
+        for i in range(1, count + 1)
+    ]
+
+
+def seed(*, students, logs, hostels=1, prefix="BENCH", days=180, batch_size=5000, rng=None, progress=None):
+    """
+    Top the synthetic dataset up to ``students`` students (enrollment
+    numbers ``<prefix>0000001`` ..., spread round-robin over ``hostels``
+    synthetic hostels) and ``logs`` movement logs spread over the last
+    ``days`` days. Rows already there are kept, so repeated runs
+    only pay for the difference. Everything is written with ``bulk_create``
+    and without signals; the counters and caches are fixed up at the end.
+    """
+    rng = rng or random.Random(0)
+    progress = progress or (lambda message: None)
+
+    hostel_ids = [h.pk for h in bench_hostels(prefix, hostels)]
+    have = bench_students(prefix).count()
+    for start in range(have, students, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, students)):
+            enrollment = f"{prefix}{i + 1:07d}"
+            rows.append(Student(
+                hostel_id=hostel_ids[i % len(hostel_ids)],
+                enrollment_number=enrollment,
+                enrollment_key=enrollment.lower(),
+                full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                room_number=f"{rng.choice('ABCD')}-{rng.randint(1, 4)}{rng.randint(1, 40):02d}",
+                is_inside=rng.random() < 0.8,
+            ))
+        with transaction.atomic():
+            Student.objects.bulk_create(rows)
+        progress(f"students: {start + len(rows)}/{students}")
+
+    pks = list(bench_students(prefix).values_list("pk", "hostel_id"))
+    have = MovementLog.objects.filter(student__in=bench_students(prefix)).count() if pks else 0
+    now = timezone.now()
+    span = days * 86400
+    for start in range(have, logs if pks else 0, batch_size):
+        count = min(batch_size, logs - start)
+        rows = [
+            MovementLog(
+                student_id=student_id,
+                hostel_id=hostel_id,
+                direction=MovementLog.IN if rng.random() < 0.5 else MovementLog.OUT,
+                timestamp=now - timedelta(seconds=rng.random() * span),
+            )
+            for student_id, hostel_id in (rng.choice(pks) for _ in range(count))
+        ]
+        with transaction.atomic():
+            MovementLog.objects.bulk_create(rows)
+        progress(f"logs: {start + count}/{logs}")
+
+    occupancy.reconcile(fix=True)
+    search.invalidate()
+    sync.roster_changed()
+
+
+def flush(prefix="BENCH"):
+    """Delete the synthetic students, their logs and hostels, and the bench user."""
+    students = bench_students(prefix)
+    MovementLog.objects.filter(student__in=students).delete()
+    students.delete()
+    StudentTombstone.objects.filter(enrollment_key__startswith=prefix.lower()).delete()
+    Hostel.objects.filter(code__startswith=f"{prefix.lower()}-").delete()
+    User.objects.filter(username=BENCH_USER).delete()
+    occupancy.reconcile(fix=True)
+
+
+def bench_user():
+    """A campus-wide warden (staff, no hostel) with the gate app's permissions; not a superuser."""
+    user, created = User.objects.get_or_create(username=BENCH_USER, defaults={"is_staff": True})
+    if created:
+        user.set_unusable_password()
+        user.save(update_fields=["password"])
+        user.user_permissions.set(Permission.objects.filter(content_type__app_label="gate"))
+    return user
+
+
+# -------------------- Scenarios --------------------
+# Each takes (client, rng, context) and returns a response. context holds
+# "enrollments" (a sample of bench enrollment numbers) and "prefix".
+
+def _enrollment(rng, context):
+    return rng.choice(context["enrollments"])
+
+
+def _check(client, rng, context):
+    return client.get(reverse("check"), {"enr": _enrollment(rng, context)})
+
+
+def _check_search(client, rng, context):
+    return client.post(reverse("check"), {"enrollment_number": rng.choice(LAST_NAMES)[:4]})
+
+
+def _toggle_status(client, rng, context):
+    return client.post(reverse("toggle"), {"enrollment_number": _enrollment(rng, context)})
+
+
+def _api_toggle(client, rng, context):
+    return client.post(reverse("api_toggle"), {"enrollment_number": _enrollment(rng, context)})
+
+
+def _api_check(client, rng, context):
+    return client.get(reverse("api_check"), {"enrollment_number": _enrollment(rng, context)})
+
+
+def _api_search(client, rng, context):
+    return client.get(reverse("api_search"), {"q": _enrollment(rng, context)[:-3]})
+
+
+def _logs(client, rng, context):
+    return client.get(reverse("logs"))
+
+
+def _inside(client, rng, context):
+    return client.get(reverse("inside"))
+
+
+def _outside(client, rng, context):
+    return client.get(reverse("outside"))
+
+
+def _import(client, rng, context):
+    buffer = io.StringIO()
+    buffer.write("enrollment_number,full_name,room_number\n")
+    for enrollment in rng.sample(context["enrollments"], min(200, len(context["enrollments"]))):
+        buffer.write(f"{enrollment},{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)},"
+                     f"{rng.choice('ABCD')}-{rng.randint(100, 440)}\n")
+    upload = io.BytesIO(buffer.getvalue().encode())
+    upload.name = "bench.csv"
+    return client.post(reverse("import_students_csv"), {"file": upload})
+
+
+SCENARIOS = {
+    "check": _check,
+    "check_search": _check_search,
+    "toggle_status": _toggle_status,
+    "api_toggle": _api_toggle,
+    "api_check": _api_check,
+    "api_search": _api_search,
+    "logs": _logs,
+    "inside": _inside,
+    "outside": _outside,
+    "import": _import,
+}
+
+
+# -------------------- Runner --------------------
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != "*" and not host.startswith("."):
+            return host
+    return "localhost"
+
+
+def run_scenario(name, *, requests, concurrency, context, seed=0):
+    """
+    Send ``requests`` requests for scenario ``name`` from ``concurrency``
+    threads, each with its own logged-in test client and DB connection.
+    Returns the summary dict written to the JSON report.
+    """
+    scenario = SCENARIOS[name]
+    user = bench_user()
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    samples = []   # [(seconds, queries, status)]
+    errors = []
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = Client(HTTP_HOST=_host())
+        client.force_login(user)
+        counter = _QueryCounter()
+        try:
+            with connection.execute_wrapper(counter):
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    counter.count = 0
+                    started = time.perf_counter()
+                    try:
+                        status = scenario(client, rng, context).status_code
+                    except Exception as exc:
+                        with lock:
+                            errors.append(f"{type(exc).__name__}: {exc}")
+                        continue
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        samples.append((elapsed, counter.count, status))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    failed = sum(1 for s in samples if s[2] >= 400) + len(errors)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": failed,
+        "error_samples": errors[:5],
+        "seconds": round(wall, 3),
+        "throughput": round(len(samples) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": round(latencies[-1], 2) if latencies else None,
+        },
+        "queries_per_request": round(statistics.fmean(s[1] for s in samples), 2) if samples else None,
+    }
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return round(ordered[min(rank, len(ordered)) - 1], 2)
+
+
+def compare(previous, current, threshold=0.2):
+    """
+    Regressions of ``current`` against ``previous`` (two JSON reports):
+    ``(scenario, metric, old, new)`` wherever p95 latency or queries per
+    request grew, or throughput fell, by more than ``threshold``.
+    """
+    regressions = []
+    for name, new in current["scenarios"].items():
+        old = previous.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        checks = (
+            ("p95_ms", old["latency_ms"]["p95"], new["latency_ms"]["p95"], 1),
+            ("queries_per_request", old["queries_per_request"], new["queries_per_request"], 1),
+            ("throughput", old["throughput"], new["throughput"], -1),
+        )
+        for metric, before, after, sign in checks:
+            if not before or after is None:
+                continue
+            if sign * (after - before) / before > threshold:
+                regressions.append((name, metric, before, after))
+    return regressions
@@ -0,0 +1,138 @@
+# gate/cards.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Student, normalize_enrollment
+from .replicas import primary
+
+
+# Fields of a student card; the dict keys match the model attributes, so
+# templates written against Student render a card unchanged.
+FIELDS = ("pk", "hostel_id", "enrollment_number", "full_name", "room_number", "phone", "is_inside")
+
+CACHE_PREFIX = "gate:card:v2:"
+
+# Stored for enrollments that do not exist, so repeated bad scans are cached too.
+MISSING = "missing"
+
+
+class CardCache:
+    """
+    Two tiers in front of the Student table: a per-process LRU with a short
+    TTL (``GATE_CARD_LOCAL_SECONDS``), then the default cache
+    (``GATE_CARD_CACHE_SECONDS``). Writes drop the local tier and the
+    default cache for the changed enrollments once their transaction
+    commits; other processes' LRUs catch up within the local TTL.
+
+    The second tier is only used when the default cache is shared by every
+    process (``GATE_SHARED_CACHE``). A per-process cache can't be dropped
+    from another worker, so it would keep serving a stale card for the
+    whole longer TTL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, enrollment):
+        """The card for ``enrollment`` as a dict, or None if there is no such student."""
+        key = normalize_enrollment(enrollment)
+        if not key:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.local_hits += 1
+                return None if entry[0] == MISSING else entry[0]
+
+        shared = getattr(settings, "GATE_SHARED_CACHE", False)
+        card = cache.get(CACHE_PREFIX + key) if shared else None
+        if card is not None:
+            with self._lock:
+                self.shared_hits += 1
+        else:
+            with self._lock:
+                self.misses += 1
+            # From the primary: a lagging replica's copy would be cached
+            # long after the write that invalidated it.
+            with primary():
+                card = Student.objects.by_enrollment(key).values(*FIELDS).first() or MISSING
+            if shared:
+                cache.set(CACHE_PREFIX + key, card, getattr(settings, "GATE_CARD_CACHE_SECONDS", 300))
+        self._remember(key, card)
+        return None if card == MISSING else card
+
+    def invalidate(self, keys):
+        """Drop cached cards for these enrollment keys after the current transaction commits."""
+        keys = {k for k in keys if k}
+        if keys:
+            transaction.on_commit(lambda: self._drop(keys))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+        }
+
+    def _remember(self, key, card):
+        size = getattr(settings, "GATE_CARD_LOCAL_SIZE", 2048)
+        expires = time.monotonic() + getattr(settings, "GATE_CARD_LOCAL_SECONDS", 5)
+        with self._lock:
+            self._entries[key] = (card, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def _drop(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if getattr(settings, "GATE_SHARED_CACHE", False):
+            cache.delete_many([CACHE_PREFIX + key for key in keys])
+
+
+card_cache = CardCache()
+
+
+def get_card(enrollment, hostel_ids=None):
+    """The card for ``enrollment``, or None if unknown or outside ``hostel_ids``."""
+    card = card_cache.get(enrollment)
+    if card is not None and hostel_ids is not None and card["hostel_id"] not in hostel_ids:
+        return None
+    return card
+
+
+def invalidate(keys):
+    card_cache.invalidate(keys)
+
+
+def metric_lines():
+    """Hit/miss counters in Prometheus text format, for /metrics/."""
+    stats = card_cache.stats()
+    return [
+        "# HELP gate_card_cache_lookups_total Student card lookups by the tier that answered.",
+        "# TYPE gate_card_cache_lookups_total counter",
+        f'gate_card_cache_lookups_total{{tier="local"}} {stats["local_hits"]}',
+        f'gate_card_cache_lookups_total{{tier="shared"}} {stats["shared_hits"]}',
+        f'gate_card_cache_lookups_total{{tier="database"}} {stats["misses"]}',
+        "# HELP gate_card_cache_entries Cards held in this process's LRU.",
+        "# TYPE gate_card_cache_entries gauge",
+        f"gate_card_cache_entries {stats['size']}",
+    ]
@@ -0,0 +1,57 @@
+# gate/curfew.py
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MovementLog, Student
+
+
+def _clock(value):
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def curfew_cutoff(now=None):
+    """
+    Students out since before this moment are out after curfew.
+
+    During the curfew window (``GATE_CURFEW_START`` to ``GATE_CURFEW_END``,
+    local time) that is everyone still out; outside it, everyone who has
+    been out since before the last curfew began.
+    """
+    local = timezone.localtime(now)
+    start = _clock(getattr(settings, "GATE_CURFEW_START", "22:00"))
+    end = _clock(getattr(settings, "GATE_CURFEW_END", "06:00"))
+    clock = local.time()
+    if start > end:
+        in_window = clock >= start or clock < end
+    else:
+        in_window = start <= clock < end
+    if in_window:
+        return local
+    last_start = local.replace(hour=start.hour, minute=start.minute, second=0, microsecond=0)
+    if last_start > local:
+        last_start -= timedelta(days=1)
+    return last_start
+
+
+def absence_cutoff(hours=None, now=None):
+    if hours is None:
+        hours = getattr(settings, "GATE_LONG_ABSENCE_HOURS", 48)
+    return (now or timezone.now()) - timedelta(hours=hours)
+
+
+def out_since(cutoff, hostel_ids=None):
+    """
+    Students still outside whose latest movement is an OUT before
+    ``cutoff``, longest out first; only ``hostel_ids``' students if given.
+    (A warden can mark a student inside without a scan, so the last
+    direction alone is not enough.)
+    """
+    students = Student.objects.filter(
+        is_inside=False, last_direction=MovementLog.OUT, last_movement_at__lt=cutoff
+    )
+    if hostel_ids is not None:
+        students = students.filter(hostel_id__in=sorted(hostel_ids))
+    return students.order_by("last_movement_at", "id")
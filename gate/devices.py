@@ -0,0 +1,127 @@
+# gate/devices.py
+
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from . import hostels
+from .models import DeviceKey
+
+
+# Bumped in the shared cache whenever a key changes, so every process drops
+# the identities it verified before.
+EPOCH_CACHE_KEY = "gate:device-epoch"
+
+
+def accepts_device_keys(view):
+    """Let ``Authorization: Device <key>`` authenticate requests to this view."""
+    view.accepts_device_keys = True
+    return view
+
+
+class DeviceAuthCache:
+    """
+    Bounded LRU of verified keys: sha256(key) -> (user or None, expiry, epoch).
+
+    The cached user has its permission set preloaded, so ``has_perm`` on
+    the hot path runs no queries. Entries expire after
+    ``GATE_DEVICE_CACHE_SECONDS`` or when the revocation epoch moves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, digest, epoch):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return False, None
+            user, expires, entry_epoch = entry
+            if expires < time.monotonic() or entry_epoch != epoch:
+                del self._entries[digest]
+                return False, None
+            self._entries.move_to_end(digest)
+            return True, user
+
+    def put(self, digest, user, epoch):
+        size = getattr(settings, "GATE_DEVICE_CACHE_SIZE", 1024)
+        ttl = getattr(settings, "GATE_DEVICE_CACHE_SECONDS", 300)
+        with self._lock:
+            self._entries[digest] = (user, time.monotonic() + ttl, epoch)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+auth_cache = DeviceAuthCache()
+
+
+def authenticate(raw_key):
+    """The active user behind a device key, or None. Cached after first use."""
+    digest = hashlib.sha256(raw_key.encode()).hexdigest()
+    epoch = cache.get(EPOCH_CACHE_KEY, 0)
+    hit, user = auth_cache.get(digest, epoch)
+    if hit:
+        return user
+    user = _verify(raw_key)
+    auth_cache.put(digest, user, epoch)
+    return user
+
+
+def _verify(raw_key):
+    prefix, _, secret = raw_key.partition(".")
+    if not secret:
+        return None
+    device = DeviceKey.objects.select_related("user", "gate").filter(prefix=prefix, is_active=True).first()
+    if device is None or not device.user.is_active:
+        return None
+    expected = hashlib.sha256(secret.encode()).hexdigest()
+    if not hmac.compare_digest(expected, device.key_hash):
+        return None
+    user = device.user
+    user.get_all_permissions()  # fills the backend's per-user permission cache
+    user.device = device
+    hostels.allowed_ids(user)  # cached on the user alongside its permissions
+    return user
+
+
+def revoke_cached():
+    """Forget every verified key, here and (with a shared cache) in other processes."""
+    auth_cache.clear()
+    try:
+        cache.incr(EPOCH_CACHE_KEY)
+    except ValueError:
+        cache.set(EPOCH_CACHE_KEY, 1, None)
+
+
+class DeviceKeyMiddleware(MiddlewareMixin):
+    """
+    Authenticate ``Authorization: Device <key>`` on views marked with
+    ``accepts_device_keys``, replacing the session user. Must come after
+    AuthenticationMiddleware. A bad key gets a 401 instead of falling back
+    to the session.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(view_func, "accepts_device_keys", False):
+            return None
+        scheme, _, raw_key = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "device":
+            return None
+        user = authenticate(raw_key.strip())
+        if user is None:
+            return JsonResponse({"ok": False, "error": "invalid_device_key"}, status=401)
+        request.user = user
+        return None
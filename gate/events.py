@@ -0,0 +1,97 @@
+# gate/events.py
+
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    One connected listener: a bounded queue drained by its async view.
+
+    When a slow client lets the queue fill up, the oldest event is dropped.
+    Every ``counts`` event carries full totals, so losing an old one is safe.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    async def get(self):
+        return await self.queue.get()
+
+    def offer(self, event):
+        # Runs on the subscriber's event loop.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class LocalBroker:
+    """
+    In-process fan-out. Publishing is thread-safe, so sync views running in
+    worker threads can publish to listeners on the ASGI event loop. Swap in
+    another broker with ``GATE_EVENT_BROKER`` to fan out across processes.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or getattr(settings, "GATE_EVENT_QUEUE_SIZE", 50)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # Loop already closed; the stream's cleanup will drop it.
+                pass
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, "GATE_EVENT_BROKER", "gate.events.LocalBroker"))()
+    return _broker
+
+
+def has_listeners():
+    """
+    False when the broker knows nobody is subscribed, so publishers can skip
+    building events. Brokers that can't tell (e.g. cross-process ones
+    without a ``subscriber_count``) are assumed to have listeners.
+    """
+    return getattr(get_broker(), "subscriber_count", 1) > 0
+
+
+def publish_on_commit(event_type, data):
+    """Broadcast ``{"type": ..., "data": ...}`` once the current transaction commits."""
+    if has_listeners():
+        transaction.on_commit(lambda: get_broker().publish({"type": event_type, "data": data}))
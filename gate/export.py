@@ -0,0 +1,92 @@
+# gate/export.py
+
+import csv
+import io
+import json
+import zlib
+
+from .models import MovementLog
+
+
+COLUMNS = ["timestamp", "enrollment", "name", "room", "direction", "recorded_by", "note", "hostel", "gate"]
+
+# values_list() joins student, recorded_by, hostel and gate in the same SELECT, so rows
+# stream without a query per log.
+VALUES = (
+    "timestamp",
+    "student__enrollment_number",
+    "student__full_name",
+    "student__room_number",
+    "direction",
+    "recorded_by__username",
+    "note",
+    "hostel__code",
+    "gate__name",
+)
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Flush encoded output in pieces of roughly this many bytes.
+BUFFER_SIZE = 64 * 1024
+
+
+def export_rows(qs=None, chunk_size=2000, archive_qs=None):
+    """
+    Yield movement rows oldest first as tuples in COLUMNS order.
+
+    ``archive_qs`` (a MovementLogArchive queryset with the same filters) is
+    streamed first, since archived rows are older than the hot table.
+    ``.iterator()`` keeps memory flat; on PostgreSQL it reads through a
+    server-side cursor.
+    """
+    if qs is None:
+        qs = MovementLog.objects.all()
+    sources = [qs] if archive_qs is None else [archive_qs, qs]
+    for source in sources:
+        rows = source.order_by("timestamp", "id").values_list(*VALUES).iterator(chunk_size=chunk_size)
+        for row in rows:
+            yield (row[0].isoformat(),) + tuple("" if v is None else v for v in row[1:])
+
+
+def render_export(rows, fmt="csv", compress=False):
+    """Encode rows as CSV or NDJSON bytes, optionally gzipped, in chunks."""
+    chunks = _ndjson_chunks(rows) if fmt == "ndjson" else _csv_chunks(rows)
+    if compress:
+        chunks = _gzip(chunks)
+    return chunks
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= BUFFER_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(rows):
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False, separators=(",", ":"))
+        lines.append(line)
+        size += len(line) + 1
+        if size >= BUFFER_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines, size = [], 0
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
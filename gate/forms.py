@@ -1,6 +1,10 @@
 # gate/forms.py
+from datetime import datetime, time, timedelta
+
 from django import forms
-from .models import Student
+from django.utils import timezone
+
+from .models import Hostel, Student, MovementLog, normalize_enrollment
 
 class StudentForm(forms.ModelForm):
     class Meta:
@@ -19,7 +23,74 @@ class CSVUploadForm(forms.Form):
 class StudentForm(forms.ModelForm):
     class Meta:
         model = Student
-        fields = ["enrollment_number", "full_name", "room_number", "phone", "is_inside"]
+        fields = ["hostel", "enrollment_number", "full_name", "room_number", "phone", "is_inside"]
+
+    def __init__(self, *args, hostel_ids=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if hostel_ids is not None:
+            self.fields["hostel"].queryset = Hostel.objects.filter(pk__in=sorted(hostel_ids))
 
 class CSVUploadForm(forms.Form):
-    file = forms.FileField(help_text="CSV with: enrollment_number,full_name,room_number,phone")
\ No newline at end of file
+    file = forms.FileField(help_text="CSV with: enrollment_number,full_name,room_number,phone[,hostel]")
+    hostel = forms.ModelChoiceField(
+        Hostel.objects.all(), required=False, empty_label="From the hostel column",
+        help_text="Hostel for rows without a hostel code",
+    )
+    dry_run = forms.BooleanField(required=False, label="Dry run (preview changes, save nothing)")
+
+    def __init__(self, *args, hostel_ids=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if hostel_ids is not None:
+            self.fields["hostel"].queryset = Hostel.objects.filter(pk__in=sorted(hostel_ids))
+
+
+class HostelPickerMixin:
+    """
+    Adds a ``hostel`` picker when there is more than one hostel to choose
+    from. The view narrows its rows through gate.hostels, which reads the
+    same ``?hostel=`` parameter, so ``filter()`` ignores it.
+    """
+
+    def __init__(self, *args, hostel_choices=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if len(hostel_choices) > 1:
+            self.fields["hostel"] = forms.ChoiceField(required=False, choices=[("", "All")] + list(hostel_choices))
+
+
+class LogFilterForm(HostelPickerMixin, forms.Form):
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    student = forms.CharField(required=False, widget=forms.TextInput(attrs={"placeholder": "Enrollment"}))
+    direction = forms.ChoiceField(required=False, choices=[("", "Any")] + MovementLog.DIRECTION_CHOICES)
+    room = forms.CharField(required=False, widget=forms.TextInput(attrs={"placeholder": "Room"}))
+    recorded_by = forms.CharField(required=False, widget=forms.TextInput(attrs={"placeholder": "Recorded by"}))
+
+    def filter(self, qs):
+        """Narrow a MovementLog queryset by the cleaned filters."""
+        data = self.cleaned_data
+        if data.get("date_from"):
+            qs = qs.filter(timestamp__gte=_start_of_day(data["date_from"]))
+        if data.get("date_to"):
+            qs = qs.filter(timestamp__lt=_start_of_day(data["date_to"] + timedelta(days=1)))
+        if data.get("student"):
+            qs = qs.filter(student__enrollment_key=normalize_enrollment(data["student"]))
+        if data.get("direction"):
+            qs = qs.filter(direction=data["direction"])
+        if data.get("room"):
+            qs = qs.filter(student__room_number__iexact=data["room"].strip())
+        if data.get("recorded_by"):
+            qs = qs.filter(recorded_by__username=data["recorded_by"].strip())
+        return qs
+
+
+class StudentFilterForm(HostelPickerMixin, forms.Form):
+    room = forms.CharField(required=False, widget=forms.TextInput(attrs={"placeholder": "Room"}))
+
+    def filter(self, qs):
+        if self.cleaned_data.get("room"):
+            qs = qs.filter(room_number__iexact=self.cleaned_data["room"].strip())
+        return qs
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
@@ -0,0 +1,99 @@
+# gate/hostels.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Hostel
+from .replicas import primary
+
+
+CACHE_KEY = "gate:hostels"
+
+
+def all_hostels():
+    """``{code: (id, name)}`` for every hostel, cached; there are only a handful."""
+    hostels = cache.get(CACHE_KEY)
+    if hostels is None:
+        with primary():
+            hostels = {code: (pk, name) for pk, code, name in Hostel.objects.values_list("pk", "code", "name")}
+        cache.set(CACHE_KEY, hostels, getattr(settings, "GATE_HOSTEL_CACHE_SECONDS", 60))
+    return hostels
+
+
+def id_for(code):
+    """The id of the hostel with this code, or None."""
+    hostel = all_hostels().get(code)
+    return hostel[0] if hostel else None
+
+
+def invalidate():
+    """Drop the cached hostel list once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def allowed_ids(user):
+    """
+    Hostel ids ``user`` may work with, or None for the whole campus.
+
+    A scanner whose device key is bound to a gate gets that gate's hostel.
+    Superusers, anonymous visitors and staff assigned to no hostel are
+    campus-wide; everyone else gets the hostels they are staff of.
+    """
+    if user is None or not user.is_authenticated:
+        return None
+    device = getattr(user, "device", None)
+    if device is not None and device.gate_id:
+        return {device.gate.hostel_id}
+    if user.is_superuser:
+        return None
+    if not hasattr(user, "_gate_hostel_ids"):
+        user._gate_hostel_ids = set(user.hostels.values_list("pk", flat=True)) or None
+    return user._gate_hostel_ids
+
+
+def request_ids(request):
+    """
+    Hostel ids a request is limited to, or None for the whole campus: the
+    user's hostels, narrowed to one with ``?hostel=<code>``. A code the user
+    may not see (or an unknown one) gives an empty set, so nothing matches.
+    """
+    if not hasattr(request, "_gate_hostel_ids"):
+        ids = allowed_ids(getattr(request, "user", None))
+        code = (request.GET.get("hostel") or "").strip()
+        if code:
+            hostel = all_hostels().get(code)
+            if hostel is None or (ids is not None and hostel[0] not in ids):
+                ids = set()
+            else:
+                ids = {hostel[0]}
+        request._gate_hostel_ids = ids
+    return request._gate_hostel_ids
+
+
+def scope(qs, request, field="hostel"):
+    """Limit ``qs`` to the request's hostels through ``<field>_id``."""
+    ids = request_ids(request)
+    if ids is None:
+        return qs
+    return qs.filter(**{f"{field}_id__in": sorted(ids)})
+
+
+def choices(user):
+    """``[(code, name)]`` of the hostels ``user`` can pick from."""
+    allowed = allowed_ids(user)
+    return [
+        (code, name)
+        for code, (pk, name) in sorted(all_hostels().items(), key=lambda item: item[1][1])
+        if allowed is None or pk in allowed
+    ]
+
+
+def default_for(request):
+    """The request's only hostel, for new students and logs; None if it spans several."""
+    ids = request_ids(request)
+    if ids is not None and len(ids) == 1:
+        return next(iter(ids))
+    if ids is None and len(all_hostels()) == 1:
+        return next(iter(all_hostels().values()))[0]
+    return None
@@ -0,0 +1,105 @@
+# gate/images.py
+
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from .models import MovementLog
+
+
+logger = logging.getLogger(__name__)
+
+# (suffix, bounding box, Pillow format, save options)
+DISPLAY = ("display.jpg", (1024, 1024), "JPEG", {"quality": 82, "optimize": True, "progressive": True})
+THUMB = ("thumb.webp", (160, 160), "WEBP", {"quality": 75, "method": 4})
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def schedule(log_id):
+    """
+    Queue a log's photo for processing once the current transaction commits.
+
+    Work runs on a small thread pool (``GATE_PHOTO_WORKERS``) so the scan
+    response never waits on image encoding. With 0 workers it runs inline.
+    """
+    transaction.on_commit(lambda: _submit(log_id))
+
+
+def process_log_photo(log_id):
+    """
+    Replace a log's uploaded photo with content-addressed renditions.
+
+    The upload is decoded once, rotated per its EXIF orientation and
+    re-encoded without metadata as a display JPEG and a WebP thumbnail,
+    named by the SHA-256 of the original bytes so identical photos are
+    stored once. Returns True if the log was updated.
+    """
+    log = MovementLog.objects.filter(pk=log_id).only("id", "photo", "photo_sha256").first()
+    if log is None or not log.photo or log.photo_sha256:
+        return False
+    if log.photo.name.startswith("photos/"):
+        # Already a generated rendition; never re-encode our own output.
+        return False
+
+    from PIL import Image, ImageOps  # deferred: Pillow is only needed by photo workers
+
+    storage = log.photo.storage
+    original = log.photo.name
+    try:
+        with log.photo.open("rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        names = {
+            suffix: f"photos/{digest[:2]}/{digest}-{suffix}"
+            for suffix, *_ in (DISPLAY, THUMB)
+        }
+        missing = [r for r in (DISPLAY, THUMB) if not storage.exists(names[r[0]])]
+        if missing:
+            image = ImageOps.exif_transpose(Image.open(io.BytesIO(data))).convert("RGB")
+            for suffix, box, fmt, options in missing:
+                copy = image.copy()
+                copy.thumbnail(box, Image.LANCZOS)
+                buffer = io.BytesIO()
+                copy.save(buffer, fmt, **options)
+                names[suffix] = storage.save(names[suffix], ContentFile(buffer.getvalue()))
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning("Could not process photo %s for movement log %s", original, log_id, exc_info=True)
+        return False
+
+    display, thumb = names[DISPLAY[0]], names[THUMB[0]]
+    MovementLog.objects.filter(pk=log_id).update(photo=display, photo_thumb=thumb, photo_sha256=digest)
+
+    still_used = MovementLog.objects.filter(photo=original).exists()
+    if original != display and not still_used and not getattr(settings, "GATE_PHOTO_KEEP_ORIGINAL", False):
+        storage.delete(original)
+    return True
+
+
+def _submit(log_id):
+    workers = getattr(settings, "GATE_PHOTO_WORKERS", 2)
+    if workers <= 0:
+        _run(log_id, in_worker=False)
+        return
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gate-photos")
+    _executor.submit(_run, log_id)
+
+
+def _run(log_id, in_worker=True):
+    try:
+        process_log_photo(log_id)
+    except Exception:
+        logger.exception("Photo processing failed for movement log %s", log_id)
+    finally:
+        if in_worker:
+            close_old_connections()
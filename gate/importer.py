@@ -0,0 +1,204 @@
+# gate/importer.py
+
+import csv
+import io
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from . import cards, hostels, occupancy, search, sync
+from .models import Student, StudentTombstone, normalize_enrollment
+
+
+# Columns copied from the CSV onto Student, besides the enrollment number.
+FIELDS = ("full_name", "room_number", "phone")
+REQUIRED_COLUMNS = ("enrollment_number", "full_name")
+# Optional column holding a hostel code; rows without one use the import's hostel.
+HOSTEL_COLUMN = "hostel"
+
+# Keep at most this many diff entries around for display.
+MAX_REPORTED_CHANGES = 200
+
+
+class ImportReport:
+    """Outcome of one import run: counters, per-line errors and a diff."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []    # [(line, message)]
+        self.changes = []   # [(line, "create" | "update", enrollment, {field: (old, new)})]
+
+    @property
+    def error_count(self):
+        return len(self.errors)
+
+    def add_change(self, line, action, enrollment, diff):
+        if len(self.changes) < MAX_REPORTED_CHANGES:
+            self.changes.append((line, action, enrollment, diff))
+
+    def summary(self):
+        prefix = "Dry run" if self.dry_run else "Import complete"
+        return (
+            f"{prefix}. Created: {self.created}, Updated: {self.updated}, "
+            f"Unchanged: {self.unchanged}, Errors: {self.error_count}"
+        )
+
+
+def import_students(fileobj, *, hostel_id=None, hostel_ids=None, dry_run=False, chunk_size=500):
+    """
+    Create or update students from a CSV file object (opened in binary mode).
+
+    Each row goes to the hostel named in its ``hostel`` column, else to
+    ``hostel_id`` (or the only hostel there is); an existing student
+    without either keeps theirs. With
+    ``hostel_ids`` rows for (or students of) other hostels are rejected.
+
+    Rows are streamed and applied in chunks: each chunk looks up its existing
+    students with one query and writes with ``bulk_create`` / ``bulk_update``
+    inside a transaction. With ``dry_run`` nothing is written, but the report
+    still lists what would change.
+    """
+    report = ImportReport(dry_run=dry_run)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(text)
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        report.errors.append((1, f"Missing column(s): {', '.join(missing)}"))
+        return report
+
+    codes = hostels.all_hostels()
+    if hostel_id is None and len(codes) == 1:
+        # A single-hostel deployment needs no hostel column.
+        hostel_id = next(iter(codes.values()))[0]
+    chunk = {}
+    try:
+        for row in reader:
+            line = reader.line_num
+            parsed = _parse_row(row, codes, hostel_id, hostel_ids)
+            if isinstance(parsed, str):
+                report.errors.append((line, parsed))
+                continue
+            # A later row for the same student wins, as with one-by-one saves.
+            chunk[normalize_enrollment(parsed["enrollment_number"])] = (line, parsed)
+            if len(chunk) >= chunk_size:
+                _apply_chunk(chunk, report, hostel_ids)
+                chunk = {}
+    except (csv.Error, UnicodeDecodeError) as exc:
+        report.errors.append((reader.line_num + 1, f"Unreadable CSV: {exc}"))
+    if chunk:
+        _apply_chunk(chunk, report, hostel_ids)
+    return report
+
+
+def _parse_row(row, codes, hostel_id, hostel_ids):
+    """Return cleaned field values, or an error message for a bad row."""
+    values = {
+        name: (row.get(name) or "").strip()
+        for name in ("enrollment_number",) + FIELDS
+    }
+    if not values["enrollment_number"] or not values["full_name"]:
+        return "enrollment_number and full_name are required"
+    for name, value in values.items():
+        max_length = Student._meta.get_field(name).max_length
+        if len(value) > max_length:
+            return f"{name} is longer than {max_length} characters"
+    code = (row.get(HOSTEL_COLUMN) or "").strip()
+    if code:
+        if code not in codes:
+            return f"Unknown hostel {code!r}"
+        hostel_id = codes[code][0]
+    if hostel_id is not None:
+        if hostel_ids is not None and hostel_id not in hostel_ids:
+            return f"Hostel {code!r} is not one of yours"
+        values["hostel_id"] = hostel_id
+    return values
+
+
+def _apply_chunk(chunk, report, hostel_ids=None):
+    existing = {
+        s.enrollment_key: s for s in Student.objects.filter(enrollment_key__in=list(chunk))
+    }
+
+    now = timezone.now()
+    to_create, to_update, moved = [], [], []
+    for key, (line, values) in list(chunk.items()):
+        student = existing.get(key)
+        if student is None:
+            if "hostel_id" not in values:
+                report.errors.append((line, "hostel is required for a new student"))
+                del chunk[key]
+                continue
+            to_create.append(Student(enrollment_key=key, **values))
+            report.created += 1
+            report.add_change(line, "create", values["enrollment_number"], {
+                name: ("", value) for name, value in values.items() if value
+            })
+            continue
+
+        if hostel_ids is not None and student.hostel_id not in hostel_ids:
+            report.errors.append((line, f"{values['enrollment_number']} belongs to another hostel"))
+            del chunk[key]
+            continue
+        diff = {
+            name: (getattr(student, name), value)
+            for name, value in values.items()
+            if getattr(student, name) != value
+        }
+        if not diff:
+            report.unchanged += 1
+            continue
+        if "hostel_id" in diff:
+            moved.append((student, student.hostel_id))
+        for name, value in values.items():
+            setattr(student, name, value)
+        student.enrollment_key = key
+        student.updated_at = now
+        to_update.append(student)
+        report.updated += 1
+        report.add_change(line, "update", values["enrollment_number"], diff)
+
+    if report.dry_run:
+        return
+    try:
+        with transaction.atomic():
+            Student.objects.bulk_create(to_create)
+            StudentTombstone.objects.filter(
+                enrollment_key__in=[s.enrollment_key for s in to_create]
+            ).delete()
+            Student.objects.bulk_update(
+                to_update, ("enrollment_number", "enrollment_key", "hostel_id") + FIELDS + ("updated_at",)
+            )
+            # Moved students leave a tombstone in the hostel they left.
+            for student, previous in moved:
+                StudentTombstone.objects.update_or_create(
+                    enrollment_key=student.enrollment_key,
+                    defaults={"deleted_at": now, "hostel_id": previous},
+                )
+            deltas = {}
+            for student in to_create:
+                _count(deltas, student.hostel_id, student.is_inside, 1)
+            for student, previous in moved:
+                _count(deltas, previous, student.is_inside, -1)
+                _count(deltas, student.hostel_id, student.is_inside, 1)
+            for hostel_id, (inside, outside) in deltas.items():
+                occupancy.adjust(inside=inside, outside=outside, hostel_id=hostel_id)
+    except DatabaseError as exc:
+        lines = sorted(line for line, _ in chunk.values())
+        report.errors.append((lines[0], f"Lines {lines[0]}-{lines[-1]} were not saved: {exc}"))
+        report.created -= len(to_create)
+        report.updated -= len(to_update)
+    else:
+        search.invalidate()
+        sync.roster_changed(
+            {s.hostel_id for s in to_create + to_update} | {previous for _, previous in moved}
+        )
+        cards.invalidate(set(chunk))
+
+
+def _count(deltas, hostel_id, is_inside, n):
+    inside, outside = deltas.get(hostel_id, (0, 0))
+    deltas[hostel_id] = (inside + n, outside) if is_inside else (inside, outside + n)
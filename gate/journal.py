@@ -0,0 +1,466 @@
+# gate/journal.py
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, DataError, IntegrityError, close_old_connections, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import MovementLog, Student
+
+
+logger = logging.getLogger(__name__)
+
+# MovementLog columns kept per journal record.
+FIELDS = ("client_key", "student_id", "hostel_id", "gate_id", "direction", "timestamp", "recorded_by_id", "note")
+
+# Journaled logs without an idempotency key get one, so a replay after a
+# crash is de-duplicated by the unique client_key.
+KEY_PREFIX = "j:"
+
+PENDING_CACHE_PREFIX = "gate:journal-key:"
+
+# Records the database refused row by row (their student was deleted, a
+# column no longer fits, ...), kept for inspection instead of being retried.
+DEAD_LETTER = "dead-letter.jsonl"
+
+# Marker line appended once a journaled line's transaction commits:
+# {"committed": "<client_key>"}. Only marked lines are replayed as they are.
+COMMITTED = "committed"
+
+# A journaled line whose transaction has not committed after this long is
+# taken as rolled back and its segment is no longer kept for it; should the
+# transaction commit after all, the line is journaled again with its marker.
+INFLIGHT_SECONDS = 60
+
+
+def enabled():
+    return getattr(settings, "GATE_LOG_JOURNAL", False)
+
+
+def new_key():
+    return KEY_PREFIX + uuid.uuid4().hex
+
+
+class LogJournal:
+    """
+    Write-behind buffer for MovementLog rows.
+
+    ``append()`` writes one JSON line to this process's current segment
+    (``<owner>-<seq>.ndjson`` in ``GATE_LOG_JOURNAL_DIR``) and fsyncs it
+    before the toggle's transaction commits; the row is queued once it
+    does. A daemon thread inserts the queue with one ``bulk_create`` once
+    ``GATE_LOG_JOURNAL_BATCH_SIZE`` rows are waiting or every
+    ``GATE_LOG_JOURNAL_FLUSH_SECONDS``, then deletes the segments it
+    covered. A commit marker line follows each line whose transaction
+    commits. The process holds an flock on ``<owner>.lock`` while it runs;
+    segments whose owner lock is free belong to a process that died and
+    are replayed by ``replay()`` (at start, and by
+    ``manage.py flush_movement_journal``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = []
+        self._segments = []  # sealed segments whose rows are in _pending
+        self._inflight = {}  # client_key -> (segment, since, record) of lines not yet committed
+        self._file = None
+        self._seq = 0
+        self._owner = None
+        self._lock_file = None
+        self._thread = None
+        self._oldest = None
+        self.flushed = 0
+        self.failures = 0
+        self.dead_lettered = 0
+
+    @property
+    def directory(self):
+        return Path(getattr(settings, "GATE_LOG_JOURNAL_DIR", Path(settings.BASE_DIR) / "journal"))
+
+    def start(self):
+        """Claim a journal owner id, replay dead owners' segments and start the flusher."""
+        import fcntl  # deferred: POSIX only, and the journal is opt-in
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            self._lock_file = open(self.directory / f"{self._owner}.lock", "w")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._open_segment()
+            self._thread = threading.Thread(target=self._run, name="gate-journal", daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flush what is queued and, if that worked, remove this process's files; called at exit."""
+        if self._thread is None:
+            return
+        self.flush()
+        with self._lock:
+            if self._pending:
+                return  # left for the next process to replay
+            path = Path(self._file.name)
+            self._file.close()
+            path.unlink(missing_ok=True)
+            (self.directory / f"{self._owner}.lock").unlink(missing_ok=True)
+            self._lock_file.close()
+            self._thread = None
+
+    def append(self, log):
+        """
+        Journal an unsaved MovementLog from inside the transaction that
+        changed its student. The line is on disk before that transaction
+        commits, so a crash right after the commit cannot lose the movement;
+        once it commits a marker line is appended and the row is queued for
+        the next flush. A line whose transaction rolls back gets no marker
+        and is never queued; ``replay()`` resolves it against the database.
+        """
+        if self._thread is None:
+            self.start()
+        record = {name: getattr(log, name) for name in FIELDS}
+        record["timestamp"] = log.timestamp.isoformat()
+        with self._lock:
+            self._file.write(_line(record))
+            self._file.flush()
+            if getattr(settings, "GATE_LOG_JOURNAL_FSYNC", True):
+                os.fsync(self._file.fileno())
+            self._inflight[log.client_key] = (Path(self._file.name), time.monotonic(), record)
+        transaction.on_commit(lambda: self._queue(record))
+
+    def _queue(self, record):
+        with self._lock:
+            lines = _line({COMMITTED: record["client_key"]})
+            if self._inflight.pop(record["client_key"], None) is None:
+                # Given up on as rolled back; its segment may be gone.
+                lines = _line(record) + lines
+            try:
+                # Not fsynced: after a machine crash replay() resolves
+                # unmarked lines against the student rows instead.
+                self._file.write(lines)
+                self._file.flush()
+            except OSError:
+                logger.exception("Could not journal the commit of %s", record["client_key"])
+            self._pending.append(record)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            depth = len(self._pending)
+        try:
+            cache.set(PENDING_CACHE_PREFIX + record["client_key"], record, self._pending_ttl())
+        except Exception:
+            # Only retries that reach another worker before the flush miss it.
+            logger.warning("Could not cache journaled key %s", record["client_key"], exc_info=True)
+        if depth >= getattr(settings, "GATE_LOG_JOURNAL_BATCH_SIZE", 500):
+            self._wake.set()
+
+    def flush(self):
+        """
+        Insert every queued row now. Returns the number of rows written;
+        rows the database refuses are moved to the dead-letter file.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, []
+                self._oldest = None
+                self._segments.append(self._seal_segment())
+                # Keep segments holding lines whose transaction is still open.
+                expired = time.monotonic() - INFLIGHT_SECONDS
+                for key in [key for key, (_path, since, _record) in self._inflight.items() if since <= expired]:
+                    logger.warning("Journaled key %s never committed; taken as rolled back", key)
+                    del self._inflight[key]
+                busy = {path for path, _since, _record in self._inflight.values()}
+                segments = [path for path in self._segments if path not in busy]
+                self._segments = [path for path in self._segments if path in busy]
+            try:
+                rejected = _insert(batch, self.directory)
+            except DatabaseError:
+                logger.exception("Could not flush %d journaled movement logs; will retry", len(batch))
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._oldest = self._oldest or time.monotonic()
+                    self._segments[:0] = segments
+                    self.failures += 1
+                return 0
+            for path in segments:
+                path.unlink(missing_ok=True)
+            cache.delete_many([PENDING_CACHE_PREFIX + record["client_key"] for record in batch])
+            with self._lock:
+                self.flushed += len(batch) - rejected
+            return len(batch) - rejected
+
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def oldest_age(self):
+        with self._lock:
+            return time.monotonic() - self._oldest if self._oldest is not None else 0.0
+
+    def _run(self):
+        try:
+            replay(self.directory)
+        except Exception:
+            logger.exception("Movement journal replay failed")
+        interval = getattr(settings, "GATE_LOG_JOURNAL_FLUSH_SECONDS", 2.0)
+        while True:
+            self._wake.wait(interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Movement journal flush failed")
+            finally:
+                close_old_connections()
+
+    def _open_segment(self):
+        self._seq += 1
+        self._file = open(self.directory / f"{self._owner}-{self._seq:06d}.ndjson", "a", encoding="utf-8")
+
+    def _seal_segment(self):
+        path = Path(self._file.name)
+        self._file.close()
+        self._open_segment()
+        return path
+
+    def _pending_ttl(self):
+        # Long enough to outlive a few failed flushes.
+        return max(60, int(10 * getattr(settings, "GATE_LOG_JOURNAL_FLUSH_SECONDS", 2.0)))
+
+
+def _line(record):
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def _log(record):
+    return MovementLog(**{**record, "timestamp": parse_datetime(record["timestamp"])})
+
+
+def _insert(records, directory):
+    """
+    Insert journal records, skipping keys already in the table. If the
+    database refuses the batch, the rows are retried one by one and those
+    it still refuses go to the dead-letter file, so one bad row cannot
+    hold up the rest. Other errors (the database is unreachable) propagate
+    for the caller to retry. Returns the number of rows dead-lettered.
+    """
+    try:
+        with transaction.atomic():
+            MovementLog.objects.bulk_create(
+                [_log(record) for record in records],
+                batch_size=getattr(settings, "GATE_LOG_JOURNAL_BATCH_SIZE", 500),
+                ignore_conflicts=True,
+            )
+        return 0
+    except (IntegrityError, DataError):
+        logger.warning("Batch of %d journaled movement logs refused; inserting them one by one", len(records))
+    rejected = []
+    for record in records:
+        try:
+            with transaction.atomic():
+                MovementLog.objects.bulk_create([_log(record)], ignore_conflicts=True)
+        except (IntegrityError, DataError) as exc:
+            rejected.append({**record, "error": str(exc)})
+    if rejected:
+        dead_letter(directory, rejected)
+    return len(rejected)
+
+
+def dead_letter(directory, records):
+    """Append refused records to the journal's dead-letter file."""
+    logger.error("Moving %d journaled movement logs to %s", len(records), DEAD_LETTER)
+    with open(Path(directory) / DEAD_LETTER, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(_line(record))
+        f.flush()
+        os.fsync(f.fileno())
+    with journal._lock:
+        journal.dead_lettered += len(records)
+
+
+def read_dead_letters(directory=None):
+    path = Path(directory or journal.directory) / DEAD_LETTER
+    return read_segment(path) if path.exists() else []
+
+
+def _resolve(records, committed, *, final):
+    """
+    Split journal records into those to insert and those to dead-letter.
+    Records with a commit marker are inserted. Without ``final`` (the
+    owner is still running) unmarked records are left alone: their
+    transaction may still be open. Otherwise an unmarked record is
+    resolved against its student: its toggle committed if the student's
+    last movement is still that record's; it rolled back if the student's
+    last movement is older (a committed toggle would have set it to the
+    record's timestamp). Records of deleted students and those whose
+    student moved again since cannot be told apart and are dead-lettered.
+    """
+    unmarked = [record for record in records if record["client_key"] not in committed]
+    kept = [record for record in records if record["client_key"] in committed]
+    if not final or not unmarked:
+        return kept, []
+    last = {
+        pk: (moved, direction)
+        for pk, moved, direction in Student.objects.filter(pk__in={record["student_id"] for record in unmarked})
+        .values_list("pk", "last_movement_at", "last_direction")
+    }
+    unresolved = []
+    for record in unmarked:
+        moved, direction = last.get(record["student_id"], (None, None))
+        timestamp = parse_datetime(record["timestamp"])
+        if moved == timestamp and direction == record["direction"]:
+            kept.append(record)
+        elif record["student_id"] in last and (moved is None or moved < timestamp):
+            logger.warning("Skipping journaled key %s; its toggle rolled back", record["client_key"])
+        else:
+            unresolved.append({**record, "error": "commit not recorded"})
+    return kept, unresolved
+
+
+def read_records(paths):
+    """``(records, committed keys)`` of journal segments, in order."""
+    records, committed = [], set()
+    for path in paths:
+        for line in read_segment(path):
+            if COMMITTED in line:
+                committed.add(line[COMMITTED])
+            else:
+                records.append(line)
+    return records, committed
+
+
+def read_segment(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn last line from a crash mid-write; its toggle never answered.
+                logger.warning("Skipping unreadable line in %s", path)
+    return records
+
+
+def segments(directory=None):
+    """``{owner: [segment paths, oldest first]}`` of the journal directory."""
+    directory = Path(directory or journal.directory)
+    found = {}
+    for path in sorted(directory.glob("*.ndjson")):
+        owner = path.stem.rsplit("-", 1)[0]
+        found.setdefault(owner, []).append(path)
+    return found
+
+
+def owner_alive(directory, owner):
+    import fcntl
+
+    try:
+        with open(directory / f"{owner}.lock") as f:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(f, fcntl.LOCK_UN)
+    except BlockingIOError:
+        return True
+    except FileNotFoundError:
+        return False
+    return False
+
+
+def replay(directory=None, *, include_live=False):
+    """
+    Insert the rows of segments left by processes that are gone, and delete
+    those segments. With ``include_live`` the committed lines of running
+    processes' segments are inserted too but left in place (their own
+    flush skips the duplicates). Lines without a commit marker are resolved
+    as in ``_resolve()``; those it cannot resolve and rows the database
+    refuses are dead-lettered, as in ``flush()``. Returns ``(rows,
+    segments)`` replayed.
+    """
+    directory = Path(directory or journal.directory)
+    if not directory.exists():
+        return 0, 0
+    rows = files = 0
+    for owner, paths in segments(directory).items():
+        if owner == journal._owner:
+            continue
+        alive = owner_alive(directory, owner)
+        if alive and not include_live:
+            continue
+        # A line's commit marker can be in a later segment than the line.
+        records, committed = read_records(paths)
+        records, unresolved = _resolve(records, committed, final=not alive)
+        if unresolved:
+            dead_letter(directory, unresolved)
+        if records:
+            rows += len(records) - _insert(records, directory)
+        files += len(paths)
+        if not alive:
+            for path in paths:
+                path.unlink(missing_ok=True)
+            (directory / f"{owner}.lock").unlink(missing_ok=True)
+    return rows, files
+
+
+def pending_log(client_key):
+    """
+    A journaled, not yet flushed MovementLog with this key, or None. Keys
+    are found through the default cache, so only a cache shared by all
+    workers (not the per-process locmem default) covers a retry that lands
+    on another worker before the flush.
+    """
+    record = cache.get(PENDING_CACHE_PREFIX + client_key) if client_key else None
+    if record is None:
+        return None
+    return MovementLog(**{**record, "timestamp": parse_datetime(record["timestamp"])})
+
+
+journal = LogJournal()
+
+
+def start():
+    journal.start()
+
+
+def write(log):
+    """
+    Journal ``log`` inside the transaction that changed its student, or
+    insert it directly if the journal file cannot be written.
+    """
+    try:
+        journal.append(log)
+    except OSError:
+        logger.exception("Could not journal movement log %s; inserting it directly", log.client_key)
+        log.save(force_insert=True)
+
+
+def metric_lines():
+    """Queue depth and flush counters in Prometheus text format, for /metrics/."""
+    return [
+        "# HELP gate_log_journal_pending Movement logs journaled by this process and not yet inserted.",
+        "# TYPE gate_log_journal_pending gauge",
+        f"gate_log_journal_pending {journal.depth()}",
+        "# HELP gate_log_journal_oldest_seconds Age of the oldest queued movement log.",
+        "# TYPE gate_log_journal_oldest_seconds gauge",
+        f"gate_log_journal_oldest_seconds {journal.oldest_age():.3f}",
+        "# HELP gate_log_journal_flushed_total Journaled movement logs inserted by this process.",
+        "# TYPE gate_log_journal_flushed_total counter",
+        f"gate_log_journal_flushed_total {journal.flushed}",
+        "# HELP gate_log_journal_flush_failures_total Flushes that failed and were retried.",
+        "# TYPE gate_log_journal_flush_failures_total counter",
+        f"gate_log_journal_flush_failures_total {journal.failures}",
+        "# HELP gate_log_journal_dead_lettered_total Journaled movement logs the database refused, set aside.",
+        "# TYPE gate_log_journal_dead_lettered_total counter",
+        f"gate_log_journal_dead_lettered_total {journal.dead_lettered}",
+    ]
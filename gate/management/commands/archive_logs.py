@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gate.archive import archive_before, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move movement logs older than the retention horizon into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, "GATE_LOG_RETENTION_DAYS", 180),
+            help="Keep this many days of logs in the hot table",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows moved per transaction")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1")
+        cutoff = retention_cutoff(options["days"])
+        moved = archive_before(
+            cutoff, batch_size=options["batch_size"], max_batches=options["max_batches"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} logs older than {cutoff:%Y-%m-%d %H:%M}."))
@@ -0,0 +1,143 @@
+import json
+import logging
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from gate import bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset in a throwaway database and measure throughput, latency "
+        "and queries per request of the main views, optionally comparing with an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", required=True,
+            help="Throwaway database to create and run in (a SQLite file or a server database name); "
+                 "never the configured one",
+        )
+        parser.add_argument(
+            "--keep", action="store_true",
+            help="Keep the throwaway database (and its seeded rows) for the next run",
+        )
+        parser.add_argument("--students", type=int, default=50000, help="Synthetic students to have in place")
+        parser.add_argument("--logs", type=int, default=10_000_000, help="Synthetic movement logs to have in place")
+        parser.add_argument("--hostels", type=int, default=1, help="Synthetic hostels the students are spread over")
+        parser.add_argument("--prefix", default="BENCH", help="Enrollment prefix of synthetic students")
+        parser.add_argument("--skip-seed", action="store_true", help="Use the data already seeded")
+        parser.add_argument("--seed-only", action="store_true", help="Seed and stop")
+        parser.add_argument("--flush", action="store_true", help="Delete the synthetic data and stop")
+        parser.add_argument(
+            "--scenario", action="append", choices=sorted(bench.SCENARIOS), dest="scenarios",
+            help="Run only this scenario (repeatable; default: all)",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+        parser.add_argument("--concurrency", type=int, default=4, help="Client threads per scenario")
+        parser.add_argument("--output", "-o", help="Write the JSON report here")
+        parser.add_argument("--compare", help="Earlier JSON report to compare against")
+        parser.add_argument(
+            "--threshold", type=float, default=20.0,
+            help="Percent change in p95, queries or throughput counted as a regression",
+        )
+        parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero on regressions")
+
+    def handle(self, *args, **options):
+        try:
+            with bench.bench_database(
+                options["database"], prefix=options["prefix"], keep=options["keep"],
+                verbosity=options["verbosity"] - 1,
+            ):
+                self.run(options)
+        except bench.UnsafeDatabase as exc:
+            raise CommandError(str(exc))
+
+    def run(self, options):
+        prefix = options["prefix"]
+        if options["flush"]:
+            bench.flush(prefix)
+            self.stdout.write(self.style.SUCCESS(f"Removed {prefix} students and their logs."))
+            return
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1")
+
+        previous = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        if not options["skip_seed"]:
+            bench.seed(
+                students=options["students"],
+                logs=options["logs"],
+                hostels=options["hostels"],
+                prefix=prefix,
+                progress=lambda message: self.stderr.write(f"Seeding {message}", ending="\r"),
+            )
+            self.stderr.write("")
+        if options["seed_only"]:
+            return
+
+        enrollments = list(
+            bench.bench_students(prefix).order_by("?").values_list("enrollment_number", flat=True)[:2000]
+        )
+        if not enrollments:
+            raise CommandError(f"No {prefix} students; run without --skip-seed first.")
+        context = {"enrollments": enrollments, "prefix": prefix}
+
+        report = {
+            "meta": {
+                "started": timezone.now().isoformat(),
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "database_name": str(connection.settings_dict["NAME"]),
+                "students": bench.bench_students(prefix).count(),
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+            },
+            "scenarios": {},
+        }
+        names = options["scenarios"] or list(bench.SCENARIOS)
+        # Failures are counted in the table; keep their tracebacks off stderr.
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+        self.stdout.write(f"{'scenario':<14} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'errors':>7}")
+        for i, name in enumerate(names):
+            result = bench.run_scenario(
+                name,
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                context=context,
+                seed=i,
+            )
+            report["scenarios"][name] = result
+            latency = result["latency_ms"]
+            line = (
+                f"{name:<14} {result['throughput']:>8} {latency['p50']!s:>8} {latency['p95']!s:>8} "
+                f"{latency['p99']!s:>8} {result['queries_per_request']!s:>8} {result['errors']:>7}"
+            )
+            self.stdout.write(self.style.WARNING(line) if result["errors"] else line)
+            for sample in result["error_samples"]:
+                self.stdout.write(f"    {sample}")
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Report written to {options['output']}.")
+
+        if previous is not None:
+            regressions = bench.compare(previous, report, options["threshold"] / 100)
+            for name, metric, before, after in regressions:
+                self.stdout.write(self.style.WARNING(f"Regression: {name} {metric} {before} -> {after}"))
+            if not regressions:
+                self.stdout.write(self.style.SUCCESS("No regressions."))
+            elif options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}.")
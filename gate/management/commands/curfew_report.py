@@ -0,0 +1,54 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from gate import curfew, hostels
+
+
+class Command(BaseCommand):
+    help = "List students still out after curfew, or out longer than the long-absence limit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--absent", action="store_true", help="Report long absences instead of curfew")
+        parser.add_argument("--hours", type=int, help="Long-absence limit (default: GATE_LONG_ABSENCE_HOURS)")
+        parser.add_argument("--hostel", help="Only this hostel (code)")
+        parser.add_argument("--csv", action="store_true", help="Write CSV to stdout")
+
+    def handle(self, *args, **options):
+        if options["hours"] is not None and options["hours"] < 1:
+            raise CommandError("--hours must be at least 1")
+        if options["absent"]:
+            cutoff = curfew.absence_cutoff(options["hours"])
+        else:
+            cutoff = curfew.curfew_cutoff()
+        hostel_ids = None
+        if options["hostel"]:
+            hostel_id = hostels.id_for(options["hostel"])
+            if hostel_id is None:
+                raise CommandError(f"Unknown hostel {options['hostel']!r}")
+            hostel_ids = {hostel_id}
+        rows = curfew.out_since(cutoff, hostel_ids).values_list(
+            "enrollment_number", "full_name", "room_number", "phone", "last_movement_at"
+        )
+
+        if options["csv"]:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(["enrollment", "name", "room", "phone", "out_since"])
+            for *fields, since in rows.iterator():
+                writer.writerow(fields + [since.isoformat()])
+            return
+
+        now = timezone.now()
+        count = 0
+        for enrollment, name, room, phone, since in rows.iterator():
+            hours = (now - since).total_seconds() / 3600
+            self.stdout.write(
+                f"{enrollment:<16} {name:<30} {room:<8} {phone:<14} "
+                f"out since {timezone.localtime(since):%Y-%m-%d %H:%M} ({hours:.1f} h)"
+            )
+            count += 1
+        label = "out after curfew" if not options["absent"] else "on a long absence"
+        style = self.style.WARNING if count else self.style.SUCCESS
+        self.stdout.write(style(f"{count} student(s) {label} (out since before {timezone.localtime(cutoff):%Y-%m-%d %H:%M})."))
@@ -0,0 +1,58 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from gate import hostels
+from gate.export import FORMATS, export_rows, render_export
+from gate.forms import LogFilterForm
+from gate.models import MovementLog, MovementLogArchive
+
+
+class Command(BaseCommand):
+    help = "Stream movement history to a file or stdout as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", "-o", default="-", help="Destination file (default: stdout)")
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+        parser.add_argument("--from", dest="date_from", help="First day to include (YYYY-MM-DD)")
+        parser.add_argument("--to", dest="date_to", help="Last day to include (YYYY-MM-DD)")
+        parser.add_argument("--student", help="Only this enrollment number")
+        parser.add_argument("--hostel", help="Only this hostel (code)")
+        parser.add_argument("--include-archive", action="store_true", help="Also export archived logs")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched per round trip")
+
+    def handle(self, *args, **options):
+        form = LogFilterForm({
+            "date_from": options["date_from"],
+            "date_to": options["date_to"],
+            "student": options["student"],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        logs, archived = MovementLog.objects.all(), MovementLogArchive.objects.all()
+        if options["hostel"]:
+            hostel_id = hostels.id_for(options["hostel"])
+            if hostel_id is None:
+                raise CommandError(f"Unknown hostel {options['hostel']!r}")
+            logs, archived = logs.filter(hostel_id=hostel_id), archived.filter(hostel_id=hostel_id)
+
+        archive_qs = None
+        if options["include_archive"]:
+            archive_qs = form.filter(archived)
+        rows = export_rows(
+            form.filter(logs),
+            chunk_size=options["chunk_size"],
+            archive_qs=archive_qs,
+        )
+        chunks = render_export(rows, options["format"], options["gzip"])
+        if options["output"] == "-":
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
+        else:
+            with open(options["output"], "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from gate import journal
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert movement logs left in the write-behind journal by processes that have stopped, "
+        "and report how many are still queued."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--status", action="store_true", help="Only report the queued logs")
+        parser.add_argument(
+            "--include-live", action="store_true",
+            help="Also insert the logs queued by running processes (they skip them when they flush)",
+        )
+
+    def handle(self, *args, **options):
+        directory = journal.journal.directory
+        if not options["status"]:
+            rows, files = journal.replay(directory, include_live=options["include_live"])
+            self.stdout.write(self.style.SUCCESS(f"Inserted {rows} log(s) from {files} segment(s)."))
+
+        total = 0
+        for owner, paths in (journal.segments(directory) if directory.exists() else {}).items():
+            count = len(journal.read_records(paths)[0])
+            state = "running" if journal.owner_alive(directory, owner) else "stopped"
+            self.stdout.write(f"{owner} ({state}): {count} queued in {len(paths)} segment(s)")
+            total += count
+        style = self.style.WARNING if total else self.style.SUCCESS
+        self.stdout.write(style(f"{total} log(s) queued in {directory}."))
+        dead = journal.read_dead_letters(directory)
+        if dead:
+            self.stdout.write(self.style.ERROR(
+                f"{len(dead)} log(s) refused by the database are in {directory / journal.DEAD_LETTER}."
+            ))
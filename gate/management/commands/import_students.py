@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gate import hostels
+from gate.importer import import_students
+
+
+class Command(BaseCommand):
+    help = "Import or update students from a CSV file (enrollment_number,full_name,room_number,phone[,hostel])."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import")
+        parser.add_argument("--hostel", help="Hostel code for rows without a hostel column")
+        parser.add_argument("--dry-run", action="store_true", help="Report changes without saving them")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows written per transaction")
+        parser.add_argument("--show-changes", action="store_true", help="Print the per-line diff")
+
+    def handle(self, *args, **options):
+        hostel_id = None
+        if options["hostel"]:
+            hostel_id = hostels.id_for(options["hostel"])
+            if hostel_id is None:
+                raise CommandError(f"Unknown hostel {options['hostel']!r}")
+        try:
+            fileobj = open(options["path"], "rb")
+        except OSError as exc:
+            raise CommandError(exc)
+        with fileobj:
+            report = import_students(
+                fileobj, hostel_id=hostel_id, dry_run=options["dry_run"], chunk_size=options["chunk_size"]
+            )
+
+        if options["show_changes"]:
+            for line, action, enrollment, diff in report.changes:
+                fields = ", ".join(f"{name}: {old!r} -> {new!r}" for name, (old, new) in diff.items())
+                self.stdout.write(f"line {line}: {action} {enrollment} ({fields})")
+        for line, message in report.errors:
+            self.stderr.write(f"line {line}: {message}")
+
+        style = self.style.WARNING if report.errors else self.style.SUCCESS
+        self.stdout.write(style(report.summary()))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from gate.images import process_log_photo
+from gate.models import MovementLog
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnails and display renditions for movement log photos not yet processed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, help="Process at most this many photos")
+
+    def handle(self, *args, **options):
+        pending = (
+            MovementLog.objects.exclude(photo="").exclude(photo__isnull=True)
+            .filter(photo_sha256="")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        if options["limit"]:
+            pending = pending[: options["limit"]]
+
+        done = failed = 0
+        for log_id in pending.iterator():
+            if process_log_photo(log_id):
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} photos, skipped {failed}."))
@@ -0,0 +1,119 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Runs in a fresh interpreter under -X importtime and prints one JSON line
+# with the phase timings of a cold start of config.wsgi.
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import django
+from django.core.handlers.wsgi import WSGIHandler
+t1 = time.perf_counter()
+django.setup(set_prefix=False)
+t2 = time.perf_counter()
+import config.wsgi
+t3 = time.perf_counter()
+path, _, query = sys.argv[1].partition("?")
+environ = {
+    "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query,
+    "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": "localhost",
+    "wsgi.url_scheme": "http", "wsgi.input": __import__("io").BytesIO(b""),
+    "wsgi.errors": sys.stderr, "wsgi.multithread": False, "wsgi.multiprocess": True,
+    "wsgi.run_once": False, "wsgi.version": (1, 0),
+}
+status = []
+body = b"".join(config.wsgi.application(environ, lambda s, h, *a: status.append(s)))
+t4 = time.perf_counter()
+print(json.dumps({
+    "framework_import": t1 - t0,
+    "apps_ready": t2 - t1,
+    "wsgi_module": t3 - t2,
+    "first_request": t4 - t3,
+    "after_framework": t4 - t1,
+    "total": t4 - t0,
+    "status": status[0] if status else None,
+}))
+"""
+
+# after_framework leaves out importing Django itself, which no setting
+# changes, and with it most of the run-to-run noise.
+PHASES = ("framework_import", "apps_ready", "wsgi_module", "first_request", "after_framework", "total")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure a cold start of config.wsgi in fresh interpreters: import time per "
+        "module, app-ready time and the first request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/check/?enrollment_number=__warmup__",
+                            help="Path of the first request")
+        parser.add_argument("--runs", type=int, default=5, help="Cold starts to take the fastest of")
+        parser.add_argument("--top", type=int, default=25, help="Modules to list")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1")
+        result = _summarise([self._cold_start(options["path"]) for _ in range(options["runs"])])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        self.stdout.write(self.style.MIGRATE_HEADING(f"startup (fastest of {options['runs']}, median total {result['median_total'] * 1000:.1f} ms)"))
+        for phase in PHASES:
+            self.stdout.write(f"  {phase:<18} {result['phases'][phase] * 1000:8.1f} ms")
+        self.stdout.write(f"  first response: {result['status']}")
+        self.stdout.write(f"  {'cumulative ms':>14} {'self ms':>9}  module")
+        for name, cumulative, own in result["modules"][: options["top"]]:
+            self.stdout.write(f"  {cumulative / 1000:14.1f} {own / 1000:9.1f}  {name}")
+        self.stdout.write(f"  {'package':<20} {'self ms':>9}")
+        for package, own in result["packages"][:10]:
+            self.stdout.write(f"  {package:<20} {own / 1000:9.1f}")
+
+    def _cold_start(self, path):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD, path],
+            cwd=settings.BASE_DIR, env=dict(os.environ, DJANGO_SETTINGS_MODULE="config.settings"),
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"Startup failed:\n{proc.stderr[-2000:]}")
+        return json.loads(proc.stdout.strip().splitlines()[-1]), _parse_importtime(proc.stderr)
+
+
+def _summarise(runs):
+    # Report the fastest run, as timeit does: slower runs measure noise
+    # from the rest of the machine, not the startup path.
+    runs = sorted(runs, key=lambda run: run[0]["total"])
+    phases, modules = runs[0]
+    packages = {}
+    for name, _, own in modules:
+        top = name.split(".")[0]
+        packages[top] = packages.get(top, 0) + own
+    return {
+        "phases": {phase: phases[phase] for phase in PHASES},
+        "median_total": statistics.median(run[0]["total"] for run in runs),
+        "status": phases["status"],
+        "modules": sorted(modules, key=lambda m: m[1], reverse=True),
+        "packages": sorted(packages.items(), key=lambda p: p[1], reverse=True),
+    }
+
+
+def _parse_importtime(stderr):
+    """[(module, cumulative_us, self_us)] from ``-X importtime`` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules.append((name, int(cumulative), int(own)))
+    return modules
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from gate import occupancy
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-hostel inside/outside counters from the Student table and report any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it")
+
+    def handle(self, *args, **options):
+        for key, stored, actual in occupancy.reconcile(fix=not options["dry_run"]):
+            if stored is None:
+                self.stdout.write(
+                    f"{key}: no counter stored yet; actual: {actual['inside']} inside, {actual['outside']} outside."
+                )
+                continue
+            drift_in = stored["inside"] - actual["inside"]
+            drift_out = stored["outside"] - actual["outside"]
+            self.stdout.write(
+                f"{key}: stored: {stored['inside']} inside, {stored['outside']} outside. "
+                f"Actual: {actual['inside']} inside, {actual['outside']} outside."
+            )
+            if drift_in or drift_out:
+                self.stdout.write(self.style.WARNING(f"{key}: drift: inside {drift_in:+d}, outside {drift_out:+d}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{key}: no drift."))
+        if not options["dry_run"]:
+            self.stdout.write("Counters updated.")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from gate import rollups
+
+
+class Command(BaseCommand):
+    help = "Count movement logs written since the last run into the analytics rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Logs counted per transaction")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+
+    def handle(self, *args, **options):
+        processed = rollups.catch_up(batch_size=options["batch_size"], max_batches=options["max_batches"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Counted {processed} logs; rollups now cover logs up to id {rollups.rolled_up_through()}."
+        ))
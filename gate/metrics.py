@@ -0,0 +1,230 @@
+# gate/metrics.py
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends import django as django_backend
+
+
+logger = logging.getLogger("gate.slow")
+
+# Upper bounds (seconds) of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statements kept per request for the slow-request log.
+MAX_CAPTURED_SQL = 50
+
+_current = contextvars.ContextVar("gate_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Counters for the request being served, reachable via a context var."""
+
+    __slots__ = ("queries", "db_seconds", "template_seconds", "sql")
+
+    def __init__(self, capture_sql=False):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.sql = [] if capture_sql else None
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "total", "queries", "db_seconds", "template_seconds", "statuses")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.statuses = {}
+
+
+class Registry:
+    """
+    Per-process aggregates keyed by URL name. Recording is a dict lookup
+    and a few additions under one lock, cheap enough for every request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def record(self, view, status, seconds, metrics):
+        status_class = f"{status // 100}xx"
+        with self._lock:
+            series = self._series.get(view)
+            if series is None:
+                series = self._series[view] = _Series()
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    series.buckets[i] += 1
+                    break
+            series.count += 1
+            series.total += seconds
+            series.queries += metrics.queries
+            series.db_seconds += metrics.db_seconds
+            series.template_seconds += metrics.template_seconds
+            series.statuses[status_class] = series.statuses.get(status_class, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """All series in the Prometheus text exposition format."""
+        with self._lock:
+            series = {
+                view: (list(s.buckets), s.count, s.total, s.queries, s.db_seconds,
+                       s.template_seconds, dict(s.statuses))
+                for view, s in self._series.items()
+            }
+        lines = [
+            "# HELP gate_request_duration_seconds Request latency by URL name.",
+            "# TYPE gate_request_duration_seconds histogram",
+        ]
+        for view, (buckets, count, total, *_) in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                lines.append(f'gate_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'gate_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {count}')
+            lines.append(f'gate_request_duration_seconds_sum{{view="{view}"}} {total:.6f}')
+            lines.append(f'gate_request_duration_seconds_count{{view="{view}"}} {count}')
+
+        counters = (
+            ("gate_request_db_queries_total", "Database queries run while serving requests.", 3, "{}"),
+            ("gate_request_db_seconds_total", "Time spent in database queries.", 4, "{:.6f}"),
+            ("gate_request_template_seconds_total", "Time spent rendering templates.", 5, "{:.6f}"),
+        )
+        for name, help_text, index, fmt in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for view, values in sorted(series.items()):
+                lines.append(f'{name}{{view="{view}"}} {fmt.format(values[index])}')
+
+        lines.append("# HELP gate_responses_total Responses by URL name and status class.")
+        lines.append("# TYPE gate_responses_total counter")
+        for view, values in sorted(series.items()):
+            for status, n in sorted(values[6].items()):
+                lines.append(f'gate_responses_total{{view="{view}",status="{status}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _record_query(execute, sql, params, many, context):
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        current.queries += 1
+        current.db_seconds += elapsed
+        if current.sql is not None and len(current.sql) < MAX_CAPTURED_SQL:
+            current.sql.append((elapsed, sql))
+
+
+class MetricsMiddleware:
+    """
+    Time each request and attribute DB and template time to its URL name.
+
+    Place it first in MIDDLEWARE so session and auth work is included.
+    With ``GATE_SLOW_REQUEST_SECONDS`` set, requests slower than that are
+    logged to the ``gate.slow`` logger with the SQL they ran. Async
+    requests (the event stream) record latency only, since their queries
+    run on other threads' connections.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "GATE_METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_seconds = getattr(settings, "GATE_SLOW_REQUEST_SECONDS", 0)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics(capture_sql=self.slow_seconds > 0)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, time.perf_counter() - started, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self._finish(request, response, time.perf_counter() - started, metrics)
+        return response
+
+    def _finish(self, request, response, seconds, metrics):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unresolved"
+        registry.record(view, response.status_code, seconds, metrics)
+        if self.slow_seconds and seconds >= self.slow_seconds:
+            _log_slow(request, view, response.status_code, seconds, metrics)
+
+
+def _log_slow(request, view, status, seconds, metrics):
+    statements = "".join(
+        f"\n  {elapsed * 1000:8.2f} ms  {sql[:500]}"
+        for elapsed, sql in sorted(metrics.sql or [], key=lambda item: item[0], reverse=True)
+    )
+    logger.warning(
+        "Slow request %s %s (%s) -> %s in %.0f ms: %d queries / %.0f ms DB, %.0f ms templates%s",
+        request.method, request.path, view, status, seconds * 1000,
+        metrics.queries, metrics.db_seconds * 1000, metrics.template_seconds * 1000, statements,
+    )
+
+
+class TimedTemplate(django_backend.Template):
+    def render(self, context=None, request=None):
+        current = _current.get()
+        if current is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            current.template_seconds += time.perf_counter() - started
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """The stock Django template backend, timing each top-level render."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
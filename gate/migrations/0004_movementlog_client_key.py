@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0003_movementlog_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movementlog',
+            name='client_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0004_movementlog_client_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movementlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
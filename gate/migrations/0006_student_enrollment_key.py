@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0005_movementlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='enrollment_key',
+            field=models.CharField(editable=False, max_length=32, null=True),
+        ),
+    ]
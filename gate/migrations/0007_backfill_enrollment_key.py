@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_enrollment_key(apps, schema_editor):
+    Student = apps.get_model('gate', 'Student')
+    seen = {}
+    clashes = []
+    batch = []
+    for student in Student.objects.only('id', 'enrollment_number').order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        student.enrollment_key = student.enrollment_number.strip().lower()
+        if student.enrollment_key in seen:
+            clashes.append(f"{seen[student.enrollment_key]} / {student.enrollment_number}")
+        seen[student.enrollment_key] = student.enrollment_number
+        batch.append(student)
+        if len(batch) >= BATCH_SIZE:
+            Student.objects.bulk_update(batch, ['enrollment_key'])
+            batch = []
+    if batch:
+        Student.objects.bulk_update(batch, ['enrollment_key'])
+    if clashes:
+        raise RuntimeError(
+            "Enrollment numbers that differ only by case must be merged before "
+            "migrating: " + ", ".join(clashes)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0006_student_enrollment_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_enrollment_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0007_backfill_enrollment_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='enrollment_key',
+            field=models.CharField(editable=False, max_length=32, unique=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+import sys
+
+from django.db import DatabaseError, migrations, transaction
+
+
+# PostgreSQL-only indexes behind gate.search. Other backends (SQLite in
+# development) use the in-process prefix index instead, so this is a no-op
+# there. enrollment_key LIKE 'abc%' is served by the varchar_pattern_ops
+# "_like" index Django creates for the unique column.
+#
+# The trigram indexes need the pg_trgm extension, and creating it needs a
+# superuser (or, on PostgreSQL 13+, a trusted-extension-capable owner). If
+# the migration's role cannot create it, they are skipped with a warning and
+# search falls back to plain LIKE scans for fuzzy matches; run
+# "CREATE EXTENSION pg_trgm" as a superuser and migrate 0009 again to add them.
+TRIGRAM_SQL = [
+    # enrollment_key LIKE '%abc%'
+    "CREATE INDEX IF NOT EXISTS gate_student_enr_key_trgm ON gate_student USING gin (enrollment_key gin_trgm_ops)",
+    # UPPER(full_name) LIKE UPPER('%abc%') and UPPER(full_name) % UPPER('abc')
+    "CREATE INDEX IF NOT EXISTS gate_student_name_trgm ON gate_student USING gin (UPPER(full_name) gin_trgm_ops)",
+]
+
+DROP_SQL = [
+    "DROP INDEX IF EXISTS gate_student_name_trgm",
+    "DROP INDEX IF EXISTS gate_student_enr_key_trgm",
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError as exc:
+        sys.stderr.write(f"\n  Skipping trigram search indexes, pg_trgm is unavailable: {exc}")
+        return
+    for sql in TRIGRAM_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0008_alter_student_enrollment_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
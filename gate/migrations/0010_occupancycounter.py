@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0009_student_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancyCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=32, unique=True)),
+                ('inside', models.IntegerField(default=0)),
+                ('outside', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0010_occupancycounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovementLogArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('direction', models.CharField(choices=[('IN', 'IN'), ('OUT', 'OUT')], max_length=3)),
+                ('timestamp', models.DateTimeField()),
+                ('note', models.TextField(blank=True)),
+                ('photo', models.CharField(blank=True, max_length=100)),
+                ('client_key', models.CharField(blank=True, max_length=64, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='movementlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='gate_log_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlog',
+            index=models.Index(fields=['student', '-timestamp'], name='gate_log_student_ts_idx'),
+        ),
+        # Drop the plain FK index only once (student, -timestamp) covers it.
+        migrations.AlterField(
+            model_name='movementlog',
+            name='student',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='gate.student'),
+        ),
+        migrations.AddField(
+            model_name='movementlogarchive',
+            name='recorded_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='movementlogarchive',
+            name='student',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='gate.student'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlogarchive',
+            index=models.Index(fields=['timestamp', 'id'], name='gate_logarch_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlogarchive',
+            index=models.Index(fields=['student', 'timestamp'], name='gate_logarch_student_ts_idx'),
+        ),
+    ]
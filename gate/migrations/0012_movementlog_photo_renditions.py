@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0011_movementlog_indexes_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movementlog',
+            name='photo_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='movementlog',
+            name='photo_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to=''),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:52
+
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_last_movement(apps, schema_editor):
+    """
+    Copy each student's latest movement onto the student in one pass per
+    log table: a ROW_NUMBER() window picks the newest row per student.
+    Students whose newest log was already archived come from the archive.
+    """
+    Student = apps.get_model('gate', 'Student')
+    filled = set()
+    for model_name in ('MovementLog', 'MovementLogArchive'):
+        Log = apps.get_model('gate', model_name)
+        latest = (
+            Log.objects.annotate(
+                row=Window(
+                    RowNumber(),
+                    partition_by=[F('student_id')],
+                    order_by=[F('timestamp').desc(), F('id').desc()],
+                )
+            )
+            .filter(row=1)
+            .values_list('student_id', 'direction', 'timestamp')
+        )
+        batch = []
+        for student_id, direction, timestamp in latest.iterator(chunk_size=BATCH_SIZE):
+            if student_id in filled:
+                continue
+            filled.add(student_id)
+            batch.append(Student(pk=student_id, last_direction=direction, last_movement_at=timestamp))
+            if len(batch) >= BATCH_SIZE:
+                Student.objects.bulk_update(batch, ['last_direction', 'last_movement_at'])
+                batch = []
+        if batch:
+            Student.objects.bulk_update(batch, ['last_direction', 'last_movement_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0014_movement_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='last_direction',
+            field=models.CharField(blank=True, editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='last_movement_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_last_movement, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['last_direction', 'last_movement_at'], name='gate_student_last_move_idx'),
+        ),
+    ]
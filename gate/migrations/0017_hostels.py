@@ -0,0 +1,104 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+DEFAULT_CODE = 'main'
+DEFAULT_NAME = 'Main hostel'
+
+
+def backfill_hostels(apps, schema_editor):
+    """
+    Put every existing student, log and rollup in one default hostel, so the
+    deployment keeps working unchanged until more hostels are added. Made
+    required in 0018.
+    """
+    Hostel = apps.get_model('gate', 'Hostel')
+    hostel, _ = Hostel.objects.get_or_create(code=DEFAULT_CODE, defaults={'name': DEFAULT_NAME})
+    for model_name in ('Student', 'MovementLog', 'MovementLogArchive', 'MovementRollup'):
+        apps.get_model('gate', model_name).objects.filter(hostel__isnull=True).update(hostel=hostel)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0016_devicekey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Gate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'ordering': ['hostel__name', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Hostel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.SlugField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='devicekey',
+            name='gate',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='device_keys', to='gate.gate'),
+        ),
+        migrations.AddField(
+            model_name='movementlog',
+            name='gate',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gate.gate'),
+        ),
+        migrations.AddField(
+            model_name='movementlogarchive',
+            name='gate',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='gate.gate'),
+        ),
+        migrations.AddField(
+            model_name='hostel',
+            name='staff',
+            field=models.ManyToManyField(blank=True, related_name='hostels', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='gate',
+            name='hostel',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gates', to='gate.hostel'),
+        ),
+        migrations.AddField(
+            model_name='movementlog',
+            name='hostel',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='gate.hostel'),
+        ),
+        migrations.AddField(
+            model_name='movementlogarchive',
+            name='hostel',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='gate.hostel'),
+        ),
+        migrations.AddField(
+            model_name='movementrollup',
+            name='hostel',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gate.hostel'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='hostel',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='students', to='gate.hostel'),
+        ),
+        migrations.AddField(
+            model_name='studenttombstone',
+            name='hostel',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gate.hostel'),
+        ),
+        migrations.RunPython(backfill_hostels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# PostgreSQL only, like 0009: enrollment prefix search within one hostel.
+# SQLite uses gate.search's in-process index instead.
+CREATE_SQL = (
+    "CREATE INDEX IF NOT EXISTS gate_student_hostel_key_like "
+    "ON gate_student (hostel_id, enrollment_key varchar_pattern_ops)"
+)
+DROP_SQL = "DROP INDEX IF EXISTS gate_student_hostel_key_like"
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SQL)
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0017_hostels'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='movementrollup',
+            name='gate_rollup_unique',
+        ),
+        migrations.AlterField(
+            model_name='movementlog',
+            name='hostel',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='gate.hostel'),
+        ),
+        migrations.AlterField(
+            model_name='movementlogarchive',
+            name='hostel',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='gate.hostel'),
+        ),
+        migrations.AlterField(
+            model_name='movementrollup',
+            name='hostel',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='gate.hostel'),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='hostel',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='students', to='gate.hostel'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlog',
+            index=models.Index(fields=['hostel', '-timestamp', '-id'], name='gate_log_hostel_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlogarchive',
+            index=models.Index(fields=['hostel', 'timestamp', 'id'], name='gate_logarch_hostel_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementrollup',
+            index=models.Index(fields=['hostel', 'period', 'bucket'], name='gate_rollup_hostel_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['hostel', 'enrollment_key'], name='gate_student_hostel_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['hostel', 'is_inside', 'enrollment_number'], name='gate_student_hostel_in_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['hostel', 'updated_at'], name='gate_student_hostel_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['hostel', 'last_direction', 'last_movement_at'], name='gate_student_hostel_move_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gate',
+            constraint=models.UniqueConstraint(fields=('hostel', 'name'), name='gate_gate_hostel_name_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='movementrollup',
+            constraint=models.UniqueConstraint(fields=('period', 'bucket', 'hostel', 'block', 'direction'), name='gate_rollup_unique'),
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0018_hostel_required'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='student',
+            name='gate_student_last_move_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='student',
+            name='gate_student_hostel_move_idx',
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['is_inside', 'last_direction', 'last_movement_at'], name='gate_student_out_move_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['hostel', 'is_inside', 'last_direction', 'last_movement_at'], name='gate_student_hostel_out_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+# 0009 used to add its own varchar_pattern_ops index on enrollment_key, a
+# duplicate of the "_like" index Django creates for the unique column.
+def drop_duplicate(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS gate_student_enr_key_like")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0019_curfew_is_inside_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+# The campus total is now the sum of the hostel counters.
+def drop_campus_counter(apps, schema_editor):
+    OccupancyCounter = apps.get_model('gate', 'OccupancyCounter')
+    OccupancyCounter.objects.filter(key='campus').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0020_drop_duplicate_enrollment_like_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_campus_counter, migrations.RunPython.noop),
+    ]
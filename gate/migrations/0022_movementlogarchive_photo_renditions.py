@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0021_drop_campus_occupancy_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movementlogarchive',
+            name='photo_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='movementlogarchive',
+            name='photo_thumb',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gate', '0022_movementlogarchive_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movementlog',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+    ]
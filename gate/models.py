@@ -1,18 +1,91 @@
 
+import hashlib
+import secrets
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def normalize_enrollment(value):
+    """Canonical form used for case-insensitive enrollment lookups."""
+    return (value or "").strip().lower()
+
+
+class Hostel(models.Model):
+    """A hostel sharing this deployment; students, logs and counters belong to one."""
+    code = models.SlugField(max_length=20, unique=True)
+    name = models.CharField(max_length=100)
+    # Staff limited to these hostels (see gate.hostels). Users assigned to
+    # no hostel work campus-wide.
+    staff = models.ManyToManyField(User, blank=True, related_name="hostels")
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class Gate(models.Model):
+    """An entrance of a hostel; scanners bound to it record movements there."""
+    hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name="gates")
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ["hostel__name", "name"]
+        constraints = [
+            models.UniqueConstraint(fields=["hostel", "name"], name="gate_gate_hostel_name_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.hostel} – {self.name}"
+
+
+class StudentQuerySet(models.QuerySet):
+    def by_enrollment(self, enrollment):
+        """Exact, case-insensitive match served by the enrollment_key index."""
+        return self.filter(enrollment_key=normalize_enrollment(enrollment))
+
 
 class Student(models.Model):
+    # Indexed through the composite indexes below, which all lead with it.
+    hostel = models.ForeignKey(Hostel, on_delete=models.PROTECT, related_name="students", db_index=False)
     enrollment_number = models.CharField(max_length=32, unique=True)
+    # Lower-cased copy of enrollment_number, kept in sync by save().
+    enrollment_key = models.CharField(max_length=32, unique=True, editable=False)
     full_name = models.CharField(max_length=120)
     room_number = models.CharField(max_length=20, blank=True)
     phone = models.CharField(max_length=20, blank=True)
     is_inside = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Copy of the latest movement, kept up to date by gate.services so the
+    # curfew report needs no per-student subquery over MovementLog.
+    last_direction = models.CharField(max_length=3, blank=True, editable=False)
+    last_movement_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = StudentQuerySet.as_manager()
 
     class Meta:
         ordering = ["enrollment_number"]
+        indexes = [
+            # delta sync: students changed since a watermark
+            models.Index(fields=["updated_at"], name="gate_student_updated_idx"),
+            # curfew report: students out since before a cutoff, oldest first
+            models.Index(
+                fields=["is_inside", "last_direction", "last_movement_at"], name="gate_student_out_move_idx"
+            ),
+            # The same access paths within one hostel, plus its inside/outside lists.
+            models.Index(fields=["hostel", "enrollment_key"], name="gate_student_hostel_key_idx"),
+            models.Index(fields=["hostel", "is_inside", "enrollment_number"], name="gate_student_hostel_in_idx"),
+            models.Index(fields=["hostel", "updated_at"], name="gate_student_hostel_upd_idx"),
+            models.Index(
+                fields=["hostel", "is_inside", "last_direction", "last_movement_at"],
+                name="gate_student_hostel_out_idx",
+            ),
+        ]
 
         permissions = [
             ("can_toggle_status", "Can toggle in/out status"),  # 👈 new
@@ -22,20 +95,198 @@ class Student(models.Model):
     def __str__(self):
         return f"{self.enrollment_number} - {self.full_name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so saves can adjust the occupancy counter,
+        # and the stored key so a renamed student's cached card is dropped.
+        instance._loaded_is_inside = instance.__dict__.get("is_inside")
+        instance._loaded_enrollment_key = instance.__dict__.get("enrollment_key")
+        instance._loaded_hostel_id = instance.__dict__.get("hostel_id")
+        return instance
+
+    def clean(self):
+        self.enrollment_key = normalize_enrollment(self.enrollment_number)
+        clash = Student.objects.filter(enrollment_key=self.enrollment_key).exclude(pk=self.pk)
+        if self.enrollment_key and clash.exists():
+            raise ValidationError(
+                {"enrollment_number": "A student with this enrollment number already exists."}
+            )
+
+    def save(self, *args, **kwargs):
+        self.enrollment_key = normalize_enrollment(self.enrollment_number)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "enrollment_number" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"enrollment_key"}
+        super().save(*args, **kwargs)
+
+class StudentTombstone(models.Model):
+    """
+    Marks a deleted student so offline devices can drop it on their next
+    sync. Also written when a student moves to another hostel, with the
+    hostel they left, for that hostel's devices, and under the old key
+    when an enrollment number is changed.
+    """
+    enrollment_key = models.CharField(max_length=32, unique=True)
+    hostel = models.ForeignKey(Hostel, null=True, blank=True, on_delete=models.CASCADE, related_name="+")
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.enrollment_key} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
 class MovementLog(models.Model):
     IN = "IN"
     OUT = "OUT"
     DIRECTION_CHOICES = [(IN, "IN"), (OUT, "OUT")]
 
-    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    # Indexed through (student, -timestamp) below, not on its own.
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, db_index=False)
+    # The student's hostel when the scan happened, copied so per-hostel log
+    # pages read only that hostel's part of the (hostel, -timestamp) index.
+    hostel = models.ForeignKey(Hostel, on_delete=models.PROTECT, related_name="+", db_index=False)
+    gate = models.ForeignKey(Gate, null=True, blank=True, on_delete=models.SET_NULL, related_name="+", db_index=False)
     direction = models.CharField(max_length=3, choices=DIRECTION_CHOICES)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Defaults to now, but batch uploads keep the time the device scanned.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     recorded_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
     note = models.TextField(blank=True)
     photo = models.ImageField(upload_to="students/", blank=True, null=True)
+    # Filled in by gate.images once the upload has been processed: photo then
+    # points at the display-size rendition and the original is dropped.
+    photo_thumb = models.ImageField(blank=True, null=True, editable=False)
+    photo_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    # Optional key sent by the scanner so a retried request is not applied twice.
+    client_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    # When the row was inserted, by the server's clock (timestamp may be the
+    # device's). Empty for logs written before it was added.
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            # logs page / export / admin: newest first, keyset on (timestamp, id)
+            models.Index(fields=["-timestamp", "-id"], name="gate_log_ts_idx"),
+            # one student's history
+            models.Index(fields=["student", "-timestamp"], name="gate_log_student_ts_idx"),
+            # one hostel's logs page / export
+            models.Index(fields=["hostel", "-timestamp", "-id"], name="gate_log_hostel_ts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student.enrollment_number} {self.direction} at {self.timestamp:%Y-%m-%d %H:%M}"
+
+
+class MovementLogArchive(models.Model):
+    """Movement logs moved out of the hot table by ``manage.py archive_logs``."""
+    # Keeps the id the row had in MovementLog.
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, db_index=False)
+    hostel = models.ForeignKey(Hostel, on_delete=models.PROTECT, related_name="+", db_index=False)
+    gate = models.ForeignKey(Gate, null=True, blank=True, on_delete=models.SET_NULL, related_name="+", db_index=False)
+    direction = models.CharField(max_length=3, choices=MovementLog.DIRECTION_CHOICES)
+    timestamp = models.DateTimeField()
+    recorded_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    note = models.TextField(blank=True)
+    photo = models.CharField(max_length=100, blank=True)
+    photo_thumb = models.CharField(max_length=100, blank=True)
+    photo_sha256 = models.CharField(max_length=64, blank=True)
+    client_key = models.CharField(max_length=64, null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["timestamp", "id"], name="gate_logarch_ts_idx"),
+            models.Index(fields=["student", "timestamp"], name="gate_logarch_student_ts_idx"),
+            models.Index(fields=["hostel", "timestamp", "id"], name="gate_logarch_hostel_ts_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} {self.direction} at {self.timestamp:%Y-%m-%d %H:%M} (archived)"
+
+
+class OccupancyCounter(models.Model):
+    """
+    Running inside/outside totals, so pages don't COUNT(*) the roster: one
+    row per hostel, summed for the campus (see gate.occupancy).
+    """
+    key = models.CharField(max_length=32, unique=True)
+    inside = models.IntegerField(default=0)
+    outside = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key}: {self.inside} inside, {self.outside} outside"
+
+
+class MovementRollup(models.Model):
+    """
+    Movement counts per hour or day, hostel, room block and direction,
+    filled in by ``manage.py rollup_movements`` so analytics never scan
+    MovementLog.
+    """
+    HOUR = "hour"
+    DAY = "day"
+    PERIOD_CHOICES = [(HOUR, "Hour"), (DAY, "Day")]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    # Start of the hour / day in the site's time zone.
+    bucket = models.DateTimeField()
+    hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name="+", db_index=False)
+    block = models.CharField(max_length=20, blank=True)
+    direction = models.CharField(max_length=3, choices=MovementLog.DIRECTION_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    # IN rows only: returns that closed an outing, and the outings' total length.
+    returns = models.PositiveIntegerField(default=0)
+    outside_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "bucket", "hostel", "block", "direction"], name="gate_rollup_unique"
+            ),
+        ]
+        indexes = [
+            # one hostel's analytics
+            models.Index(fields=["hostel", "period", "bucket"], name="gate_rollup_hostel_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.period} {self.bucket:%Y-%m-%d %H:%M} {self.block or '-'} {self.direction}: {self.count}"
+
+
+class RollupWatermark(models.Model):
+    """Highest MovementLog id already counted into the rollups."""
+    name = models.CharField(max_length=32, unique=True)
+    last_log_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_log_id}"
+
+
+class DeviceKey(models.Model):
+    """
+    API credential for a gate scanner. The device sends
+    ``Authorization: Device <prefix>.<secret>`` and acts as ``user``; only a
+    SHA-256 of the secret is stored.
+    """
+    name = models.CharField(max_length=100)
+    prefix = models.CharField(max_length=16, unique=True, editable=False)
+    key_hash = models.CharField(max_length=64, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="device_keys")
+    # A scanner bound to a gate sees and records only that gate's hostel.
+    gate = models.ForeignKey(Gate, null=True, blank=True, on_delete=models.SET_NULL, related_name="device_keys")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.prefix})"
+
+    def set_new_key(self):
+        """Give the device a fresh secret; returns the full key to hand over once."""
+        self.prefix = "gk_" + secrets.token_hex(6)
+        secret = secrets.token_urlsafe(32)
+        self.key_hash = hashlib.sha256(secret.encode()).hexdigest()
+        return f"{self.prefix}.{secret}"
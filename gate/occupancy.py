@@ -0,0 +1,126 @@
+# gate/occupancy.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from . import events, hostels
+from .models import Hostel, OccupancyCounter, Student
+from .replicas import primary
+
+
+CACHE_KEY = "gate:occupancy"
+
+
+def counter_key(hostel_id):
+    """Counter row for one hostel."""
+    return f"hostel:{hostel_id}"
+
+
+def get_counts(hostel_ids=None):
+    """
+    Inside/outside totals summed over ``hostel_ids``, or over every hostel
+    for the campus, each served from the cache or its counter row. There
+    is no campus row: toggles in different hostels never touch the same
+    counter.
+    """
+    if hostel_ids is None:
+        hostel_ids = [pk for pk, _name in hostels.all_hostels().values()]
+    totals = {"inside": 0, "outside": 0}
+    for hostel_id in sorted(hostel_ids):
+        counts = _get(hostel_id)
+        totals["inside"] += counts["inside"]
+        totals["outside"] += counts["outside"]
+    return totals
+
+
+def _get(hostel_id):
+    key = counter_key(hostel_id)
+    counts = cache.get(f"{CACHE_KEY}:{key}")
+    if counts is None:
+        with primary():
+            row = (
+                OccupancyCounter.objects.filter(key=key)
+                .values("inside", "outside")
+                .first()
+            )
+        counts = row or _initialise(hostel_id)[0]
+        cache.set(f"{CACHE_KEY}:{key}", counts, getattr(settings, "GATE_OCCUPANCY_CACHE_SECONDS", 10))
+    return counts
+
+
+def adjust(inside=0, outside=0, *, hostel_id):
+    """
+    Add a delta to ``hostel_id``'s counter. Call inside the transaction
+    that changed the students; the cached totals are dropped once it
+    commits.
+    """
+    if not inside and not outside:
+        return
+    counters = OccupancyCounter.objects.filter(key=counter_key(hostel_id))
+    delta = {"inside": F("inside") + inside, "outside": F("outside") + outside}
+    if not counters.update(**delta):
+        # First write to the counter: our recount already includes this
+        # change, unless another transaction created the row first.
+        _counts, created = _initialise(hostel_id)
+        if not created:
+            counters.update(**delta)
+    transaction.on_commit(lambda: _counts_changed(hostel_id))
+
+
+def count_students(hostel_id):
+    """Both totals from the Student table in a single aggregate query."""
+    return Student.objects.filter(hostel_id=hostel_id).aggregate(
+        inside=Count("pk", filter=Q(is_inside=True)),
+        outside=Count("pk", filter=Q(is_inside=False)),
+    )
+
+
+def reconcile(fix=True):
+    """
+    Recompute every hostel's counter from Student. Returns
+    ``[(key, stored, actual)]``; when ``fix`` is set the stored rows are
+    overwritten with the actual counts.
+    """
+    results = []
+    for hostel_id in Hostel.objects.values_list("pk", flat=True):
+        key = counter_key(hostel_id)
+        with transaction.atomic():
+            row = (
+                OccupancyCounter.objects.select_for_update()
+                .filter(key=key)
+                .values("inside", "outside")
+                .first()
+            )
+            actual = count_students(hostel_id)
+            if fix:
+                OccupancyCounter.objects.update_or_create(key=key, defaults=actual)
+                transaction.on_commit(lambda hostel_id=hostel_id: _counts_changed(hostel_id))
+        results.append((key, row, actual))
+    return results
+
+
+def _counts_changed(hostel_id):
+    cache.delete(f"{CACHE_KEY}:{counter_key(hostel_id)}")
+    if not events.has_listeners():
+        return
+    broker = events.get_broker()
+    broker.publish({"type": "counts", "data": get_counts()})
+    broker.publish({"type": "counts", "data": {**_get(hostel_id), "hostel": hostel_id}})
+
+
+def _initialise(hostel_id):
+    """
+    Create ``hostel_id``'s counter from a recount. Returns ``(counts,
+    created)``; when a concurrent first write wins the unique key, its row
+    is returned instead.
+    """
+    key = counter_key(hostel_id)
+    counts = count_students(hostel_id)
+    try:
+        with transaction.atomic():
+            OccupancyCounter.objects.create(key=key, **counts)
+    except IntegrityError:
+        return OccupancyCounter.objects.filter(key=key).values("inside", "outside").get(), False
+    return counts, True
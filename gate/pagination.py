@@ -0,0 +1,162 @@
+# gate/pagination.py
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset plus cursors to its neighbours."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, model, fields):
+    """
+    Return the values of ``model``'s ``fields`` in ``token``, converted to
+    the fields' types, or None if it is invalid (hand-edited or stale), so
+    a bad cursor just shows the first page.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+    try:
+        values = [model._meta.get_field(name).to_python(value) for name, value in zip(fields, values)]
+    except (ValidationError, ValueError, TypeError):
+        return None
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def keyset_page(qs, ordering, *, after=None, before=None, size=100):
+    """
+    Slice ``qs`` by key instead of OFFSET, so every page costs the same.
+
+    ``ordering`` lists the key fields, "-" for descending, and must end with
+    a unique field (e.g. ``["-timestamp", "-id"]``). ``after`` / ``before``
+    are cursors taken from a previous page's ``next_cursor`` / ``prev_cursor``.
+    """
+    fields = [f.lstrip("-") for f in ordering]
+    after_values = decode_cursor(after, qs.model, fields)
+    before_values = decode_cursor(before, qs.model, fields)
+
+    if before_values is not None:
+        reverse = [f[1:] if f.startswith("-") else "-" + f for f in ordering]
+        qs = qs.filter(_beyond(ordering, before_values, backwards=True)).order_by(*reverse)
+        rows = list(qs[: size + 1])
+        has_more = len(rows) > size
+        items = rows[:size][::-1]
+        next_cursor = _cursor(items[-1], fields) if items else None
+        prev_cursor = _cursor(items[0], fields) if items and has_more else None
+        return KeysetPage(items, next_cursor, prev_cursor)
+
+    qs = qs.order_by(*ordering)
+    if after_values is not None:
+        qs = qs.filter(_beyond(ordering, after_values))
+    rows = list(qs[: size + 1])
+    items = rows[:size]
+    next_cursor = _cursor(items[-1], fields) if len(rows) > size else None
+    prev_cursor = _cursor(items[0], fields) if items and after_values is not None else None
+    return KeysetPage(items, next_cursor, prev_cursor)
+
+
+def _beyond(ordering, values, backwards=False):
+    """Rows strictly after ``values`` in ``ordering`` (or before, if backwards)."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip("-")
+        descending = field.startswith("-") != backwards
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[i]})
+        for prior, value in zip(ordering[:i], values[:i]):
+            step &= Q(**{prior.lstrip("-"): value})
+        condition |= step
+    return condition
+
+
+def _cursor(obj, fields):
+    values = []
+    for name in fields:
+        value = getattr(obj, name)
+        values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+    return encode_cursor(values)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an exact COUNT(*) over a whole large table.
+
+    An unfiltered queryset is counted from the planner statistics on
+    PostgreSQL (``pg_class.reltuples``) or from the primary key range
+    elsewhere. A filtered one is counted only up to ``count_cap`` rows;
+    past that the page links stop at the cap and the filter should be
+    narrowed instead.
+    """
+
+    count_cap = 10000
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        # OFFSET over the primary keys only (an index-only walk), then load
+        # just this page's rows and joins.
+        keys = list(self.object_list.values_list("pk", flat=True)[bottom:top])
+        rows = self.object_list.in_bulk(keys) if keys else {}
+        return self._get_page([rows[pk] for pk in keys if pk in rows], number, self)
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if qs.query.where:
+            return qs.order_by()[: self.count_cap].count()
+        return self._estimate(qs)
+
+    def _estimate(self, qs):
+        connection = connections[qs.db]
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [qs.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                return int(row[0])
+        # Two index lookups; MIN and MAX in one query scans the table on SQLite.
+        first = qs.order_by("pk").values_list("pk", flat=True).first()
+        if first is None:
+            return 0
+        return qs.order_by("-pk").values_list("pk", flat=True).first() - first + 1
@@ -0,0 +1,109 @@
+# gate/replicas.py
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+
+
+# Set per request by ReplicaMiddleware. Outside a request (commands, photo
+# workers) nothing is set and every query goes to the primary.
+_use_replicas = ContextVar("gate_use_replicas", default=False)
+_wrote = ContextVar("gate_wrote", default=False)
+
+# Apps whose rows must be readable right after they are written (a fresh
+# login's session) and that are never heavy to read.
+PRIMARY_ONLY_APPS = {"sessions"}
+
+STICKY_COOKIE = "gate_primary_until"
+STICKY_CACHE_PREFIX = "gate:primary-until:"
+
+
+@contextmanager
+def primary():
+    """Send this block's reads to the primary, e.g. to fill a shared cache."""
+    token = _use_replicas.set(False)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes, and reads outside a read-only request, go to ``default``; reads
+    inside one go to a random replica from ``GATE_DATABASE_REPLICAS``. Reads
+    inside a transaction on the primary stay on it. Only ``default`` is
+    migrated; replicas get their schema from replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "GATE_DATABASE_REPLICAS", [])
+        if (
+            not replicas
+            or not _use_replicas.get()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APPS:
+            _wrote.set(True)
+            _use_replicas.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+    """
+    Lets GET/HEAD requests read from replicas, unless the user wrote
+    something in the last ``GATE_REPLICA_STICKY_SECONDS``: then they read
+    from the primary, so a guard never sees a status older than their own
+    toggle. The window is kept in a cookie (browsers) and in the cache under
+    the user id (device-key clients). Must come after DeviceKeyMiddleware.
+    """
+
+    def process_request(self, request):
+        _wrote.set(False)
+        _use_replicas.set(
+            request.method in ("GET", "HEAD") and not _sticky(request.COOKIES.get(STICKY_COOKIE))
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        user = getattr(request, "user", None)
+        if _use_replicas.get() and user is not None and user.is_authenticated:
+            if _sticky(cache.get(f"{STICKY_CACHE_PREFIX}{user.pk}")):
+                _use_replicas.set(False)
+        return None
+
+    def process_response(self, request, response):
+        if _wrote.get():
+            seconds = getattr(settings, "GATE_REPLICA_STICKY_SECONDS", 10)
+            until = time.time() + seconds
+            response.set_cookie(STICKY_COOKIE, f"{until:.0f}", max_age=seconds, httponly=True, samesite="Lax")
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                cache.set(f"{STICKY_CACHE_PREFIX}{user.pk}", until, seconds)
+        # Worker threads are reused; leave nothing behind for the next request.
+        _use_replicas.set(False)
+        _wrote.set(False)
+        return response
+
+
+def _sticky(until):
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
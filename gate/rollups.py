@@ -0,0 +1,221 @@
+# gate/rollups.py
+
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+
+from .models import MovementLog, MovementRollup, RollupWatermark, Student
+
+
+WATERMARK = "movements"
+
+_BLOCK = re.compile(r"^\s*([A-Za-z0-9]+)\s*[-/ ]|^\s*([A-Za-z]+)\d")
+
+
+def room_block(room):
+    """Block part of a room number: "A-101" -> "A", "B12" -> "B", "101" -> ""."""
+    match = _BLOCK.match(room or "")
+    if not match:
+        return ""
+    return (match.group(1) or match.group(2)).upper()[:20]
+
+
+def catch_up(*, batch_size=5000, max_batches=None):
+    """
+    Count logs written since the watermark into the hourly and daily
+    rollups. Returns the number of logs processed.
+
+    Logs are taken in id order. A batch stops at the first log inserted
+    less than ``GATE_ROLLUP_LAG_SECONDS`` ago (by ``created_at``, the
+    server's clock; a scan's own timestamp can be hours old), so a lower
+    id still being committed by another transaction is not skipped. Each batch updates the rollups and
+    the watermark in one transaction; the watermark row lock keeps
+    concurrent runs from counting a log twice.
+    """
+    processed = 0
+    batches = 0
+    last = {}  # student_id -> (direction, timestamp) of their latest counted log
+    while max_batches is None or batches < max_batches:
+        horizon = timezone.now() - timedelta(seconds=getattr(settings, "GATE_ROLLUP_LAG_SECONDS", 60))
+        with transaction.atomic():
+            RollupWatermark.objects.get_or_create(name=WATERMARK)
+            mark = RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+            rows = list(
+                MovementLog.objects.filter(id__gt=mark.last_log_id)
+                .order_by("id")
+                .values_list(
+                    "id", "student_id", "direction", "timestamp", "student__room_number", "hostel_id", "created_at"
+                )[:batch_size]
+            )
+            for i, row in enumerate(rows):
+                if row[6] is not None and row[6] > horizon:
+                    rows = rows[:i]
+                    break
+            if not rows:
+                break
+
+            _load_previous(last, {row[1] for row in rows} - last.keys(), mark.last_log_id)
+            totals = {}
+            for _, student_id, direction, timestamp, room, hostel_id, _created in rows:
+                block = room_block(room)
+                local = timezone.localtime(timestamp)
+                hour = local.replace(minute=0, second=0, microsecond=0)
+                outing = None
+                previous = last.get(student_id)
+                if direction == MovementLog.IN and previous and previous[0] == MovementLog.OUT:
+                    if timestamp > previous[1]:
+                        outing = int((timestamp - previous[1]).total_seconds())
+                last[student_id] = (direction, timestamp)
+                for key in ((MovementRollup.HOUR, hour), (MovementRollup.DAY, hour.replace(hour=0))):
+                    entry = totals.setdefault(key + (hostel_id, block, direction), [0, 0, 0])
+                    entry[0] += 1
+                    if outing is not None:
+                        entry[1] += 1
+                        entry[2] += outing
+            _apply(totals)
+            mark.last_log_id = rows[-1][0]
+            mark.save(update_fields=["last_log_id", "updated_at"])
+        processed += len(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+    return processed
+
+
+def rolled_up_through():
+    """Highest MovementLog id already included in the rollups (0 if none)."""
+    return (
+        RollupWatermark.objects.filter(name=WATERMARK).values_list("last_log_id", flat=True).first() or 0
+    )
+
+
+def _load_previous(last, student_ids, through_id):
+    """Fill ``last`` with each student's latest log already counted."""
+    if not student_ids:
+        return
+    latest = MovementLog.objects.filter(student=OuterRef("pk"), id__lte=through_id).order_by("-timestamp", "-id")
+    rows = (
+        Student.objects.filter(pk__in=student_ids)
+        .annotate(
+            counted_direction=Subquery(latest.values("direction")[:1]),
+            counted_timestamp=Subquery(latest.values("timestamp")[:1]),
+        )
+        .values_list("pk", "counted_direction", "counted_timestamp")
+    )
+    for pk, direction, timestamp in rows:
+        if direction is not None:
+            last[pk] = (direction, timestamp)
+
+
+def _apply(totals):
+    """Add ``{(period, bucket, hostel_id, block, direction): [count, returns, seconds]}`` to the rollups."""
+    existing = MovementRollup.objects.filter(
+        period__in={key[0] for key in totals},
+        bucket__in={key[1] for key in totals},
+        hostel_id__in={key[2] for key in totals},
+        block__in={key[3] for key in totals},
+    )
+    found = {(r.period, r.bucket, r.hostel_id, r.block, r.direction): r for r in existing}
+    to_update, to_create = [], []
+    for key, (count, returns, seconds) in totals.items():
+        row = found.get(key)
+        if row is None:
+            period, bucket, hostel_id, block, direction = key
+            to_create.append(MovementRollup(
+                period=period, bucket=bucket, hostel_id=hostel_id, block=block, direction=direction,
+                count=count, returns=returns, outside_seconds=seconds,
+            ))
+        else:
+            row.count += count
+            row.returns += returns
+            row.outside_seconds += seconds
+            to_update.append(row)
+    MovementRollup.objects.bulk_update(to_update, ["count", "returns", "outside_seconds"])
+    MovementRollup.objects.bulk_create(to_create)
+
+
+# -------------------- Reading --------------------
+
+def summary(days=30, block=None, hostel_ids=None):
+    """
+    Daily volumes, peak hours and average outing length over the last
+    ``days`` local days, from the rollups only; ``hostel_ids`` limits them
+    to those hostels.
+    """
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days - 1)
+    rollups = MovementRollup.objects.filter(bucket__gte=start)
+    if hostel_ids is not None:
+        rollups = rollups.filter(hostel_id__in=sorted(hostel_ids))
+    if block:
+        rollups = rollups.filter(block=block.upper())
+    daily = rollups.filter(period=MovementRollup.DAY)
+    hourly = rollups.filter(period=MovementRollup.HOUR)
+
+    volumes = {}
+    for bucket, direction, count in (
+        daily.values("bucket", "direction").annotate(n=Sum("count")).values_list("bucket", "direction", "n")
+    ):
+        day = timezone.localtime(bucket).date()
+        volumes.setdefault(day, {"in": 0, "out": 0})[direction.lower()] = count
+
+    hours = [{"hour": h, "in": 0, "out": 0} for h in range(24)]
+    for hour, direction, count in (
+        hourly.annotate(hour=ExtractHour("bucket"))
+        .values("hour", "direction")
+        .annotate(n=Sum("count"))
+        .values_list("hour", "direction", "n")
+    ):
+        hours[hour][direction.lower()] = count
+
+    outings = []
+    returns = seconds = 0
+    for name, block_returns, block_seconds in (
+        daily.filter(direction=MovementLog.IN, returns__gt=0)
+        .values("block")
+        .annotate(r=Sum("returns"), s=Sum("outside_seconds"))
+        .order_by("block")
+        .values_list("block", "r", "s")
+    ):
+        outings.append({
+            "block": name,
+            "returns": block_returns,
+            "average_seconds": round(block_seconds / block_returns),
+        })
+        returns += block_returns
+        seconds += block_seconds
+
+    return {
+        "from": start.date().isoformat(),
+        "to": today.date().isoformat(),
+        "block": block.upper() if block else None,
+        "daily": [
+            {"day": (start + timedelta(days=i)).date().isoformat(),
+             **volumes.get((start + timedelta(days=i)).date(), {"in": 0, "out": 0})}
+            for i in range(days)
+        ],
+        "peak_hours": hours,
+        "outings": {
+            "returns": returns,
+            "average_seconds": round(seconds / returns) if returns else None,
+            "by_block": outings,
+        },
+        "rolled_up_through": rolled_up_through(),
+    }
+
+
+def blocks(hostel_ids=None):
+    rollups = MovementRollup.objects.filter(period=MovementRollup.DAY)
+    if hostel_ids is not None:
+        rollups = rollups.filter(hostel_id__in=sorted(hostel_ids))
+    return list(
+        rollups.exclude(block="")
+        .values_list("block", flat=True)
+        .distinct()
+        .order_by("block")
+    )
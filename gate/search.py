@@ -0,0 +1,203 @@
+# gate/search.py
+
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, FloatField, Func, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
+
+from .models import Student, normalize_enrollment
+from .replicas import primary
+
+
+# Result ranks: lower sorts first.
+EXACT, PREFIX, NAME_PREFIX, FUZZY = 0, 1, 2, 3
+
+
+def search_students(q, limit=50, fuzzy=True, hostel_ids=None):
+    """
+    Students matching ``q`` by enrollment number or name, best first:
+    exact enrollment, enrollment prefix, name-word prefix, then fuzzy
+    (substring / trigram) matches unless ``fuzzy`` is False. ``hostel_ids``
+    limits the search to those hostels.
+
+    On PostgreSQL this runs against the trigram / pattern indexes created in
+    migration 0009 (without pg_trgm, fuzzy matches are LIKE scans only).
+    Elsewhere (SQLite) prefixes come from an in-process
+    index and only the fuzzy tail falls back to a LIKE scan.
+    """
+    q = (q or "").strip()
+    if not q:
+        return []
+    if connection.vendor == "postgresql":
+        return _search_postgres(q, limit, fuzzy, hostel_ids)
+    return _search_prefix_index(q, limit, fuzzy, hostel_ids)
+
+
+def _search_postgres(q, limit, fuzzy, hostel_ids):
+    from django.contrib.postgres.lookups import TrigramSimilar
+
+    key = normalize_enrollment(q)
+    upper_name = Upper("full_name")
+    trigram = _trigram_available()
+    if fuzzy:
+        condition = Q(enrollment_key__startswith=key) | Q(enrollment_key__contains=key) | Q(full_name__icontains=q)
+        if trigram:
+            condition |= TrigramSimilar(upper_name, Upper(Value(q)))
+    else:
+        condition = Q(enrollment_key__startswith=key) | Q(full_name__istartswith=q)
+    students = Student.objects.all()
+    if hostel_ids is not None:
+        students = students.filter(hostel_id__in=sorted(hostel_ids))
+    qs = (
+        students.filter(condition)
+        .annotate(
+            rank=Case(
+                When(enrollment_key=key, then=Value(EXACT)),
+                When(enrollment_key__startswith=key, then=Value(PREFIX)),
+                When(full_name__istartswith=q, then=Value(NAME_PREFIX)),
+                default=Value(FUZZY),
+                output_field=IntegerField(),
+            ),
+            similarity=(
+                Func(upper_name, Upper(Value(q)), function="similarity", output_field=FloatField())
+                if trigram else Value(0.0, output_field=FloatField())
+            ),
+        )
+        .order_by("rank", "-similarity", "enrollment_number")
+    )
+    return list(qs[:limit])
+
+
+_trigram = None
+
+
+def _trigram_available():
+    """Whether pg_trgm is installed (migration 0009 skips it without the rights to create it)."""
+    global _trigram
+    if _trigram is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram = cursor.fetchone() is not None
+    return _trigram
+
+
+def _search_prefix_index(q, limit, fuzzy, hostel_ids):
+    ranked = prefix_index.lookup(normalize_enrollment(q), limit, hostel_ids)
+    by_pk = Student.objects.in_bulk([pk for pk, _ in ranked])
+    results = [by_pk[pk] for pk, _ in ranked if pk in by_pk]
+
+    if fuzzy and len(results) < limit:
+        seen = {s.pk for s in results}
+        students = Student.objects.all()
+        if hostel_ids is not None:
+            students = students.filter(hostel_id__in=sorted(hostel_ids))
+        fuzzy = (
+            students.filter(Q(enrollment_key__contains=normalize_enrollment(q)) | Q(full_name__icontains=q))
+            .exclude(pk__in=seen)
+            .order_by("enrollment_number")[: limit - len(results)]
+        )
+        results.extend(fuzzy)
+    return results
+
+
+class PrefixIndex:
+    """
+    Per hostel, two sorted lists searched with bisect: (enrollment_key, pk)
+    and (name word, enrollment_key, pk), so a search within one hostel
+    never walks another's entries. Rebuilt lazily after invalidate() or
+    once older than ``GATE_SEARCH_INDEX_TTL`` seconds, to pick up other
+    processes' writes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+        self._generation = 0
+        self._built_generation = None
+        self._built_at = 0.0
+
+    def invalidate(self):
+        self._generation += 1
+
+    def lookup(self, prefix, limit, hostel_ids=None):
+        """
+        Return up to ``limit`` (pk, rank) pairs for tokens starting with
+        ``prefix``, from ``hostel_ids``' lists (every hostel with None).
+        """
+        data = self._snapshot()
+        found = []
+        for hostel_id in sorted(data if hostel_ids is None else set(hostel_ids) & data.keys()):
+            found.extend(self._lookup(*data[hostel_id], prefix, limit))
+        found.sort()
+        ranked, seen = [], set()
+        for rank, _, pk in found:
+            if pk not in seen and len(ranked) < limit:
+                ranked.append((pk, rank))
+                seen.add(pk)
+        return ranked
+
+    @staticmethod
+    def _lookup(keys, words, prefix, limit):
+        found, seen = [], set()
+        for entry in _starting_with(keys, prefix):
+            if len(found) >= limit:
+                return found
+            found.append((EXACT if entry[0] == prefix else PREFIX, entry[0], entry[-1]))
+            seen.add(entry[-1])
+        for entry in _starting_with(words, prefix):
+            if len(found) >= limit:
+                break
+            if entry[-1] not in seen:
+                found.append((NAME_PREFIX, entry[:2], entry[-1]))
+                seen.add(entry[-1])
+        return found
+
+    def _is_stale(self):
+        ttl = getattr(settings, "GATE_SEARCH_INDEX_TTL", 60)
+        return (
+            self._built_generation != self._generation
+            or time.monotonic() - self._built_at > ttl
+        )
+
+    def _snapshot(self):
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self._build()
+        return self._data
+
+    def _build(self):
+        generation = self._generation
+        data = {}
+        with primary():
+            rows = Student.objects.values_list("hostel_id", "pk", "enrollment_key", "full_name")
+            for hostel_id, pk, key, name in rows.iterator():
+                keys, words = data.setdefault(hostel_id, ([], []))
+                keys.append((key, pk))
+                for word in set(name.lower().split()):
+                    words.append((word, key, pk))
+        for keys, words in data.values():
+            keys.sort()
+            words.sort()
+        self._data = data
+        self._built_at = time.monotonic()
+        self._built_generation = generation
+
+
+def _starting_with(entries, prefix):
+    i = bisect_left(entries, (prefix,))
+    while i < len(entries) and entries[i][0].startswith(prefix):
+        yield entries[i]
+        i += 1
+
+
+prefix_index = PrefixIndex()
+
+
+def invalidate():
+    """Drop the in-process index after students were written."""
+    prefix_index.invalidate()
@@ -0,0 +1,246 @@
+# gate/services.py
+
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import cards, events, journal, occupancy, sync
+from .models import Student, MovementLog, normalize_enrollment
+
+
+# Result of a toggle. ``replayed`` is True when the scan matched an earlier
+# one (same idempotency key, or inside the debounce window) and nothing was
+# written.
+ToggleResult = namedtuple("ToggleResult", ["student", "log", "replayed"])
+
+# Direction value for batch scans that should simply flip the current status.
+TOGGLE = "TOGGLE"
+
+
+class IdempotencyKeyConflict(Exception):
+    """The idempotency key was already used for a different student."""
+
+
+def toggle_student(enrollment, *, user=None, note="", idempotency_key=None, photo=None, hostel_ids=None, gate=None):
+    """
+    Flip a student's in/out status and record the movement atomically.
+
+    The student row is locked for the duration of the transaction so two
+    guards scanning the same card at once serialize instead of losing an
+    update. Only the status columns are written. An optional
+    ``photo`` upload is stored with the log and processed in the background.
+    With ``hostel_ids`` only students of those hostels can be toggled;
+    ``gate`` records where the scan happened.
+
+    With ``GATE_LOG_JOURNAL`` on, a log without a photo is journaled (on
+    disk before the status change commits) and inserted behind by
+    gate.journal; the returned log is then unsaved.
+
+    Raises ``Student.DoesNotExist`` if the enrollment is unknown and
+    ``IdempotencyKeyConflict`` if the key belongs to another student's scan.
+    """
+    idempotency_key = (idempotency_key or "").strip()[:64] or None
+    debounce = getattr(settings, "GATE_TOGGLE_DEBOUNCE_SECONDS", 0)
+
+    try:
+        with transaction.atomic():
+            students = Student.objects.select_for_update().by_enrollment(enrollment)
+            if hostel_ids is not None:
+                students = students.filter(hostel_id__in=sorted(hostel_ids))
+            student = students.get()
+
+            if idempotency_key:
+                previous = (
+                    MovementLog.objects.filter(client_key=idempotency_key)
+                    .select_related("student")
+                    .first()
+                )
+                if previous is None and journal.enabled():
+                    previous = journal.pending_log(idempotency_key)
+                if previous is not None:
+                    if previous.student_id != student.pk:
+                        raise IdempotencyKeyConflict(idempotency_key)
+                    return ToggleResult(student, previous, True)
+
+            if debounce:
+                cutoff = timezone.now() - timedelta(seconds=debounce)
+                previous = (
+                    MovementLog.objects.filter(student=student, timestamp__gte=cutoff)
+                    .order_by("-timestamp")
+                    .first()
+                )
+                recent = student.last_movement_at is not None and student.last_movement_at >= cutoff
+                if previous is None and recent and journal.enabled():
+                    # The latest log may still be journaled; the student row has its details.
+                    previous = MovementLog(
+                        student=student, direction=student.last_direction, timestamp=student.last_movement_at
+                    )
+                if previous is not None:
+                    return ToggleResult(student, previous, True)
+
+            student.is_inside = not student.is_inside
+            student.last_direction = MovementLog.IN if student.is_inside else MovementLog.OUT
+            student.last_movement_at = timezone.now()
+            student.save(update_fields=["is_inside", "last_direction", "last_movement_at", "updated_at"])
+
+            log = MovementLog(
+                student=student,
+                hostel_id=student.hostel_id,
+                gate=gate,
+                direction=student.last_direction,
+                timestamp=student.last_movement_at,
+                recorded_by=user if user is not None and user.is_authenticated else None,
+                note=note,
+                photo=photo,
+                client_key=idempotency_key,
+            )
+            if journal.enabled() and not photo:
+                log.client_key = log.client_key or journal.new_key()
+                journal.write(log)
+            else:
+                log.save(force_insert=True)
+            events.publish_on_commit("movement", movement_event(student, log))
+    except IntegrityError:
+        # Same key raced in from another request; hand back its result.
+        if not idempotency_key:
+            raise
+        previous = MovementLog.objects.select_related("student").get(client_key=idempotency_key)
+        if previous.student.enrollment_key != normalize_enrollment(enrollment):
+            raise IdempotencyKeyConflict(idempotency_key)
+        return ToggleResult(previous.student, previous, True)
+
+    return ToggleResult(student, log, False)
+
+
+def apply_scan_batch(scans, *, user=None, hostel_ids=None, gate=None):
+    """
+    Apply an ordered list of queued scans in one transaction.
+
+    Each scan is a dict with ``enrollment``, ``direction`` (IN, OUT or
+    TOGGLE), ``timestamp`` (aware datetime or None for "now"), ``note`` and
+    an optional idempotency ``key``. Students are resolved and locked with a
+    single query and all logs are written with one ``bulk_create``, keeping
+    the device timestamps. ``hostel_ids`` and ``gate`` work as in
+    ``toggle_student``.
+
+    A scan older than the student's last movement (a device that was
+    offline longer than another one) is logged but leaves the status
+    alone; its result has ``stale`` set. Timestamps ahead of the server
+    clock (a device with a fast clock) are taken as "now". Keys already used, including
+    those still in the journal, are replayed.
+
+    Returns one result dict per scan, in the same order.
+    """
+    recorded_by = user if user is not None and user.is_authenticated else None
+    wanted = {normalize_enrollment(scan["enrollment"]) for scan in scans}
+    keys = [scan["key"] for scan in scans if scan.get("key")]
+    results = []
+
+    with transaction.atomic():
+        students = Student.objects.select_for_update().filter(enrollment_key__in=wanted)
+        if hostel_ids is not None:
+            students = students.filter(hostel_id__in=sorted(hostel_ids))
+        students = {s.enrollment_key: s for s in students}
+        seen = {
+            key: (student_id, direction)
+            for key, student_id, direction in MovementLog.objects.filter(client_key__in=keys)
+            .values_list("client_key", "student_id", "direction")
+        }
+        if journal.enabled():
+            for key in set(keys) - seen.keys():
+                pending = journal.pending_log(key)
+                if pending is not None:
+                    seen[key] = (pending.student_id, pending.direction)
+
+        was_inside = {s.pk: s.is_inside for s in students.values()}
+        now = timezone.now()
+        changed = {}
+        logs = []
+        for scan in scans:
+            student = students.get(normalize_enrollment(scan["enrollment"]))
+            if student is None:
+                results.append({"ok": False, "enrollment": scan["enrollment"], "error": "not_found"})
+                continue
+
+            key = scan.get("key") or None
+            if key and key in seen and seen[key][0] != student.pk:
+                results.append({
+                    "ok": False, "enrollment": student.enrollment_number, "error": "idempotency_key_conflict",
+                })
+                continue
+            if key and key in seen:
+                results.append({
+                    "ok": True,
+                    "enrollment": student.enrollment_number,
+                    "direction": seen[key][1],
+                    "is_inside": student.is_inside,
+                    "replayed": True,
+                })
+                continue
+
+            direction = scan["direction"]
+            if direction == TOGGLE:
+                direction = MovementLog.OUT if student.is_inside else MovementLog.IN
+            timestamp = min(scan.get("timestamp") or now, now)
+            stale = student.last_movement_at is not None and timestamp < student.last_movement_at
+            if not stale:
+                student.is_inside = direction == MovementLog.IN
+                student.last_direction = direction
+                student.last_movement_at = timestamp
+                student.updated_at = now
+                changed[student.pk] = student
+
+            logs.append(MovementLog(
+                student=student,
+                hostel_id=student.hostel_id,
+                gate=gate,
+                direction=direction,
+                timestamp=timestamp,
+                recorded_by=recorded_by,
+                note=scan.get("note") or "",
+                client_key=key,
+            ))
+            events.publish_on_commit("movement", movement_event(student, logs[-1]))
+            if key:
+                seen[key] = (student.pk, direction)
+            results.append({
+                "ok": True,
+                "enrollment": student.enrollment_number,
+                "direction": direction,
+                "is_inside": student.is_inside,
+                "replayed": False,
+                "stale": stale,
+            })
+
+        Student.objects.bulk_update(
+            changed.values(), ["is_inside", "last_direction", "last_movement_at", "updated_at"]
+        )
+        MovementLog.objects.bulk_create(logs)
+
+        net = {}
+        for s in changed.values():
+            if s.is_inside != was_inside[s.pk]:
+                net[s.hostel_id] = net.get(s.hostel_id, 0) + (1 if s.is_inside else -1)
+        for hostel_id, delta in net.items():
+            occupancy.adjust(inside=delta, outside=-delta, hostel_id=hostel_id)
+        if changed:
+            sync.roster_changed({s.hostel_id for s in changed.values()})
+            cards.invalidate({s.enrollment_key for s in changed.values()})
+
+    return results
+
+
+def movement_event(student, log):
+    """Payload broadcast to live dashboards for one recorded movement."""
+    return {
+        "enrollment": student.enrollment_number,
+        "hostel": student.hostel_id,
+        "name": student.full_name,
+        "room": student.room_number,
+        "direction": log.direction,
+        "is_inside": student.is_inside,
+        "timestamp": log.timestamp.isoformat(),
+    }
@@ -0,0 +1,40 @@
+# gate/sessions.py
+
+import time
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+
+# Session key holding the epoch second the session was last written.
+REFRESHED_KEY = "_refreshed_at"
+
+
+class SlidingSessionMiddleware(MiddlewareMixin):
+    """
+    Sliding expiry without a session write on every request.
+
+    The session is re-saved, pushing its expiry and cookie forward, only
+    once it is older than ``GATE_SESSION_REFRESH_FRACTION`` of
+    ``SESSION_COOKIE_AGE``. An idle session therefore lasts between
+    (1 - fraction) and 1 times the cookie age. Must come after
+    SessionMiddleware in MIDDLEWARE.
+    """
+
+    def process_response(self, request, response):
+        session = getattr(request, "session", None)
+        if session is None or settings.SESSION_SAVE_EVERY_REQUEST:
+            return response
+        # Checked before and after loading: no cookie means nothing to load,
+        # and loading drops the key if the stored session expired or was
+        # deleted (a logout elsewhere), which must not be resurrected.
+        if not session.session_key:
+            return response
+        refreshed = session.get(REFRESHED_KEY, 0)
+        if not session.session_key:
+            return response
+        now = int(time.time())
+        interval = settings.SESSION_COOKIE_AGE * getattr(settings, "GATE_SESSION_REFRESH_FRACTION", 0.1)
+        if session.modified or now - refreshed >= interval:
+            session[REFRESHED_KEY] = now
+        return response
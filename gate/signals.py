@@ -0,0 +1,110 @@
+# gate/signals.py
+
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cards, devices, hostels, images, occupancy, search, sync
+from .models import DeviceKey, Gate, Hostel, MovementLog, OccupancyCounter, Student, StudentTombstone
+
+
+# Saves that touch only these columns leave the search index valid.
+SEARCH_FIELDS = {"enrollment_number", "full_name"}
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, update_fields=None, **kwargs):
+    previous_hostel = getattr(instance, "_loaded_hostel_id", instance.hostel_id)
+    previous_key = getattr(instance, "_loaded_enrollment_key", None) or instance.enrollment_key
+    moved = not created and previous_hostel != instance.hostel_id
+    renamed = not created and previous_key != instance.enrollment_key
+    if update_fields is None or SEARCH_FIELDS & set(update_fields) or moved:
+        search.invalidate()
+    sync.roster_changed({instance.hostel_id, previous_hostel})
+    cards.invalidate({instance.enrollment_key, previous_key})
+    instance._loaded_enrollment_key = instance.enrollment_key
+
+    # Bulk writers (batch toggles, CSV import) adjust the counters themselves.
+    was_inside = getattr(instance, "_loaded_is_inside", instance.is_inside)
+    if moved:
+        # Out of the old hostel's counts and into the new one's.
+        if was_inside:
+            occupancy.adjust(inside=-1, hostel_id=previous_hostel)
+        else:
+            occupancy.adjust(outside=-1, hostel_id=previous_hostel)
+        delta = (1, 0) if instance.is_inside else (0, 1)
+    elif created:
+        delta = (1, 0) if instance.is_inside else (0, 1)
+    elif was_inside != instance.is_inside:
+        delta = (1, -1) if instance.is_inside else (-1, 1)
+    else:
+        delta = (0, 0)
+    occupancy.adjust(*delta, hostel_id=instance.hostel_id)
+    instance._loaded_is_inside = instance.is_inside
+    instance._loaded_hostel_id = instance.hostel_id
+
+    if moved or renamed:
+        # Devices of the hostel it was in still hold it under its old key.
+        StudentTombstone.objects.update_or_create(
+            enrollment_key=previous_key,
+            defaults={"deleted_at": timezone.now(), "hostel_id": previous_hostel},
+        )
+    if created or renamed:
+        # A re-added (or renamed-to) key supersedes its old deletion marker.
+        StudentTombstone.objects.filter(enrollment_key=instance.enrollment_key).delete()
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, **kwargs):
+    search.invalidate()
+    sync.roster_changed({instance.hostel_id})
+    cards.invalidate({instance.enrollment_key})
+    StudentTombstone.objects.update_or_create(
+        enrollment_key=instance.enrollment_key,
+        defaults={"deleted_at": timezone.now(), "hostel_id": instance.hostel_id},
+    )
+    if instance.is_inside:
+        occupancy.adjust(inside=-1, hostel_id=instance.hostel_id)
+    else:
+        occupancy.adjust(outside=-1, hostel_id=instance.hostel_id)
+
+
+@receiver(post_save, sender=MovementLog)
+def movement_log_saved(sender, instance, **kwargs):
+    if instance.photo and not instance.photo_sha256:
+        images.schedule(instance.pk)
+
+
+@receiver(post_save, sender=DeviceKey)
+@receiver(post_delete, sender=DeviceKey)
+# Cached device users carry their gate, and so their hostel.
+@receiver(post_save, sender=Gate)
+@receiver(post_delete, sender=Gate)
+def device_key_changed(sender, **kwargs):
+    devices.revoke_cached()
+
+
+@receiver(post_save, sender=Hostel)
+def hostel_saved(sender, **kwargs):
+    hostels.invalidate()
+
+
+@receiver(post_delete, sender=Hostel)
+def hostel_deleted(sender, instance, **kwargs):
+    hostels.invalidate()
+    OccupancyCounter.objects.filter(key=occupancy.counter_key(instance.pk)).delete()
+
+
+@receiver(m2m_changed, sender=Hostel.staff.through)
+def hostel_staff_changed(sender, **kwargs):
+    devices.revoke_cached()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login; anything else may deactivate a device's user.
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    if DeviceKey.objects.filter(user=instance).exists():
+        devices.revoke_cached()
@@ -0,0 +1,157 @@
+# gate/sync.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import hostels
+from .models import Student, StudentTombstone
+from .replicas import primary
+
+
+# Column order of each row in "students"; keeps the payload compact.
+FIELDS = ["enrollment", "name", "room", "is_inside"]
+VALUES = ("enrollment_number", "full_name", "room_number", "is_inside")
+
+VERSION_CACHE_KEY = "gate:roster-version"
+
+
+def roster_version(hostel_ids=None):
+    """
+    ``(last_change, student_count)`` of the roster, or of ``hostel_ids``'
+    part of it: moves on every add, edit, toggle or delete. Both parts come
+    from indexed aggregates.
+    """
+    students = Student.objects.all()
+    deleted = StudentTombstone.objects.all()
+    if hostel_ids is not None:
+        students = students.filter(hostel_id__in=sorted(hostel_ids))
+        deleted = deleted.filter(hostel_id__in=sorted(hostel_ids))
+    students = students.aggregate(changed=Max("updated_at"), count=Count("id"))
+    deleted = deleted.aggregate(changed=Max("deleted_at"))["changed"]
+    changed = max((t for t in (students["changed"], deleted) if t is not None), default=None)
+    return changed, students["count"]
+
+
+def cached_roster_version(hostel_ids=None):
+    """
+    ``roster_version()`` served from the cache, so a conditional request
+    costs a cache hit. A scope's version is combined from one entry per
+    hostel. Writes drop the entries through ``roster_changed()``;
+    ``GATE_ROSTER_VERSION_CACHE_SECONDS`` bounds how long writes made by
+    another process can go unnoticed with a per-process cache.
+    """
+    if hostel_ids is None:
+        return _cached_version(None)
+    versions = [_cached_version(hostel_id) for hostel_id in sorted(hostel_ids)]
+    changed = max((v[0] for v in versions if v[0] is not None), default=None)
+    return changed, sum(v[1] for v in versions)
+
+
+def _cached_version(hostel_id):
+    key = _version_key(hostel_id)
+    version = cache.get(key)
+    if version is None:
+        with primary():
+            version = roster_version(None if hostel_id is None else {hostel_id})
+        cache.set(key, version, getattr(settings, "GATE_ROSTER_VERSION_CACHE_SECONDS", 10))
+    return version
+
+
+def roster_changed(hostel_ids=None):
+    """
+    Drop the cached roster versions of ``hostel_ids`` (every hostel with
+    None) and the campus once the current transaction commits.
+    """
+    if hostel_ids is None:
+        hostel_ids = [pk for pk, _ in hostels.all_hostels().values()]
+    keys = [_version_key(None)] + [_version_key(hostel_id) for hostel_id in hostel_ids if hostel_id]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _version_key(hostel_id):
+    return VERSION_CACHE_KEY if hostel_id is None else f"{VERSION_CACHE_KEY}:{hostel_id}"
+
+
+def version_etag(version, hostel_ids=None):
+    """
+    Strong ETag for a ``(last_change, student_count)`` version of
+    ``hostel_ids``' roster; the scope is part of it, so callers with
+    different hostels never share a validator.
+    """
+    changed, count = version
+    scope = "all" if hostel_ids is None else "h" + ".".join(map(str, sorted(hostel_ids)))
+    return f"{changed.timestamp() if changed else 0}-{count}-{scope}"
+
+
+def snapshot(version=None, hostel_ids=None):
+    """The whole roster (or ``hostel_ids``' part), with a watermark to request deltas from next."""
+    changed, count = version or roster_version(hostel_ids)
+    rows = Student.objects.order_by("enrollment_key")
+    if hostel_ids is not None:
+        rows = rows.filter(hostel_id__in=sorted(hostel_ids))
+    rows = rows.values_list(*VALUES)
+    return {
+        "full": True,
+        "watermark": changed.isoformat() if changed else None,
+        "fields": FIELDS,
+        "students": [list(row) for row in rows.iterator(chunk_size=2000)],
+        "deleted": [],
+    }
+
+
+def delta(since, hostel_ids=None):
+    """
+    Students changed and enrollment keys deleted at or after ``since``, or
+    None when that is more than ``GATE_SYNC_MAX_DELTA`` rows (send a
+    snapshot instead). With ``hostel_ids``, only those hostels' students,
+    and the keys that were deleted from or moved out of them.
+
+    The window starts ``GATE_SYNC_OVERLAP_SECONDS`` before ``since`` so a
+    row committed slightly out of timestamp order is not missed; clients
+    apply rows as upserts, so repeats are harmless.
+    """
+    start = since - timedelta(seconds=getattr(settings, "GATE_SYNC_OVERLAP_SECONDS", 2))
+    limit = getattr(settings, "GATE_SYNC_MAX_DELTA", 5000)
+
+    students = Student.objects.filter(updated_at__gte=start)
+    tombstones = StudentTombstone.objects.filter(deleted_at__gte=start)
+    if hostel_ids is not None:
+        students = students.filter(hostel_id__in=sorted(hostel_ids))
+        tombstones = tombstones.filter(hostel_id__in=sorted(hostel_ids))
+    else:
+        # Students who only moved between hostels are still on the campus roster.
+        tombstones = tombstones.exclude(enrollment_key__in=Student.objects.values("enrollment_key"))
+    changed = list(
+        students.order_by("updated_at").values_list("updated_at", *VALUES)[: limit + 1]
+    )
+    deleted = list(
+        tombstones.order_by("deleted_at").values_list("deleted_at", "enrollment_key")[: limit + 1]
+    )
+    if len(changed) + len(deleted) > limit:
+        return None
+
+    stamps = [row[0] for row in changed] + [row[0] for row in deleted]
+    watermark = max(stamps + [since])
+    return {
+        "full": False,
+        "watermark": watermark.isoformat(),
+        "fields": FIELDS,
+        "students": [list(row[1:]) for row in changed],
+        "deleted": [key for _, key in deleted],
+    }
+
+
+def parse_watermark(value):
+    try:
+        parsed = parse_datetime(value or "")
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
@@ -0,0 +1,21 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Hostel, Student
+
+
+def make_student(enrollment, hostel, **fields):
+    fields.setdefault("full_name", f"Student {enrollment}")
+    return Student.objects.create(enrollment_number=enrollment, hostel=hostel, **fields)
+
+
+def main_hostel():
+    return Hostel.objects.get_or_create(code="main", defaults={"name": "Main hostel"})[0]
+
+
+class GateTestCase(TestCase):
+    """Starts every test with empty caches (the locmem cache outlives test transactions)."""
+
+    def setUp(self):
+        cache.clear()
+        self.hostel = main_hostel()
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from ..admin import DateRangeQuerySet
+from ..models import MovementLog, Student
+from ..pagination import EstimatedCountPaginator
+from .base import GateTestCase, make_student
+
+
+class AdminChangelistTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.asha = make_student("AD100", self.hostel, full_name="Asha Verma", room_number="B-12")
+        self.ravi = make_student("AD200", self.hostel, full_name="Ravi Nair")
+        now = timezone.now()
+        for i, student in enumerate([self.asha, self.ravi, self.asha]):
+            MovementLog.objects.create(
+                student=student, hostel=self.hostel, direction=MovementLog.OUT, timestamp=now - timedelta(days=i)
+            )
+        self.client.force_login(User.objects.create_superuser("root", password="x"))
+
+    def changelist(self, model, **params):
+        response = self.client.get(reverse(f"admin:gate_{model}_changelist"), params)
+        self.assertEqual(response.status_code, 200)
+        return list(response.context["cl"].result_list)
+
+    def test_log_search_goes_through_the_student_index(self):
+        logs = self.changelist("movementlog", q="asha")
+
+        self.assertEqual({log.student_id for log in logs}, {self.asha.pk})
+        self.assertEqual(len(logs), 2)
+
+    def test_student_search_matches_names_rooms_and_numbers(self):
+        self.assertEqual(self.changelist("student", q="ravi"), [self.ravi])
+        self.assertEqual(self.changelist("student", q="b-12"), [self.asha])
+        self.assertEqual(self.changelist("student", q="AD100"), [self.asha])
+
+    def test_date_hierarchy_lists_days_between_the_bounds(self):
+        qs = DateRangeQuerySet(model=MovementLog)
+
+        days = qs.datetimes("timestamp", "day")
+
+        self.assertEqual(len(days), 3)
+        self.assertEqual(days, sorted(days))
+        self.assertEqual(DateRangeQuerySet(model=MovementLog).none().datetimes("timestamp", "day"), [])
+
+
+class EstimatedCountPaginatorTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(7):
+            make_student(f"P{i}", self.hostel, is_inside=i % 2 == 0)
+
+    def test_filtered_count_stops_at_the_cap(self):
+        paginator = EstimatedCountPaginator(Student.objects.order_by("pk"), 2)
+        paginator.count_cap = 3
+
+        self.assertEqual(paginator.count, 7)
+        capped = EstimatedCountPaginator(Student.objects.filter(is_inside=True).order_by("pk"), 2)
+        capped.count_cap = 3
+        self.assertEqual(capped.count, 3)
+
+    def test_pages_load_the_right_rows(self):
+        students = list(Student.objects.order_by("pk"))
+        paginator = EstimatedCountPaginator(Student.objects.order_by("pk"), 3)
+
+        self.assertEqual(list(paginator.page(2)), students[3:6])
+        self.assertEqual(list(paginator.page(3)), students[6:])
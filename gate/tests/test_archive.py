@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from ..archive import archive_before
+from ..models import MovementLog, MovementLogArchive
+from .base import GateTestCase, make_student
+
+
+@override_settings(GATE_ROLLUP_LAG_SECONDS=0)
+class ArchiveTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        student = make_student("R100", self.hostel)
+        now = timezone.now()
+        self.old = MovementLog.objects.create(
+            student=student, hostel=self.hostel, direction=MovementLog.OUT, timestamp=now - timedelta(days=400),
+            photo="movements/display/ab.jpg", photo_thumb="movements/thumbs/ab.jpg", photo_sha256="ab" * 32,
+        )
+        self.recent = MovementLog.objects.create(
+            student=student, hostel=self.hostel, direction=MovementLog.IN, timestamp=now - timedelta(days=1)
+        )
+
+    def test_moves_old_logs_with_their_photo_renditions(self):
+        moved = archive_before(timezone.now() - timedelta(days=365))
+
+        self.assertEqual(moved, 1)
+        self.assertEqual(list(MovementLog.objects.values_list("pk", flat=True)), [self.recent.pk])
+        archived = MovementLogArchive.objects.get(pk=self.old.pk)
+        self.assertEqual(archived.photo, "movements/display/ab.jpg")
+        self.assertEqual(archived.photo_thumb, "movements/thumbs/ab.jpg")
+        self.assertEqual(archived.photo_sha256, "ab" * 32)
+
+    def test_rerun_moves_nothing(self):
+        archive_before(timezone.now() - timedelta(days=365))
+
+        self.assertEqual(archive_before(timezone.now() - timedelta(days=365)), 0)
+        self.assertEqual(MovementLogArchive.objects.count(), 1)
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import Permission, User
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import MovementLog, Student
+from ..services import apply_scan_batch, toggle_student
+from .base import GateTestCase, make_student
+
+
+class ScanBatchTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student("D400", self.hostel, is_inside=True)
+        self.now = timezone.now()
+
+    def scan(self, direction, minutes_ago=0, key=None, enrollment="D400"):
+        return {
+            "enrollment": enrollment,
+            "direction": direction,
+            "timestamp": self.now - timedelta(minutes=minutes_ago),
+            "note": "",
+            "key": key,
+        }
+
+    def test_scans_apply_in_order_with_device_timestamps(self):
+        results = apply_scan_batch([self.scan("OUT", 10), self.scan("IN", 5), self.scan("TOGGLE", 1)])
+
+        self.assertEqual([r["direction"] for r in results], ["OUT", "IN", "OUT"])
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.is_inside)
+        self.assertEqual(self.student.last_movement_at, self.now - timedelta(minutes=1))
+        self.assertEqual(MovementLog.objects.count(), 3)
+
+    def test_replayed_batch_writes_nothing(self):
+        batch = [self.scan("OUT", 10, key="k1"), self.scan("IN", 5, key="k2")]
+        apply_scan_batch(batch)
+
+        results = apply_scan_batch(batch)
+
+        self.assertTrue(all(r["replayed"] for r in results))
+        self.assertEqual([r["direction"] for r in results], ["OUT", "IN"])
+        self.assertEqual(MovementLog.objects.count(), 2)
+
+    def test_older_scan_is_logged_without_changing_status(self):
+        toggle_student("D400")  # OUT, now
+
+        results = apply_scan_batch([self.scan("IN", 30)])
+
+        self.assertTrue(results[0]["stale"])
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.is_inside)
+        self.assertEqual(MovementLog.objects.filter(direction=MovementLog.IN).count(), 1)
+
+    def test_key_of_another_student_is_rejected(self):
+        make_student("E500", self.hostel)
+        apply_scan_batch([self.scan("OUT", key="k1")])
+
+        results = apply_scan_batch([self.scan("OUT", key="k1", enrollment="E500")])
+
+        self.assertEqual(results[0]["error"], "idempotency_key_conflict")
+        self.assertTrue(Student.objects.get(enrollment_number="E500").is_inside)
+
+    def test_unknown_enrollment_is_reported(self):
+        results = apply_scan_batch([self.scan("OUT", enrollment="NOPE")])
+
+        self.assertEqual(results, [{"ok": False, "enrollment": "NOPE", "error": "not_found"}])
+
+    def test_future_timestamp_is_clamped_to_now(self):
+        results = apply_scan_batch([self.scan("OUT", minutes_ago=-120)])
+
+        self.assertFalse(results[0]["stale"])
+        self.student.refresh_from_db()
+        self.assertLessEqual(self.student.last_movement_at, timezone.now())
+        # A correct scan right after is not taken for a stale one.
+        later = {**self.scan("IN"), "timestamp": timezone.now()}
+        self.assertFalse(apply_scan_batch([later])[0]["stale"])
+
+
+class ScanBatchApiTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        make_student("D400", self.hostel, is_inside=True)
+        user = User.objects.create_user("scanner", password="x")
+        user.user_permissions.add(Permission.objects.get(codename="can_toggle_status"))
+        self.client.force_login(user)
+
+    def post(self, scans):
+        return self.client.post(reverse("api_toggle_batch"), {"scans": scans}, content_type="application/json")
+
+    def test_impossible_timestamp_fails_only_its_scan(self):
+        response = self.post([
+            {"enrollment": "D400", "direction": "OUT", "timestamp": "2026-02-30T10:00"},
+            {"enrollment": "D400", "direction": "OUT", "timestamp": "2026-01-01T10:00:00+00:00"},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(results[0]["error"], "invalid_timestamp")
+        self.assertTrue(results[1]["ok"])
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.test import override_settings
+
+from .. import bench, occupancy
+from ..models import Hostel, MovementLog
+from .base import GateTestCase, make_student
+
+
+def report(p95, queries, throughput):
+    return {"scenarios": {"check": {
+        "latency_ms": {"p95": p95}, "queries_per_request": queries, "throughput": throughput,
+    }}}
+
+
+class BenchSafetyTests(GateTestCase):
+    def test_refuses_to_run_without_debug(self):
+        with self.assertRaises(bench.UnsafeDatabase):
+            with bench.bench_database("/tmp/bench.sqlite3"):
+                pass
+
+    @override_settings(DEBUG=True)
+    def test_refuses_a_configured_database(self):
+        with self.assertRaises(bench.UnsafeDatabase):
+            with bench.bench_database(settings.DATABASES["default"]["NAME"]):
+                pass
+
+    def test_check_empty_refuses_real_students(self):
+        bench.check_empty("BENCH")
+        make_student("A100", self.hostel)
+
+        with self.assertRaises(bench.UnsafeDatabase):
+            bench.check_empty("BENCH")
+
+
+class BenchDataTests(GateTestCase):
+    def test_seed_tops_up_and_flush_removes_synthetic_rows(self):
+        bench.seed(students=6, logs=10, hostels=2)
+        bench.seed(students=8, logs=10, hostels=2)
+
+        self.assertEqual(bench.bench_students("BENCH").count(), 8)
+        self.assertEqual(MovementLog.objects.count(), 10)
+        self.assertEqual(sum(occupancy.get_counts().values()), 8)
+        bench.flush()
+        self.assertFalse(bench.bench_students("BENCH").exists())
+        self.assertFalse(Hostel.objects.filter(code__startswith="bench-").exists())
+
+    def test_compare_flags_regressions_beyond_the_threshold(self):
+        previous = report(p95=10, queries=4, throughput=100)
+
+        self.assertEqual(bench.compare(previous, report(p95=11, queries=4, throughput=90)), [])
+        self.assertEqual(
+            bench.compare(previous, report(p95=15, queries=6, throughput=70)),
+            [("check", "p95_ms", 10, 15), ("check", "queries_per_request", 4, 6), ("check", "throughput", 100, 70)],
+        )
+
+    def test_percentile_is_nearest_rank(self):
+        ordered = [1.0, 2.0, 3.0, 4.0]
+
+        self.assertEqual(bench.percentile(ordered, 50), 2.0)
+        self.assertEqual(bench.percentile(ordered, 95), 4.0)
+        self.assertIsNone(bench.percentile([], 95))
@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import override_settings
+
+from .. import cards
+from ..models import Student
+from .base import GateTestCase, make_student
+
+
+class CardCacheTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        cards.card_cache.clear()
+        self.addCleanup(cards.card_cache.clear)
+        self.student = make_student("C100", self.hostel, is_inside=True)
+
+    def toggle(self):
+        self.student.is_inside = not self.student.is_inside
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+
+    def test_write_drops_the_cached_card(self):
+        self.assertTrue(cards.get_card("c100")["is_inside"])
+        with self.assertNumQueries(0):
+            cards.get_card(" C100 ")
+
+        self.toggle()
+
+        self.assertFalse(cards.get_card("C100")["is_inside"])
+
+    def test_unknown_enrollments_are_cached_too(self):
+        self.assertIsNone(cards.get_card("NOPE"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(cards.get_card("nope"))
+
+    def test_card_outside_the_hostel_scope_is_hidden(self):
+        self.assertIsNone(cards.get_card("C100", {self.hostel.pk + 1}))
+
+    @override_settings(GATE_SHARED_CACHE=False)
+    def test_unshared_default_cache_is_not_used(self):
+        cards.get_card("C100")
+
+        self.assertIsNone(cache.get(cards.CACHE_PREFIX + "c100"))
+
+    @override_settings(GATE_SHARED_CACHE=True)
+    def test_shared_tier_serves_other_processes_until_a_write(self):
+        cards.get_card("C100")
+        cards.card_cache.clear()  # as if another process looked it up
+        with self.assertNumQueries(0):
+            self.assertTrue(cards.get_card("C100")["is_inside"])
+
+        self.toggle()
+        cards.card_cache.clear()
+
+        self.assertFalse(cards.get_card("C100")["is_inside"])
+        self.assertFalse(Student.objects.get(pk=self.student.pk).is_inside)
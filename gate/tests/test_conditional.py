@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from ..models import Hostel
+from ..services import toggle_student
+from .base import GateTestCase, make_student
+
+
+class ConditionalLookupTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        make_student("C100", self.hostel, is_inside=True)
+
+    def check(self, **headers):
+        return self.client.get(reverse("api_check"), {"enrollment_number": "C100"}, headers=headers)
+
+    def test_unchanged_roster_answers_304(self):
+        first = self.check()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.check(if_none_match=first["ETag"]).status_code, 304)
+        self.assertEqual(self.check(if_modified_since=first["Last-Modified"]).status_code, 304)
+
+    def test_toggle_changes_the_etag(self):
+        first = self.check()
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_student("C100")
+
+        again = self.check(if_none_match=first["ETag"])
+
+        self.assertEqual(again.status_code, 200)
+        self.assertFalse(again.json()["is_inside"])
+        self.assertNotEqual(again["ETag"], first["ETag"])
+
+    def test_responses_are_private_and_vary_on_credentials(self):
+        response = self.check()
+
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+        self.assertIn("Authorization", response["Vary"])
+
+    def test_etag_is_scoped_to_the_users_hostels(self):
+        annex = Hostel.objects.create(code="annex", name="Annex")
+        warden = User.objects.create_user("warden", password="x")
+        annex.staff.add(warden)
+        campus = self.check()
+        self.client.force_login(warden)
+
+        scoped = self.check(if_none_match=campus["ETag"])
+
+        self.assertEqual(scoped.status_code, 404)
+        self.assertNotEqual(scoped["ETag"], campus["ETag"])
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import Permission, User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import curfew
+from ..models import MovementLog, Student
+from ..services import toggle_student
+from .base import GateTestCase, make_student
+
+
+def local(hour, minute=0, day=10):
+    return timezone.make_aware(datetime(2026, 3, day, hour, minute))
+
+
+@override_settings(GATE_CURFEW_START="22:00", GATE_CURFEW_END="06:00")
+class CurfewCutoffTests(GateTestCase):
+    def test_during_the_window_everyone_out_counts(self):
+        self.assertEqual(curfew.curfew_cutoff(local(23, 30)), local(23, 30))
+        self.assertEqual(curfew.curfew_cutoff(local(3)), local(3))
+
+    def test_outside_the_window_the_last_curfew_start(self):
+        self.assertEqual(curfew.curfew_cutoff(local(14)), local(22, day=9))
+        self.assertEqual(curfew.curfew_cutoff(local(6)), local(22, day=9))
+
+    @override_settings(GATE_CURFEW_START="01:00", GATE_CURFEW_END="05:00")
+    def test_window_within_one_day(self):
+        self.assertEqual(curfew.curfew_cutoff(local(2)), local(2))
+        self.assertEqual(curfew.curfew_cutoff(local(0, 30)), local(1, day=9))
+
+
+class OutSinceTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        for enrollment in ("K100", "K200", "K300"):
+            make_student(enrollment, self.hostel, is_inside=True)
+        toggle_student("K100")
+        toggle_student("K200")
+        self.now = timezone.now()
+        # K100 left first; a warden marked K300 outside without a scan.
+        Student.objects.filter(enrollment_number="K100").update(last_movement_at=self.now - timedelta(hours=50))
+        Student.objects.filter(enrollment_number="K300").update(is_inside=False)
+
+    def test_longest_out_first_and_manual_changes_ignored(self):
+        students = curfew.out_since(self.now + timedelta(seconds=1))
+
+        self.assertEqual([s.enrollment_number for s in students], ["K100", "K200"])
+        self.assertEqual(list(curfew.out_since(curfew.absence_cutoff(48, now=self.now))), [
+            Student.objects.get(enrollment_number="K100"),
+        ])
+
+    def test_returning_clears_the_student(self):
+        toggle_student("K100")
+
+        self.assertEqual(Student.objects.get(enrollment_number="K100").last_direction, MovementLog.IN)
+        self.assertNotIn("K100", [s.enrollment_number for s in curfew.out_since(timezone.now())])
+
+    def test_absence_report_page(self):
+        user = User.objects.create_user("warden", password="x")
+        user.user_permissions.add(Permission.objects.get(codename="view_student"))
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("curfew"), {"absent": "1", "hours": "48"})
+
+        self.assertContains(response, "Out for more than 48 hours")
+        self.assertEqual([s.enrollment_number for s in response.context["students"]], ["K100"])
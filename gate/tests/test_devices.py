@@ -0,0 +1,87 @@
+from django.contrib import admin
+from django.contrib.auth.models import Permission, User
+from django.test import RequestFactory
+from django.urls import reverse
+
+from .. import devices
+from ..models import DeviceKey, Gate, Hostel
+from .base import GateTestCase, make_student
+
+
+def scanner(username):
+    user = User.objects.create_user(username, password="x")
+    user.user_permissions.add(Permission.objects.get(codename="can_toggle_status"))
+    return user
+
+
+def issue(user, gate=None, name="scanner"):
+    key = DeviceKey(name=name, user=user, gate=gate)
+    raw_key = key.set_new_key()
+    key.save()
+    return key, raw_key
+
+
+class DeviceKeyAuthTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        devices.auth_cache.clear()
+        self.addCleanup(devices.auth_cache.clear)
+        make_student("K100", self.hostel)
+        self.key, self.raw_key = issue(scanner("scanner"))
+
+    def check(self, raw_key):
+        return self.client.get(
+            reverse("api_check"), {"enrollment_number": "K100"}, headers={"authorization": f"Device {raw_key}"}
+        )
+
+    def test_valid_key_authenticates_once_then_from_cache(self):
+        self.assertEqual(self.check(self.raw_key).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(devices.authenticate(self.raw_key))
+
+    def test_bad_key_gets_401(self):
+        response = self.check(self.key.prefix + ".wrong")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["error"], "invalid_device_key")
+
+    def test_revoked_key_stops_working_at_once(self):
+        self.check(self.raw_key)
+        self.key.is_active = False
+        self.key.save()
+
+        self.assertEqual(self.check(self.raw_key).status_code, 401)
+
+
+class DeviceKeyAdminTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.annex = Hostel.objects.create(code="annex", name="Annex")
+        self.main_gate = Gate.objects.create(name="Main gate", hostel=self.hostel)
+        self.annex_gate = Gate.objects.create(name="Annex gate", hostel=self.annex)
+        self.guard = scanner("guard")
+        User.objects.create_user("visitor", password="x")
+        User.objects.create_superuser("root", password="x")
+        self.warden = User.objects.create_user("warden", password="x", is_staff=True)
+        self.annex.staff.add(self.warden)
+        self.model_admin = admin.site._registry[DeviceKey]
+
+    def request(self, user):
+        request = RequestFactory().get("/admin/gate/devicekey/add/")
+        request.user = user
+        return request
+
+    def test_user_choices_are_scanner_accounts_only(self):
+        form = self.model_admin.get_form(self.request(self.warden))
+
+        self.assertEqual(list(form.base_fields["user"].queryset), [self.guard])
+
+    def test_hostel_staff_see_and_bind_only_their_gates(self):
+        issue(self.guard, self.main_gate, name="main")
+        annex_key, _ = issue(self.guard, self.annex_gate, name="annex")
+        request = self.request(self.warden)
+
+        self.assertEqual(list(self.model_admin.get_queryset(request)), [annex_key])
+        gate_field = self.model_admin.get_form(request).base_fields["gate"]
+        self.assertEqual(list(gate_field.queryset), [self.annex_gate])
+        self.assertTrue(gate_field.required)
@@ -0,0 +1,30 @@
+from django.core.exceptions import ValidationError
+
+from ..models import Student, normalize_enrollment
+from .base import GateTestCase, make_student
+
+
+class EnrollmentKeyTests(GateTestCase):
+    def test_key_is_kept_normalized_on_save(self):
+        student = make_student(" AB12 ", self.hostel)
+        self.assertEqual(student.enrollment_key, "ab12")
+
+        student.enrollment_number = "Cd34"
+        student.save(update_fields=["enrollment_number"])
+
+        student.refresh_from_db()
+        self.assertEqual(student.enrollment_key, "cd34")
+
+    def test_lookup_ignores_case_and_surrounding_spaces(self):
+        student = make_student("AB12", self.hostel)
+
+        self.assertEqual(Student.objects.by_enrollment("  ab12 ").get(), student)
+        self.assertEqual(normalize_enrollment(None), "")
+
+    def test_number_differing_only_in_case_is_rejected(self):
+        make_student("AB12", self.hostel)
+
+        clash = Student(enrollment_number="ab12", full_name="Other", hostel=self.hostel)
+        with self.assertRaises(ValidationError) as caught:
+            clash.full_clean()
+        self.assertIn("enrollment_number", caught.exception.message_dict)
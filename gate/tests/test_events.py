@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.urls import reverse
+
+from .. import events, occupancy
+from .base import GateTestCase, make_student
+
+
+class RecordingBroker:
+    def __init__(self, subscribers):
+        self.subscriber_count = subscribers
+        self.published = []
+
+    def publish(self, event):
+        self.published.append(event)
+
+
+class CountsEventTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student("S100", self.hostel, is_inside=True)
+
+    def toggle(self):
+        self.student.is_inside = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+
+    def test_counts_are_published_to_listeners(self):
+        broker = RecordingBroker(subscribers=1)
+        with mock.patch.object(events, "_broker", broker):
+            self.toggle()
+
+        self.assertEqual(broker.published, [
+            {"type": "counts", "data": {"inside": 0, "outside": 1}},
+            {"type": "counts", "data": {"inside": 0, "outside": 1, "hostel": self.hostel.pk}},
+        ])
+
+    def test_nothing_is_counted_or_published_without_listeners(self):
+        broker = RecordingBroker(subscribers=0)
+        with mock.patch.object(events, "_broker", broker), mock.patch.object(occupancy, "get_counts") as get_counts:
+            self.toggle()
+
+        get_counts.assert_not_called()
+        self.assertEqual(broker.published, [])
+        self.assertEqual(occupancy.get_counts(), {"inside": 0, "outside": 1})
+
+
+class EventStreamFallbackTests(GateTestCase):
+    def test_wsgi_stream_answers_204_so_clients_poll(self):
+        response = self.client.get(reverse("events"))
+
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+    def test_counts_endpoint_for_polling(self):
+        make_student("S100", self.hostel, is_inside=True)
+
+        response = self.client.get(reverse("api_counts"))
+
+        self.assertEqual(response.json(), {"inside": 1, "outside": 0})
+        self.assertIn("max-age=5", response["Cache-Control"])
@@ -0,0 +1,55 @@
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import Permission, User
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Hostel, MovementLog
+from .base import GateTestCase, make_student
+
+
+class ExportLogsTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        annex = Hostel.objects.create(code="annex", name="Annex")
+        now = timezone.now()
+        student = make_student("E100", self.hostel, full_name="Asha Rao", room_number="12")
+        MovementLog.objects.create(student=student, hostel=self.hostel, direction=MovementLog.OUT, timestamp=now)
+        MovementLog.objects.create(
+            student=student, hostel=self.hostel, direction=MovementLog.IN, timestamp=now - timedelta(hours=1)
+        )
+        other = make_student("E200", annex)
+        MovementLog.objects.create(student=other, hostel=annex, direction=MovementLog.IN, timestamp=now)
+        self.warden = User.objects.create_user("warden", password="x")
+        self.warden.user_permissions.add(Permission.objects.get(codename="view_movementlog"))
+        self.hostel.staff.add(self.warden)
+        self.client.force_login(self.warden)
+
+    def export(self, **params):
+        response = self.client.get(reverse("export_logs"), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_streams_the_users_hostel_oldest_first(self):
+        response, body = self.export()
+
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertTrue(response["Content-Disposition"].startswith('attachment; filename="movements-'))
+        self.assertEqual(rows[0][:5], ["timestamp", "enrollment", "name", "room", "direction"])
+        self.assertEqual([(r[1], r[4]) for r in rows[1:]], [("E100", "IN"), ("E100", "OUT")])
+        self.assertEqual(rows[1][2:4], ["Asha Rao", "12"])
+
+    def test_ndjson_gzipped(self):
+        response, body = self.export(format="ndjson", gzip="1")
+
+        lines = gzip.decompress(body).decode().splitlines()
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual([json.loads(line)["direction"] for line in lines], ["IN", "OUT"])
+        self.assertEqual(json.loads(lines[0])["hostel"], "main")
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get(reverse("export_logs"), {"format": "xml"}).status_code, 400)
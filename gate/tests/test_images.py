@@ -0,0 +1,72 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image
+
+from ..images import process_log_photo
+from ..models import MovementLog
+from .base import GateTestCase, make_student
+
+
+def jpeg(size=(2000, 1500), color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class ProcessLogPhotoTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.student = make_student("P100", self.hostel)
+
+    def log_with_photo(self, data):
+        log = MovementLog(student=self.student, hostel=self.hostel, direction=MovementLog.OUT)
+        log.photo.save("upload.jpg", ContentFile(data), save=False)
+        log.save()
+        return log
+
+    def test_photo_is_replaced_by_bounded_renditions(self):
+        log = self.log_with_photo(jpeg())
+        original = log.photo.name
+
+        self.assertTrue(process_log_photo(log.pk))
+
+        log.refresh_from_db()
+        self.assertTrue(log.photo.name.startswith(f"photos/{log.photo_sha256[:2]}/"))
+        self.assertFalse(default_storage.exists(original))
+        with log.photo.open("rb") as f:
+            self.assertLessEqual(max(Image.open(f).size), 1024)
+        with log.photo_thumb.open("rb") as f:
+            thumb = Image.open(f)
+            self.assertEqual(thumb.format, "WEBP")
+            self.assertLessEqual(max(thumb.size), 160)
+        self.assertFalse(process_log_photo(log.pk))
+
+    def test_identical_photos_share_renditions(self):
+        first = self.log_with_photo(jpeg())
+        second = self.log_with_photo(jpeg())
+
+        process_log_photo(first.pk)
+        process_log_photo(second.pk)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.photo.name, second.photo.name)
+        self.assertEqual(first.photo_thumb.name, second.photo_thumb.name)
+
+    def test_unreadable_upload_is_left_alone(self):
+        log = self.log_with_photo(b"not an image")
+
+        with self.assertLogs("gate.images", "WARNING"):
+            self.assertFalse(process_log_photo(log.pk))
+        log.refresh_from_db()
+        self.assertEqual(log.photo_sha256, "")
@@ -0,0 +1,54 @@
+import io
+
+from .. import occupancy
+from ..importer import import_students
+from ..models import Student
+from .base import GateTestCase, make_student
+
+
+class ImportStudentsTests(GateTestCase):
+    def run_import(self, text, **kwargs):
+        return import_students(io.BytesIO(text.encode()), **kwargs)
+
+    def test_dry_run_reports_changes_without_writing(self):
+        make_student("F600", self.hostel, full_name="Old Name")
+
+        report = self.run_import(
+            "enrollment_number,full_name,room_number\nF600,New Name,A-1\nF601,Someone,B-2\n", dry_run=True
+        )
+
+        self.assertEqual((report.created, report.updated, report.error_count), (1, 1, 0))
+        self.assertEqual(Student.objects.get(enrollment_number="F600").full_name, "Old Name")
+        self.assertFalse(Student.objects.filter(enrollment_number="F601").exists())
+
+    def test_bad_rows_are_reported_by_line_and_the_rest_imported(self):
+        long_name = "x" * 200
+        report = self.run_import(
+            "enrollment_number,full_name,hostel\n"
+            "G700,Fine,\n"
+            ",No Enrollment,\n"
+            f"G701,{long_name},\n"
+            "G702,Elsewhere,nowhere\n"
+        )
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual([line for line, _ in report.errors], [3, 4, 5])
+        self.assertIn("required", report.errors[0][1])
+        self.assertIn("full_name is longer", report.errors[1][1])
+        self.assertIn("Unknown hostel", report.errors[2][1])
+        self.assertTrue(Student.objects.filter(enrollment_number="G700").exists())
+
+    def test_missing_column_stops_the_import(self):
+        report = self.run_import("enrollment_number\nH800\n")
+
+        self.assertEqual(report.errors, [(1, "Missing column(s): full_name")])
+        self.assertFalse(Student.objects.exists())
+
+    def test_import_updates_existing_students_and_counters(self):
+        make_student("F600", self.hostel, full_name="Old Name", is_inside=True)
+
+        report = self.run_import("enrollment_number,full_name\nf600,New Name\nF602,Added\n")
+
+        self.assertEqual((report.created, report.updated), (1, 1))
+        self.assertEqual(Student.objects.by_enrollment("F600").get().full_name, "New Name")
+        self.assertEqual(occupancy.get_counts()["inside"], 2)
@@ -0,0 +1,182 @@
+import fcntl
+import json
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from .. import journal
+from ..models import MovementLog
+from ..services import apply_scan_batch, toggle_student
+from .base import main_hostel, make_student
+
+
+class JournalTests(TransactionTestCase):
+    """Real commits: on_commit queuing, and SQLite only checks foreign keys at commit."""
+
+    def setUp(self):
+        cache.clear()
+        self.hostel = main_hostel()
+        self.directory = Path(tempfile.mkdtemp())
+        overrides = override_settings(
+            GATE_LOG_JOURNAL=True, GATE_LOG_JOURNAL_DIR=self.directory, GATE_LOG_JOURNAL_FSYNC=False
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # A journal that is not started: no flusher thread, the tests flush it.
+        self.journal = journal.LogJournal()
+        self.journal._owner = "test-1"
+        self.journal._open_segment()
+        self.journal._thread = threading.current_thread()
+        self.addCleanup(self.journal._file.close)
+        patcher = mock.patch.object(journal, "journal", self.journal)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.student = make_student("K100", self.hostel, is_inside=True)
+
+    def lines(self):
+        return [json.loads(line) for line in Path(self.journal._file.name).read_text().splitlines()]
+
+    def drop_markers(self):
+        """Rewrite the segment as a machine crash could leave it: lines without their markers."""
+        path = Path(self.journal._file.name)
+        kept = [line for line in path.read_text().splitlines() if journal.COMMITTED not in line]
+        path.write_text("".join(line + "\n" for line in kept))
+
+    def test_toggle_is_journaled_then_flushed(self):
+        result = toggle_student("K100")
+
+        self.assertIsNone(result.log.pk)
+        self.assertFalse(MovementLog.objects.exists())
+        self.assertEqual(self.journal.depth(), 1)
+        self.assertEqual(self.journal.flush(), 1)
+        log = MovementLog.objects.get()
+        self.assertEqual((log.student_id, log.direction, log.client_key), (self.student.pk, "OUT", result.log.client_key))
+        self.assertEqual(list(self.directory.glob("test-1-000001.ndjson")), [])
+
+    def test_commit_appends_a_marker(self):
+        result = toggle_student("K100")
+
+        record, marker = self.lines()
+        self.assertEqual(record["client_key"], result.log.client_key)
+        self.assertEqual(marker, {journal.COMMITTED: result.log.client_key})
+
+    def test_retry_before_flush_is_replayed(self):
+        toggle_student("K100", idempotency_key="scan-1")
+        again = toggle_student("K100", idempotency_key="scan-1")
+
+        self.assertTrue(again.replayed)
+        self.assertEqual(self.journal.flush(), 1)
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.is_inside)
+
+    def test_batch_replay_sees_journaled_keys(self):
+        toggle_student("K100", idempotency_key="scan-1")
+
+        results = apply_scan_batch([{"enrollment": "K100", "direction": "OUT", "key": "scan-1"}])
+
+        self.assertTrue(results[0]["replayed"])
+
+    def test_refused_row_is_dead_lettered_and_the_rest_flushed(self):
+        doomed = make_student("K200", self.hostel)
+        doomed_id = doomed.pk
+        toggle_student("K200")
+        toggle_student("K100")
+        doomed.delete()
+
+        self.assertEqual(self.journal.flush(), 1)
+        self.assertEqual(MovementLog.objects.get().student_id, self.student.pk)
+        self.assertEqual([r["student_id"] for r in journal.read_dead_letters(self.directory)], [doomed_id])
+        self.assertEqual(self.journal.dead_lettered, 1)
+        self.assertEqual(self.journal.depth(), 0)
+
+    def test_rolled_back_toggle_is_never_queued_or_marked(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            toggle_student("K100")
+            raise RuntimeError
+
+        self.assertEqual(self.journal.depth(), 0)
+        self.assertEqual(len(self.lines()), 1)
+        self.student.refresh_from_db()
+        self.assertTrue(self.student.is_inside)
+
+    def test_late_commit_is_journaled_again(self):
+        with transaction.atomic():
+            result = toggle_student("K100")
+            # The flusher gave up on the line and deleted its segment.
+            self.journal._inflight.clear()
+            Path(self.journal._file.name).write_text("")
+
+        record, marker = self.lines()
+        self.assertEqual(record["client_key"], result.log.client_key)
+        self.assertEqual(marker, {journal.COMMITTED: result.log.client_key})
+
+    def test_replay_inserts_a_dead_owners_segments(self):
+        toggle_student("K100")
+        segment = Path(self.journal._file.name)
+        self.journal._owner = "test-2"  # replay skips its own owner's files
+
+        rows, files = journal.replay(self.directory)
+
+        self.assertEqual((rows, files), (1, 1))
+        self.assertEqual(MovementLog.objects.count(), 1)
+        self.assertFalse(segment.exists())
+
+    def test_replay_finds_markers_in_later_segments(self):
+        with transaction.atomic():
+            toggle_student("K100")
+            self.journal._seal_segment()
+        self.journal._owner = "test-2"
+
+        self.assertEqual(journal.replay(self.directory), (1, 2))
+        self.assertEqual(MovementLog.objects.count(), 1)
+
+    def test_replay_skips_lines_whose_toggle_rolled_back(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            toggle_student("K100")
+            raise RuntimeError
+        self.journal._owner = "test-2"
+
+        rows, files = journal.replay(self.directory)
+
+        self.assertEqual((rows, files), (0, 1))
+        self.assertFalse(MovementLog.objects.exists())
+        self.assertEqual(journal.read_dead_letters(self.directory), [])
+
+    def test_unmarked_line_matching_the_student_is_replayed(self):
+        toggle_student("K100")
+        self.drop_markers()
+        self.journal._owner = "test-2"
+
+        self.assertEqual(journal.replay(self.directory), (1, 1))
+        self.assertEqual(MovementLog.objects.get().direction, "OUT")
+
+    def test_unmarked_line_of_a_student_who_moved_again_is_dead_lettered(self):
+        first = toggle_student("K100")
+        self.drop_markers()
+        self.journal._owner = "test-2"
+        with mock.patch.object(journal, "enabled", return_value=False):
+            toggle_student("K100")
+
+        self.assertEqual(journal.replay(self.directory), (0, 1))
+        dead = journal.read_dead_letters(self.directory)
+        self.assertEqual([r["client_key"] for r in dead], [first.log.client_key])
+        self.assertEqual(MovementLog.objects.count(), 1)
+
+    def test_live_owner_replays_only_marked_lines(self):
+        lock = self.directory / "test-1.lock"
+        with open(lock, "w") as held:
+            fcntl.flock(held, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            toggle_student("K100")
+            with transaction.atomic():
+                toggle_student("K100")
+                self.journal._owner = "test-2"
+                rows, files = journal.replay(self.directory, include_live=True)
+
+        self.assertEqual((rows, files), (1, 1))
+        self.assertEqual(MovementLog.objects.count(), 1)
+        self.assertTrue(Path(self.journal._file.name).exists())
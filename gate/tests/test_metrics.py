@@ -0,0 +1,39 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from .. import metrics
+from .base import GateTestCase
+
+
+@override_settings(GATE_METRICS_TOKEN="scrape-me")
+class MetricsTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    def scrape(self, token="scrape-me"):
+        return self.client.get(reverse("metrics"), headers={"authorization": f"Bearer {token}"})
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.get(reverse("api_counts"))
+        self.client.get(reverse("api_counts"))
+
+        body = self.scrape().content.decode()
+
+        self.assertIn('gate_request_duration_seconds_count{view="api_counts"} 2', body)
+        self.assertIn('gate_request_duration_seconds_bucket{view="api_counts",le="+Inf"} 2', body)
+        self.assertIn('gate_responses_total{view="api_counts",status="2xx"} 2', body)
+        self.assertRegex(body, r'gate_request_db_queries_total\{view="api_counts"\} [1-9]')
+
+    def test_scrape_needs_staff_or_the_token(self):
+        self.assertEqual(self.scrape(token="wrong").status_code, 403)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+    @override_settings(GATE_SLOW_REQUEST_SECONDS=0.000001)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs("gate.slow", "WARNING") as logs:
+            self.client.get(reverse("api_counts"))
+
+        self.assertIn("Slow request GET /api/counts/ (api_counts) -> 200", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+
+from .. import occupancy
+from ..models import Hostel, OccupancyCounter, Student
+from ..services import toggle_student
+from .base import GateTestCase, make_student
+
+
+class OccupancyCounterTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.annex = Hostel.objects.create(code="annex", name="Annex")
+        make_student("A100", self.hostel, is_inside=True)
+        make_student("A101", self.hostel, is_inside=False)
+        make_student("B100", self.annex, is_inside=True)
+
+    def stored(self, hostel):
+        return OccupancyCounter.objects.values("inside", "outside").get(key=occupancy.counter_key(hostel.pk))
+
+    def test_campus_is_the_sum_of_hostel_counters(self):
+        self.assertEqual(occupancy.get_counts(), {"inside": 2, "outside": 1})
+        self.assertEqual(occupancy.get_counts({self.annex.pk}), {"inside": 1, "outside": 0})
+        self.assertFalse(OccupancyCounter.objects.filter(key="campus").exists())
+
+    def test_toggle_only_touches_its_hostel_counter(self):
+        annex_before = self.stored(self.annex)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            toggle_student("A100")
+
+        self.assertEqual(self.stored(self.hostel), {"inside": 0, "outside": 2})
+        self.assertEqual(self.stored(self.annex), annex_before)
+        self.assertEqual(occupancy.get_counts(), {"inside": 1, "outside": 2})
+
+    def test_moving_a_student_moves_the_count(self):
+        student = Student.objects.get(enrollment_number="A100")
+        with self.captureOnCommitCallbacks(execute=True):
+            student.hostel = self.annex
+            student.save()
+
+        self.assertEqual(self.stored(self.hostel), {"inside": 0, "outside": 1})
+        self.assertEqual(self.stored(self.annex), {"inside": 2, "outside": 0})
+
+    def test_first_write_that_loses_the_race_still_applies_its_delta(self):
+        OccupancyCounter.objects.all().delete()
+        # Another transaction created the row between our update and insert.
+        OccupancyCounter.objects.create(key=occupancy.counter_key(self.annex.pk), inside=5, outside=5)
+
+        counts, created = occupancy._initialise(self.annex.pk)
+
+        self.assertFalse(created)
+        self.assertEqual(counts, {"inside": 5, "outside": 5})
+        occupancy.adjust(inside=1, outside=-1, hostel_id=self.annex.pk)
+        self.assertEqual(self.stored(self.annex), {"inside": 6, "outside": 4})
+
+    def test_reconcile_fixes_drift(self):
+        OccupancyCounter.objects.filter(key=occupancy.counter_key(self.hostel.pk)).update(inside=9)
+
+        results = dict((key, (stored, actual)) for key, stored, actual in occupancy.reconcile(fix=True))
+
+        stored, actual = results[occupancy.counter_key(self.hostel.pk)]
+        self.assertEqual(stored["inside"], 9)
+        self.assertEqual(actual, {"inside": 1, "outside": 1})
+        self.assertEqual(self.stored(self.hostel), actual)
+        self.assertNotIn("campus", results)
+
+
+class HostelScopeTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.annex = Hostel.objects.create(code="annex", name="Annex")
+        make_student("A100", self.hostel, is_inside=True)
+        make_student("B100", self.annex, is_inside=True)
+        make_student("B101", self.annex, is_inside=False)
+        self.warden = User.objects.create_user("warden", password="x")
+        self.annex.staff.add(self.warden)
+
+    def test_counts_are_limited_to_the_users_hostels(self):
+        self.client.force_login(self.warden)
+
+        self.assertEqual(self.client.get(reverse("api_counts")).json(), {"inside": 1, "outside": 1})
+        self.assertEqual(
+            self.client.get(reverse("api_counts"), {"hostel": "main"}).json(), {"inside": 0, "outside": 0}
+        )
+
+    def test_staff_without_a_hostel_see_the_campus(self):
+        self.client.force_login(User.objects.create_user("dean", password="x"))
+
+        self.assertEqual(self.client.get(reverse("api_counts")).json(), {"inside": 2, "outside": 1})
+
+    def test_toggle_refuses_students_of_other_hostels(self):
+        with self.assertRaises(Student.DoesNotExist):
+            toggle_student("A100", hostel_ids={self.annex.pk})
+        self.assertTrue(Student.objects.get(enrollment_number="A100").is_inside)
+
+
+class ReconcileCommandTests(GateTestCase):
+    def test_reports_drift_and_dry_run_leaves_it(self):
+        make_student("A100", self.hostel, is_inside=True)
+        key = occupancy.counter_key(self.hostel.pk)
+        OccupancyCounter.objects.filter(key=key).update(inside=3)
+        out = StringIO()
+
+        call_command("reconcile_occupancy", "--dry-run", stdout=out)
+
+        self.assertIn(f"{key}: drift: inside +2, outside +0", out.getvalue())
+        self.assertEqual(OccupancyCounter.objects.get(key=key).inside, 3)
@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import Permission, User
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import MovementLog
+from ..pagination import encode_cursor, keyset_page
+from .base import GateTestCase, make_student
+
+
+class KeysetPageTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        student = make_student("J900", self.hostel)
+        start = timezone.now() - timedelta(hours=1)
+        MovementLog.objects.bulk_create([
+            MovementLog(student=student, hostel=self.hostel, direction=MovementLog.IN, timestamp=start + timedelta(minutes=i // 2))
+            for i in range(7)
+        ])
+        self.ordered = list(MovementLog.objects.order_by("-timestamp", "-id").values_list("pk", flat=True))
+
+    def page(self, **cursors):
+        return keyset_page(MovementLog.objects.all(), ["-timestamp", "-id"], size=3, **cursors)
+
+    def test_pages_walk_forward_and_back(self):
+        first = self.page()
+        second = self.page(after=first.next_cursor)
+        third = self.page(after=second.next_cursor)
+        back = self.page(before=third.prev_cursor)
+
+        self.assertEqual([log.pk for log in first], self.ordered[:3])
+        self.assertEqual([log.pk for log in second], self.ordered[3:6])
+        self.assertEqual([log.pk for log in third], self.ordered[6:])
+        self.assertFalse(third.has_next)
+        self.assertFalse(first.has_prev)
+        self.assertEqual([log.pk for log in back], self.ordered[3:6])
+
+    def test_bad_cursors_give_the_first_page(self):
+        def raw(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+        for cursor in ("not-base64!", raw(["x", 1]), raw([1, "y"]), raw([None, 1]), raw(["2026-01-01"]), raw({})):
+            with self.subTest(cursor=cursor):
+                self.assertEqual([log.pk for log in self.page(after=cursor)], self.ordered[:3])
+
+    def test_logs_page_survives_a_tampered_cursor(self):
+        user = User.objects.create_user("warden", password="x")
+        user.user_permissions.add(Permission.objects.get(codename="view_movementlog"))
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("logs"), {"after": encode_cursor(["x", 1])})
+
+        self.assertEqual(response.status_code, 200)
+
+
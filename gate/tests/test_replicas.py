@@ -0,0 +1,61 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..models import Student
+from ..replicas import STICKY_COOKIE, PrimaryReplicaRouter, ReplicaMiddleware, primary
+
+
+@override_settings(GATE_DATABASE_REPLICAS=["replica1"], GATE_REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.seen = []
+
+    def serve(self, method="get", cookies=None, write=False):
+        def view(request):
+            self.seen.append(self.router.db_for_read(Student))
+            if write:
+                self.router.db_for_write(Student)
+                self.seen.append(self.router.db_for_read(Student))
+            self.seen.append(self.router.db_for_read(Session))
+            with primary():
+                self.seen.append(self.router.db_for_read(Student))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)("/")
+        request.user = AnonymousUser()
+        request.COOKIES.update(cookies or {})
+        middleware = ReplicaMiddleware(view)
+        middleware.process_request(request)
+        middleware.process_view(request, view, (), {})
+        return middleware.process_response(request, view(request))
+
+    def test_get_reads_from_a_replica_except_sessions_and_primary_blocks(self):
+        self.serve()
+
+        self.assertEqual(self.seen, ["replica1", "default", "default"])
+
+    def test_post_reads_from_the_primary(self):
+        self.serve("post")
+
+        self.assertEqual(self.seen[0], "default")
+
+    def test_write_pins_later_reads_and_sets_the_sticky_cookie(self):
+        response = self.serve(write=True)
+
+        self.assertEqual(self.seen[:2], ["replica1", "default"])
+        self.assertGreater(float(response.cookies[STICKY_COOKIE].value), time.time())
+
+    def test_sticky_cookie_keeps_reads_on_the_primary(self):
+        self.serve(cookies={STICKY_COOKIE: f"{time.time() + 5:.0f}"})
+
+        self.assertEqual(self.seen[0], "default")
+
+    def test_nothing_leaks_outside_a_request(self):
+        self.serve()
+
+        self.assertEqual(self.router.db_for_read(Student), "default")
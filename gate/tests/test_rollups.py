@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from .. import rollups
+from ..models import MovementLog, MovementRollup
+from .base import GateTestCase, make_student
+
+
+class RoomBlockTests(GateTestCase):
+    def test_blocks(self):
+        self.assertEqual(
+            [rollups.room_block(room) for room in ("A-101", "b12", "101", "", None, "C/7")],
+            ["A", "B", "", "", "", "C"],
+        )
+
+
+class CatchUpTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student("R100", self.hostel, room_number="A-12")
+        self.start = timezone.now() - timedelta(days=2)
+
+    def log(self, direction, at):
+        return MovementLog.objects.create(student=self.student, hostel=self.hostel, direction=direction, timestamp=at)
+
+    def daily(self, direction):
+        return MovementRollup.objects.get(period=MovementRollup.DAY, direction=direction, block="A")
+
+    @override_settings(GATE_ROLLUP_LAG_SECONDS=0)
+    def test_counts_logs_and_outings_once(self):
+        self.log(MovementLog.OUT, self.start)
+        self.log(MovementLog.IN, self.start + timedelta(minutes=30))
+
+        self.assertEqual(rollups.catch_up(), 2)
+        self.assertEqual(rollups.catch_up(), 0)
+
+        self.assertEqual(self.daily(MovementLog.OUT).count, 1)
+        returned = self.daily(MovementLog.IN)
+        self.assertEqual((returned.count, returned.returns, returned.outside_seconds), (1, 1, 1800))
+        self.assertEqual(rollups.rolled_up_through(), MovementLog.objects.order_by("-id").first().pk)
+
+    @override_settings(GATE_ROLLUP_LAG_SECONDS=60)
+    def test_lag_follows_insert_time_not_scan_time(self):
+        # A batch upload just inserted a scan the device made two days ago.
+        backdated = self.log(MovementLog.OUT, self.start)
+
+        self.assertEqual(rollups.catch_up(), 0)
+
+        MovementLog.objects.filter(pk=backdated.pk).update(created_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(rollups.catch_up(), 1)
+
+    @override_settings(GATE_ROLLUP_LAG_SECONDS=60)
+    def test_logs_from_before_created_at_count_as_old(self):
+        log = self.log(MovementLog.OUT, timezone.now())
+        MovementLog.objects.filter(pk=log.pk).update(created_at=None)
+
+        self.assertEqual(rollups.catch_up(), 1)
@@ -0,0 +1,49 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from ..models import Hostel
+from ..search import search_students
+from .base import GateTestCase, make_student
+
+
+class SearchStudentsTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        make_student("SH100", self.hostel, full_name="Zoya Patel")
+        make_student("SH1002", self.hostel, full_name="Arjun Shah")
+        make_student("XY200", self.hostel, full_name="Shalini Rao")
+        make_student("QQ300", self.hostel, full_name="Rohan Mehta", room_number="A-1")
+
+    def enrollments(self, q, **kwargs):
+        return [s.enrollment_number for s in search_students(q, **kwargs)]
+
+    def test_results_are_ranked_exact_prefix_name_then_fuzzy(self):
+        self.assertEqual(self.enrollments("sh100"), ["SH100", "SH1002"])
+        make_student("ROH1", self.hostel, full_name="Someone Else")
+        make_student("ZZ1", self.hostel, full_name="Brohan Das")
+        # enrollment prefix, name-word prefix, then a substring match
+        self.assertEqual(self.enrollments("roh"), ["ROH1", "QQ300", "ZZ1"])
+
+    def test_fuzzy_tail_can_be_left_out(self):
+        self.assertEqual(self.enrollments("hta", fuzzy=False), [])
+        self.assertEqual(self.enrollments("hta"), ["QQ300"])
+
+    def test_new_students_are_found_at_once(self):
+        self.assertEqual(self.enrollments("NEW1"), [])
+        make_student("NEW1", self.hostel)
+
+        self.assertEqual(self.enrollments("new1"), ["NEW1"])
+
+    def test_search_is_limited_to_the_given_hostels(self):
+        east = Hostel.objects.create(code="east", name="East")
+        make_student("SH9", east, full_name="Other Hostel")
+
+        self.assertNotIn("SH9", self.enrollments("sh", hostel_ids={self.hostel.pk}))
+        self.assertEqual(self.enrollments("sh", hostel_ids={east.pk}), ["SH9"])
+
+    def test_autocomplete_returns_compact_prefix_matches(self):
+        self.client.force_login(User.objects.create_user("warden", password="x", is_staff=True))
+
+        response = self.client.get(reverse("api_autocomplete"), {"q": "sh10", "limit": 5})
+
+        self.assertEqual(response.json()["results"], [["SH100", "Zoya Patel", True], ["SH1002", "Arjun Shah", True]])
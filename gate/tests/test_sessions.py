@@ -0,0 +1,43 @@
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.urls import reverse
+
+from ..sessions import REFRESHED_KEY
+from .base import GateTestCase
+
+
+class SlidingSessionTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user("guard", password="x"))
+        self.client.get(reverse("api_counts"))
+
+    def stored(self):
+        return Session.objects.get().get_decoded()
+
+    def test_fresh_session_is_not_rewritten(self):
+        refreshed = self.stored()[REFRESHED_KEY]
+        expires = Session.objects.get().expire_date
+
+        self.client.get(reverse("api_counts"))
+
+        self.assertEqual(self.stored()[REFRESHED_KEY], refreshed)
+        self.assertEqual(Session.objects.get().expire_date, expires)
+
+    def test_old_session_is_pushed_forward(self):
+        session = self.client.session
+        session[REFRESHED_KEY] = int(time.time()) - 3600
+        session.save()
+
+        self.client.get(reverse("api_counts"))
+
+        self.assertGreaterEqual(self.stored()[REFRESHED_KEY], int(time.time()) - 5)
+
+    def test_session_deleted_elsewhere_is_not_resurrected(self):
+        Session.objects.all().delete()
+
+        self.client.get(reverse("api_counts"))
+
+        self.assertFalse(Session.objects.exists())
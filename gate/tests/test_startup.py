@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase
+
+from ..management.commands.profile_startup import PHASES, _parse_importtime, _summarise
+
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   gate.hostels
+import time:       300 |        900 | gate.views
+import time:        50 |         50 | django.urls
+"""
+
+
+def run(total, modules=()):
+    return {**{phase: total / 2 for phase in PHASES}, "total": total, "status": "200 OK"}, list(modules)
+
+
+class ProfileStartupTests(SimpleTestCase):
+    def test_importtime_lines_are_parsed(self):
+        self.assertEqual(
+            _parse_importtime(IMPORTTIME + "some warning\n"),
+            [("gate.hostels", 120, 120), ("gate.views", 900, 300), ("django.urls", 50, 50)],
+        )
+
+    def test_fastest_run_is_reported_with_package_totals(self):
+        modules = _parse_importtime(IMPORTTIME)
+
+        result = _summarise([run(0.3), run(0.2, modules), run(0.25)])
+
+        self.assertEqual(result["phases"]["total"], 0.2)
+        self.assertEqual(result["median_total"], 0.25)
+        self.assertEqual(result["modules"][0], ("gate.views", 900, 300))
+        self.assertEqual(result["packages"], [("gate", 420), ("django", 50)])
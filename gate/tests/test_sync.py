@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import Permission, User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import sync
+from ..models import Hostel, Student
+from .base import GateTestCase, make_student
+
+
+@override_settings(GATE_SYNC_OVERLAP_SECONDS=0)
+class DeltaSyncTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.annex = Hostel.objects.create(code="annex", name="Annex")
+        make_student("D100", self.hostel)
+        make_student("D200", self.annex)
+
+    def test_delta_has_changed_students_and_deleted_keys(self):
+        self.since = timezone.now()
+        student = Student.objects.get(enrollment_number="D100")
+        student.is_inside = False
+        student.save()
+        Student.objects.get(enrollment_number="D200").delete()
+
+        payload = sync.delta(self.since, {self.hostel.pk, self.annex.pk})
+
+        self.assertFalse(payload["full"])
+        self.assertEqual([row[0] for row in payload["students"]], ["D100"])
+        self.assertEqual(payload["deleted"], ["d200"])
+        self.assertGreaterEqual(payload["watermark"], self.since.isoformat())
+
+    def test_move_tombstones_the_old_hostel_only(self):
+        self.since = timezone.now()
+        student = Student.objects.get(enrollment_number="D100")
+        student.hostel = self.annex
+        student.save()
+
+        self.assertEqual(sync.delta(self.since, {self.hostel.pk})["deleted"], ["d100"])
+        self.assertEqual([row[0] for row in sync.delta(self.since, {self.annex.pk})["students"]], ["D100"])
+        self.assertEqual(sync.delta(self.since)["deleted"], [])
+
+    def test_rename_tombstones_the_old_key(self):
+        self.since = timezone.now()
+        student = Student.objects.get(enrollment_number="D100")
+        student.enrollment_number = "D101"
+        student.save()
+
+        payload = sync.delta(self.since)
+
+        self.assertEqual(payload["deleted"], ["d100"])
+        self.assertEqual([row[0] for row in payload["students"]], ["D101"])
+
+    def test_readding_a_key_clears_its_tombstone(self):
+        self.since = timezone.now()
+        Student.objects.get(enrollment_number="D100").delete()
+        make_student("D100", self.hostel)
+
+        self.assertEqual(sync.delta(self.since)["deleted"], [])
+
+    @override_settings(GATE_SYNC_MAX_DELTA=1)
+    def test_large_delta_falls_back_to_a_snapshot(self):
+        self.assertIsNone(sync.delta(timezone.now() - timedelta(hours=1)))
+
+
+class SyncApiTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        make_student("D100", self.hostel)
+        user = User.objects.create_user("scanner", password="x")
+        user.user_permissions.add(Permission.objects.get(codename="can_toggle_status"))
+        self.client.force_login(user)
+
+    def test_snapshot_then_304(self):
+        first = self.client.get(reverse("api_sync"))
+
+        self.assertTrue(first.json()["full"])
+        self.assertEqual(first.json()["students"][0][0], "D100")
+        again = self.client.get(reverse("api_sync"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_bad_watermark_is_rejected(self):
+        response = self.client.get(reverse("api_sync"), {"since": "yesterday"})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "invalid_watermark")
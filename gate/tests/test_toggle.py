@@ -0,0 +1,108 @@
+import threading
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..models import Hostel, MovementLog, Student
+from ..services import IdempotencyKeyConflict, toggle_student
+from .base import GateTestCase, make_student
+
+
+class ToggleStudentTests(GateTestCase):
+    def setUp(self):
+        super().setUp()
+        self.student = make_student("A100", self.hostel, is_inside=True)
+
+    def test_toggle_flips_status_and_records_log(self):
+        student, log, replayed = toggle_student("a100")
+
+        self.assertFalse(replayed)
+        self.assertFalse(student.is_inside)
+        self.assertEqual(log.direction, MovementLog.OUT)
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.is_inside)
+        self.assertEqual(self.student.last_direction, MovementLog.OUT)
+        self.assertEqual(self.student.last_movement_at, log.timestamp)
+        self.assertEqual(MovementLog.objects.filter(student=self.student).count(), 1)
+
+    def test_same_key_replays_without_toggling_again(self):
+        first = toggle_student("A100", idempotency_key="scan-1")
+        again = toggle_student("A100", idempotency_key="scan-1")
+
+        self.assertTrue(again.replayed)
+        self.assertEqual(again.log.pk, first.log.pk)
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.is_inside)
+        self.assertEqual(MovementLog.objects.count(), 1)
+
+    def test_key_of_another_student_is_rejected(self):
+        make_student("B200", self.hostel)
+        toggle_student("A100", idempotency_key="scan-1")
+
+        with self.assertRaises(IdempotencyKeyConflict):
+            toggle_student("B200", idempotency_key="scan-1")
+        self.assertTrue(Student.objects.get(enrollment_number="B200").is_inside)
+
+    def test_api_answers_409_for_a_key_of_another_student(self):
+        make_student("B200", self.hostel)
+        user = User.objects.create_user("guard", password="x")
+        user.user_permissions.add(Permission.objects.get(codename="can_toggle_status"))
+        self.client.force_login(user)
+        self.client.post(reverse("api_toggle"), {"enrollment_number": "A100", "idempotency_key": "k"})
+
+        response = self.client.post(reverse("api_toggle"), {"enrollment_number": "B200", "idempotency_key": "k"})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["error"], "idempotency_key_conflict")
+
+    @override_settings(GATE_TOGGLE_DEBOUNCE_SECONDS=60)
+    def test_second_scan_inside_debounce_window_is_replayed(self):
+        toggle_student("A100")
+        again = toggle_student("A100")
+
+        self.assertTrue(again.replayed)
+        self.assertEqual(MovementLog.objects.count(), 1)
+
+    def test_student_of_another_hostel_cannot_be_toggled(self):
+        other = Hostel.objects.create(code="east", name="East")
+
+        with self.assertRaises(Student.DoesNotExist):
+            toggle_student("A100", hostel_ids={other.pk})
+
+
+class ConcurrentToggleTests(TransactionTestCase):
+    """Toggles of one student from several threads serialize on the row lock."""
+
+    def test_concurrent_toggles_alternate(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("needs a database whose connections can wait for each other's locks")
+        cache.clear()
+        hostel = Hostel.objects.create(code="lock", name="Lock")
+        student = make_student("C300", hostel, is_inside=True)
+        errors = []
+
+        def scan():
+            try:
+                for _ in range(5):
+                    toggle_student("C300")
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=scan) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        directions = list(
+            MovementLog.objects.filter(student=student).order_by("timestamp", "id").values_list("direction", flat=True)
+        )
+        self.assertEqual(directions, [MovementLog.OUT, MovementLog.IN] * 10)
+        student.refresh_from_db()
+        self.assertTrue(student.is_inside)
@@ -1,40 +1,73 @@
 # gate/views.py
 
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotModified,
+    JsonResponse, StreamingHttpResponse,
+)
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.vary import vary_on_headers
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
 from django.views.decorators.csrf import csrf_exempt
-from django.db.models import Q
 from django.contrib.auth.decorators import permission_required, login_required
+from django.conf import settings
+from django.db import transaction
 
-from .models import Student, MovementLog
-from .forms import StudentForm, CSVUploadForm
-import csv, io
+from .models import Student, MovementLog, MovementLogArchive
+from .forms import StudentForm, CSVUploadForm, LogFilterForm, StudentFilterForm
+from . import cards, curfew, events, hostels, journal, metrics, occupancy, rollups
+from .pagination import keyset_page
+from .devices import accepts_device_keys
+from .search import search_students
+from .services import TOGGLE, IdempotencyKeyConflict, apply_scan_batch, toggle_student
+from .sync import cached_roster_version, delta, parse_watermark, roster_version, snapshot, version_etag
+import hmac, json, uuid
 
 
 # -------------------- Dashboard (role-aware) --------------------
 
+def _live_counts(request):
+    """
+    How a page keeps its totals current: pushed over /events/ when served
+    through config.asgi, else polled from /api/counts/ (a WSGI worker
+    cannot hold a stream open).
+    """
+    return {
+        "live_events": isinstance(request, ASGIRequest),
+        "counts_poll_ms": int(getattr(settings, "GATE_COUNTS_POLL_SECONDS", 30) * 1000),
+    }
+
+
 @login_required
 def dashboard(request):
-    inside_count  = Student.objects.filter(is_inside=True).count()
-    outside_count = Student.objects.filter(is_inside=False).count()
+    counts = occupancy.get_counts(hostels.request_ids(request))
     return render(request, "gate/dashboard.html", {
-        "inside_count": inside_count,
-        "outside_count": outside_count,
+        "inside_count": counts["inside"],
+        "outside_count": counts["outside"],
+        "hostels": hostels.choices(request.user),
+        "hostel": request.GET.get("hostel", ""),
+        **_live_counts(request),
     })
 
 
 # -------------------- Public / Open pages --------------------
 
 def home(request):
-    inside_count = Student.objects.filter(is_inside=True).count()
-    outside_count = Student.objects.filter(is_inside=False).count()
+    counts = occupancy.get_counts(hostels.request_ids(request))
     return render(
         request,
         "gate/home.html",
-        {"inside_count": inside_count, "outside_count": outside_count},
+        {"inside_count": counts["inside"], "outside_count": counts["outside"], **_live_counts(request)},
     )
 
 
@@ -47,16 +80,20 @@ def check(request):
         * exact match -> show single student card
         * else -> show results list of partial matches (enrollment or name)
     """
-    context = {"student": None, "searched": False, "results": []}
+    context = {
+        "student": None,
+        "searched": False,
+        "results": [],
+        # Lets a double-submitted toggle form be recognised as one scan.
+        "toggle_key": uuid.uuid4().hex,
+    }
 
     # Deep link: /check/?enr=XXXX
     enr_param = (request.GET.get("enr") or "").strip()
     if enr_param:
         context["searched"] = True
-        try:
-            student = Student.objects.get(enrollment_number__iexact=enr_param)
-            context["student"] = student
-        except Student.DoesNotExist:
+        context["student"] = cards.get_card(enr_param, hostels.request_ids(request))
+        if context["student"] is None:
             messages.error(request, f"No student found for enrollment {enr_param}.")
         return render(request, "gate/check.html", context)
 
@@ -69,20 +106,12 @@ def check(request):
             return render(request, "gate/check.html", context)
 
         # Try exact enrollment first
-        try:
-            student = Student.objects.get(enrollment_number__iexact=q)
-            context["student"] = student
+        context["student"] = cards.get_card(q, hostels.request_ids(request))
+        if context["student"] is not None:
             return render(request, "gate/check.html", context)
-        except Student.DoesNotExist:
-            pass
 
-        # Partial search on enrollment OR name
-        results = (
-            Student.objects.filter(
-                Q(enrollment_number__icontains=q) | Q(full_name__icontains=q)
-            )
-            .order_by("enrollment_number")[:50]
-        )
+        # Ranked partial search on enrollment OR name
+        results = search_students(q, limit=50, hostel_ids=hostels.request_ids(request))
         if results:
             context["results"] = results
         else:
@@ -91,26 +120,220 @@ def check(request):
     return render(request, "gate/check.html", context)
 
 
+@require_http_methods(["GET"])
+async def events_stream(request):
+    """
+    Server-Sent Events for live dashboards: ``counts`` after every change
+    to the inside/outside totals and, for users who can view logs, a
+    ``movement`` event per scan, both limited to the user's hostels. Needs
+    the ASGI entry point (config.asgi); each open stream is one idle
+    coroutine, not a worker thread. Under WSGI the stream would never end
+    and hold a worker, so it answers 204, which tells EventSource clients
+    not to reconnect; pages poll /api/counts/ there instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        response = HttpResponse(status=204)
+        response["Cache-Control"] = "no-cache"
+        return response
+    user = await request.auser()
+    show_movements = await sync_to_async(user.has_perm)("gate.view_movementlog")
+    scope = await sync_to_async(hostels.request_ids)(request)
+    counts = await sync_to_async(occupancy.get_counts)(scope)
+    heartbeat = getattr(settings, "GATE_EVENT_HEARTBEAT_SECONDS", 15)
+    broker = events.get_broker()
+    subscription = broker.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            yield _sse_message("counts", counts)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                data = event["data"]
+                if event["type"] == "counts":
+                    # Campus totals carry no hostel; each hostel's change is
+                    # published again with its id.
+                    if scope is None:
+                        if "hostel" in data:
+                            continue
+                    elif data.get("hostel") not in scope:
+                        continue
+                    elif len(scope) > 1:
+                        data = await sync_to_async(occupancy.get_counts)(scope)
+                    else:
+                        data = {"inside": data["inside"], "outside": data["outside"]}
+                elif event["type"] == "movement":
+                    if not show_movements or (scope is not None and data.get("hostel") not in scope):
+                        continue
+                yield _sse_message(event["type"], data)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _sse_message(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@require_http_methods(["GET"])
+@cache_control(private=True, max_age=5)
+def api_counts(request):
+    """Inside/outside totals for the caller's hostels; what pages poll without /events/."""
+    return JsonResponse(occupancy.get_counts(hostels.request_ids(request)))
+
+
 # -------------------- Lists (Wardens/Admin only) --------------------
 
+def _student_list(request, title, is_inside):
+    form = StudentFilterForm(request.GET or None, hostel_choices=hostels.choices(request.user))
+    qs = hostels.scope(Student.objects.filter(is_inside=is_inside), request).select_related("hostel")
+    if form.is_bound and form.is_valid():
+        qs = form.filter(qs)
+    page = keyset_page(
+        qs,
+        ["enrollment_number"],
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        size=getattr(settings, "GATE_PAGE_SIZE", 100),
+    )
+    return render(request, "gate/list.html", {"title": title, "students": page, "page": page, "form": form})
+
+
 @permission_required("gate.view_student", login_url="login")
 def current_inside(request):
-    students = Student.objects.filter(is_inside=True)
-    return render(request, "gate/list.html", {"title": "Currently Inside", "students": students})
+    return _student_list(request, "Currently Inside", True)
 
 
 @permission_required("gate.view_student", login_url="login")
 def current_outside(request):
-    students = Student.objects.filter(is_inside=False)
-    return render(request, "gate/list.html", {"title": "Currently Outside", "students": students})
+    return _student_list(request, "Currently Outside", False)
+
+
+@permission_required("gate.view_student", login_url="login")
+def curfew_report(request):
+    """
+    Students still out after curfew, or with ?absent=1 out for longer than
+    ``GATE_LONG_ABSENCE_HOURS`` (or ?hours=N), longest out first.
+    """
+    if request.GET.get("absent"):
+        hours = getattr(settings, "GATE_LONG_ABSENCE_HOURS", 48)
+        try:
+            hours = max(1, int(request.GET.get("hours") or hours))
+        except ValueError:
+            pass
+        cutoff = curfew.absence_cutoff(hours)
+        title = f"Out for more than {hours} hours"
+    else:
+        cutoff = curfew.curfew_cutoff()
+        title = "Out after curfew"
+    form = StudentFilterForm(request.GET or None, hostel_choices=hostels.choices(request.user))
+    qs = curfew.out_since(cutoff, hostels.request_ids(request)).select_related("hostel")
+    if form.is_bound and form.is_valid():
+        qs = form.filter(qs)
+    page = keyset_page(
+        qs,
+        ["last_movement_at", "id"],
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        size=getattr(settings, "GATE_PAGE_SIZE", 100),
+    )
+    return render(request, "gate/list.html", {
+        "title": title, "students": page, "page": page, "form": form, "show_out_since": True,
+    })
 
 
 # -------------------- Logs (Guards/Wardens/Admin) --------------------
 
 @permission_required("gate.view_movementlog", login_url="login")
 def logs(request):
-    logs_qs = MovementLog.objects.select_related("student", "recorded_by").order_by("-timestamp")[:500]
-    return render(request, "gate/logs.html", {"logs": logs_qs})
+    form = LogFilterForm(request.GET or None, hostel_choices=hostels.choices(request.user))
+    logs_qs = hostels.scope(MovementLog.objects.select_related("student", "recorded_by", "gate"), request)
+    if form.is_bound and form.is_valid():
+        logs_qs = form.filter(logs_qs)
+    page = keyset_page(
+        logs_qs,
+        ["-timestamp", "-id"],
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+        size=getattr(settings, "GATE_PAGE_SIZE", 100),
+    )
+    return render(request, "gate/logs.html", {"logs": page, "page": page, "form": form})
+
+
+@permission_required("gate.view_movementlog", login_url="login")
+def export_logs(request):
+    """
+    Stream movement history as CSV (default) or NDJSON (?format=ndjson),
+    gzipped with ?gzip=1, including archived logs with ?archive=1.
+    Accepts the same filters as the logs page.
+    """
+    from .export import FORMATS, export_rows, render_export
+
+    fmt = request.GET.get("format", "csv")
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest("format must be csv or ndjson")
+    form = LogFilterForm(request.GET, hostel_choices=hostels.choices(request.user))
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+    compress = request.GET.get("gzip") in ("1", "true")
+    archive_qs = None
+    if request.GET.get("archive") in ("1", "true"):
+        archive_qs = form.filter(hostels.scope(MovementLogArchive.objects.all(), request))
+
+    filename = f"movements-{timezone.localdate():%Y%m%d}.{fmt}" + (".gz" if compress else "")
+    response = StreamingHttpResponse(
+        render_export(
+            export_rows(form.filter(hostels.scope(MovementLog.objects.all(), request)), archive_qs=archive_qs),
+            fmt,
+            compress,
+        ),
+        content_type="application/gzip" if compress else FORMATS[fmt],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+# -------------------- Analytics (Wardens/Admin) --------------------
+
+def _analytics_params(request):
+    try:
+        days = max(1, min(int(request.GET.get("days") or 30), 366))
+    except ValueError:
+        days = 30
+    return days, (request.GET.get("block") or "").strip() or None
+
+
+@permission_required("gate.view_movementlog", login_url="login")
+def analytics(request):
+    """Peak hours, daily volumes and outing length, read from the rollups only."""
+    days, block = _analytics_params(request)
+    data = rollups.summary(days, block, hostels.request_ids(request))
+    busiest = max((h["in"] + h["out"] for h in data["peak_hours"]), default=0) or 1
+    for hour in data["peak_hours"]:
+        hour["width"] = round(100 * (hour["in"] + hour["out"]) / busiest)
+    return render(request, "gate/analytics.html", {
+        "data": data,
+        "days": days,
+        "blocks": rollups.blocks(hostels.request_ids(request)),
+        "hostels": hostels.choices(request.user),
+        "hostel": request.GET.get("hostel", ""),
+    })
+
+
+@require_http_methods(["GET"])
+@permission_required("gate.view_movementlog", login_url="login")
+def api_analytics(request):
+    """JSON form of the analytics page: ?days=1..366 and optional ?block= and ?hostel=."""
+    days, block = _analytics_params(request)
+    return JsonResponse(rollups.summary(days, block, hostels.request_ids(request)))
 
 
 # -------------------- Toggle (Guards/Wardens/Admin) --------------------
@@ -121,27 +344,32 @@ def toggle_status(request):
     enr = (request.POST.get("enrollment_number") or "").strip()
     note = (request.POST.get("note") or "").strip()
     try:
-        student = Student.objects.get(enrollment_number__iexact=enr)
+        student, log, replayed = toggle_student(
+            enr,
+            user=request.user,
+            note=note,
+            idempotency_key=request.POST.get("idempotency_key"),
+            hostel_ids=hostels.request_ids(request),
+        )
     except Student.DoesNotExist:
         messages.error(request, "Student not found.")
         return redirect("check")
+    except IdempotencyKeyConflict:
+        messages.error(request, "This scan was already recorded for another student.")
+        return redirect("check")
 
-    # Flip status
-    student.is_inside = not student.is_inside
-    student.save()
-
-    direction = MovementLog.IN if student.is_inside else MovementLog.OUT
-    MovementLog.objects.create(
-        student=student,
-        direction=direction,
-        recorded_by=request.user if request.user.is_authenticated else None,
-        note=note,
-    )
-
-    messages.success(
-        request,
-        f"{student.full_name} marked {direction} at {timezone.now():%d %b %Y, %I:%M %p}.",
-    )
+    if replayed:
+        messages.info(
+            request,
+            f"{student.full_name} was already marked {log.direction} at "
+            f"{timezone.localtime(log.timestamp):%d %b %Y, %I:%M %p}.",
+        )
+    else:
+        messages.success(
+            request,
+            f"{student.full_name} marked {log.direction} at "
+            f"{timezone.localtime(log.timestamp):%d %b %Y, %I:%M %p}.",
+        )
     return redirect("check")
 
 
@@ -149,28 +377,32 @@ def toggle_status(request):
 
 @permission_required("gate.add_student", login_url="login")
 def add_student(request):
+    hostel_ids = hostels.request_ids(request)
     if request.method == "POST":
-        form = StudentForm(request.POST)
+        form = StudentForm(request.POST, hostel_ids=hostel_ids)
         if form.is_valid():
-            s = form.save()
+            with transaction.atomic():
+                s = form.save()
             messages.success(request, f"Student {s.full_name} ({s.enrollment_number}) added.")
             return redirect("add_student")
     else:
-        form = StudentForm()
+        form = StudentForm(hostel_ids=hostel_ids, initial={"hostel": hostels.default_for(request)})
     return render(request, "gate/add_student.html", {"form": form})
 
 
 @permission_required("gate.change_student", login_url="login")
 def edit_student(request, pk):
-    student = get_object_or_404(Student, pk=pk)
+    hostel_ids = hostels.request_ids(request)
+    student = get_object_or_404(hostels.scope(Student.objects.all(), request), pk=pk)
     if request.method == "POST":
-        form = StudentForm(request.POST, instance=student)
+        form = StudentForm(request.POST, instance=student, hostel_ids=hostel_ids)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
             messages.success(request, f"Updated {student.full_name}.")
             return redirect("check")
     else:
-        form = StudentForm(instance=student)
+        form = StudentForm(instance=student, hostel_ids=hostel_ids)
     # Reuse the same template; it works for edit too
     return render(request, "gate/add_student.html", {"form": form})
 
@@ -178,54 +410,60 @@ def edit_student(request, pk):
 @permission_required("gate.add_student", login_url="login")
 @permission_required("gate.change_student", login_url="login")
 def import_students_csv(request):
+    from .importer import import_students
+
+    report = None
+    hostel_ids = hostels.request_ids(request)
     if request.method == "POST":
-        form = CSVUploadForm(request.POST, request.FILES)
+        form = CSVUploadForm(request.POST, request.FILES, hostel_ids=hostel_ids)
         if form.is_valid():
-            text = io.TextIOWrapper(request.FILES["file"].file, encoding="utf-8", newline="")
-            reader = csv.DictReader(text)
-            created = updated = errors = 0
-            for row in reader:
-                try:
-                    enr = (row.get("enrollment_number") or "").strip()
-                    name = (row.get("full_name") or "").strip()
-                    room = (row.get("room_number") or "").strip()
-                    phone = (row.get("phone") or "").strip()
-                    if not enr or not name:
-                        errors += 1
-                        continue
-                    obj, is_created = Student.objects.update_or_create(
-                        enrollment_number__iexact=enr,
-                        defaults={
-                            "enrollment_number": enr,
-                            "full_name": name,
-                            "room_number": room,
-                            "phone": phone,
-                        },
-                    )
-                    if is_created:
-                        created += 1
-                    else:
-                        updated += 1
-                except Exception:
-                    errors += 1
-            messages.success(request, f"Import complete. Created: {created}, Updated: {updated}, Errors: {errors}")
-            return redirect("import_students_csv")
+            hostel = form.cleaned_data["hostel"]
+            report = import_students(
+                request.FILES["file"].file,
+                hostel_id=hostel.pk if hostel else hostels.default_for(request),
+                hostel_ids=hostel_ids,
+                dry_run=form.cleaned_data["dry_run"],
+            )
+            if report.error_count:
+                messages.info(request, report.summary())
+            else:
+                messages.success(request, report.summary())
     else:
-        form = CSVUploadForm()
-    return render(request, "gate/import_students_csv.html", {"form": form})
+        form = CSVUploadForm(hostel_ids=hostel_ids, initial={"hostel": hostels.default_for(request)})
+    return render(request, "gate/import_students_csv.html", {"form": form, "report": report})
 
 
 # -------------------- JSON APIs (keep for integrations) --------------------
 
+def _roster_etag(request, *args, **kwargs):
+    hostel_ids = hostels.request_ids(request)
+    return version_etag(cached_roster_version(hostel_ids), hostel_ids)
+
+
+def _roster_last_modified(request, *args, **kwargs):
+    return cached_roster_version(hostels.request_ids(request))[0]
+
+
+def _device_gate(request):
+    """The gate a device-key request's scanner is bound to, or None."""
+    device = getattr(request.user, "device", None)
+    return device.gate if device is not None else None
+
+
+# Lookups answer 304 while the user's part of the roster is unchanged.
+# no-cache lets clients and proxies keep a copy but makes them revalidate
+# on every use, so a toggle is never served stale.
+@accepts_device_keys
 @csrf_exempt
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@vary_on_headers("Authorization", "Cookie")
+@condition(etag_func=_roster_etag, last_modified_func=_roster_last_modified)
 def api_search(request):
     q = (request.GET.get("q") or "").strip()
     if not q:
         return JsonResponse({"results": []})
-    qs = Student.objects.filter(
-        Q(enrollment_number__icontains=q) | Q(full_name__icontains=q)
-    ).order_by("enrollment_number")[:50]
+    qs = search_students(q, limit=50, hostel_ids=hostels.request_ids(request))
     data = [{
         "enrollment": s.enrollment_number,
         "name": s.full_name,
@@ -236,24 +474,60 @@ def api_search(request):
     return JsonResponse({"results": data})
 
 
+@accepts_device_keys
+@require_http_methods(["GET"])
+def api_autocomplete(request):
+    """
+    Compact suggestions for the search box: {"q": ..., "results":
+    [[enrollment, name, is_inside], ...]}. Prefix matches only, with the
+    fuzzy tail used just when no prefix matches.
+    """
+    q = (request.GET.get("q") or "").strip()
+    try:
+        limit = max(1, min(int(request.GET.get("limit") or 10), 20))
+    except ValueError:
+        limit = 10
+    if not q:
+        return JsonResponse({"q": q, "results": []})
+    hostel_ids = hostels.request_ids(request)
+    students = (
+        search_students(q, limit=limit, fuzzy=False, hostel_ids=hostel_ids)
+        or search_students(q, limit=limit, hostel_ids=hostel_ids)
+    )
+    return JsonResponse({
+        "q": q,
+        "results": [[s.enrollment_number, s.full_name, s.is_inside] for s in students],
+    })
+
+
+@accepts_device_keys
 @csrf_exempt
-@require_http_methods(["POST"])
+@require_http_methods(["GET", "POST"])
+@cache_control(private=True, no_cache=True)
+@vary_on_headers("Authorization", "Cookie")
+@condition(etag_func=_roster_etag, last_modified_func=_roster_last_modified)
 def api_check(request):
-    enr = (request.POST.get("enrollment_number") or "").strip()
+    """
+    Look up one student by enrollment number. Prefer
+    ``GET ?enrollment_number=...``: it is cacheable and answers 304 while
+    the roster is unchanged. POST is kept for existing integrations.
+    """
+    params = request.GET if request.method == "GET" else request.POST
+    enr = (params.get("enrollment_number") or "").strip()
     if not enr:
         return JsonResponse({"found": False, "error": "missing_enrollment_number"}, status=400)
-    try:
-        s = Student.objects.get(enrollment_number__iexact=enr)
-        return JsonResponse({
-            "found": True,
-            "enrollment": s.enrollment_number,
-            "name": s.full_name,
-            "is_inside": s.is_inside,
-        })
-    except Student.DoesNotExist:
+    card = cards.get_card(enr, hostels.request_ids(request))
+    if card is None:
         return JsonResponse({"found": False}, status=404)
+    return JsonResponse({
+        "found": True,
+        "enrollment": card["enrollment_number"],
+        "name": card["full_name"],
+        "is_inside": card["is_inside"],
+    })
 
 
+@accepts_device_keys
 @csrf_exempt
 @require_http_methods(["POST"])
 @permission_required("gate.can_toggle_status", login_url="login")
@@ -262,21 +536,21 @@ def api_toggle(request):
     note = (request.POST.get("note") or "").strip()
     if not enr:
         return JsonResponse({"ok": False, "error": "missing_enrollment_number"}, status=400)
+    idempotency_key = request.POST.get("idempotency_key") or request.headers.get("Idempotency-Key")
     try:
-        s = Student.objects.get(enrollment_number__iexact=enr)
+        s, log, replayed = toggle_student(
+            enr,
+            user=request.user,
+            note=note,
+            idempotency_key=idempotency_key,
+            photo=request.FILES.get("photo"),
+            hostel_ids=hostels.request_ids(request),
+            gate=_device_gate(request),
+        )
     except Student.DoesNotExist:
         return JsonResponse({"ok": False, "error": "not_found"}, status=404)
-
-    s.is_inside = not s.is_inside
-    s.save()
-
-    direction = MovementLog.IN if s.is_inside else MovementLog.OUT
-    MovementLog.objects.create(
-        student=s,
-        direction=direction,
-        recorded_by=request.user if request.user.is_authenticated else None,
-        note=note,
-    )
+    except IdempotencyKeyConflict:
+        return JsonResponse({"ok": False, "error": "idempotency_key_conflict"}, status=409)
 
     return JsonResponse(
         {
@@ -284,7 +558,127 @@ def api_toggle(request):
             "enrollment": s.enrollment_number,
             "name": s.full_name,
             "is_inside": s.is_inside,
-            "direction": direction,
-            "timestamp": timezone.now().isoformat(),
+            "direction": log.direction,
+            "timestamp": log.timestamp.isoformat(),
+            "replayed": replayed,
         }
     )
+
+
+@accepts_device_keys
+@csrf_exempt
+@require_http_methods(["POST"])
+@permission_required("gate.can_toggle_status", login_url="login")
+def api_toggle_batch(request):
+    """
+    Replay scans queued on a gate device while it was offline.
+
+    Body: {"scans": [{"enrollment": "...", "direction": "IN" | "OUT" | "TOGGLE",
+    "timestamp": "<ISO 8601>", "note": "...", "key": "<idempotency key>"}, ...]}
+    Scans are applied in order; the response has one result per scan. A
+    scan older than the student's last movement is logged without changing
+    their status (``"stale": true``).
+    """
+    try:
+        scans = json.loads(request.body or b"{}").get("scans")
+    except (ValueError, AttributeError):
+        return JsonResponse({"ok": False, "error": "invalid_json"}, status=400)
+    if not isinstance(scans, list):
+        return JsonResponse({"ok": False, "error": "missing_scans"}, status=400)
+    max_scans = getattr(settings, "GATE_BATCH_MAX_SCANS", 1000)
+    if len(scans) > max_scans:
+        return JsonResponse({"ok": False, "error": "too_many_scans", "max": max_scans}, status=400)
+
+    results = [None] * len(scans)
+    valid, positions = [], []
+    for i, raw in enumerate(scans):
+        if not isinstance(raw, dict):
+            results[i] = {"ok": False, "error": "invalid_scan"}
+            continue
+        enr = str(raw.get("enrollment") or "").strip()
+        direction = str(raw.get("direction") or TOGGLE).strip().upper()
+        if not enr:
+            results[i] = {"ok": False, "error": "missing_enrollment_number"}
+            continue
+        if direction not in (MovementLog.IN, MovementLog.OUT, TOGGLE):
+            results[i] = {"ok": False, "enrollment": enr, "error": "invalid_direction"}
+            continue
+        ts = None
+        if raw.get("timestamp"):
+            try:
+                ts = parse_datetime(str(raw["timestamp"]))
+            except ValueError:  # well-formed but impossible, e.g. 2026-02-30
+                ts = None
+            if ts is None:
+                results[i] = {"ok": False, "enrollment": enr, "error": "invalid_timestamp"}
+                continue
+            if timezone.is_naive(ts):
+                ts = timezone.make_aware(ts)
+        valid.append({
+            "enrollment": enr,
+            "direction": direction,
+            "timestamp": ts,
+            "note": str(raw.get("note") or "").strip(),
+            "key": str(raw.get("key") or "").strip()[:64] or None,
+        })
+        positions.append(i)
+
+    if valid:
+        applied = apply_scan_batch(
+            valid, user=request.user, hostel_ids=hostels.request_ids(request), gate=_device_gate(request)
+        )
+        for i, result in zip(positions, applied):
+            results[i] = result
+
+    return JsonResponse({"ok": True, "results": results})
+
+
+@accepts_device_keys
+@gzip_page
+@require_http_methods(["GET"])
+@permission_required("gate.can_toggle_status", login_url="login")
+def api_sync(request):
+    """
+    Roster for gate devices that answer checks locally.
+
+    Only the hostels the caller may see are sent; a scanner bound to a gate
+    gets its hostel's students. ``?since=<watermark>`` returns only students
+    changed (and enrollment keys deleted or moved away) since then. Without
+    it, with ``?full=1``, or when the delta is too large, the whole roster
+    is sent with an ETag so an unchanged roster costs a 304. Every payload
+    carries the watermark for the next call.
+    """
+    hostel_ids = hostels.request_ids(request)
+    since_param = request.GET.get("since")
+    if since_param and not request.GET.get("full"):
+        since = parse_watermark(since_param)
+        if since is None:
+            return JsonResponse({"error": "invalid_watermark"}, status=400)
+        payload = delta(since, hostel_ids)
+        if payload is not None:
+            return JsonResponse(payload)
+
+    version = roster_version(hostel_ids)
+    etag = quote_etag(version_etag(version, hostel_ids))
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(snapshot(version, hostel_ids))
+    response["ETag"] = etag
+    return response
+
+
+# -------------------- Metrics (staff or scraper token) --------------------
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """Prometheus text exposition of this process's request metrics."""
+    token = getattr(settings, "GATE_METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    allowed = request.user.is_staff or (
+        token and hmac.compare_digest(auth.encode(), f"Bearer {token}".encode())
+    )
+    if not allowed:
+        return HttpResponseForbidden("Forbidden")
+    body = metrics.registry.render() + "\n".join(cards.metric_lines() + journal.metric_lines()) + "\n"
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")